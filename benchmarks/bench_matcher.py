@@ -0,0 +1,77 @@
+"""Benchmark how paragraph matching cost grows with the number of rules.
+
+Compares the old per-rule ``str.replace`` loop with the compiled
+single-pass matcher.
+
+Usage:
+    python -m benchmarks.bench_matcher [--rules 1,10,100,1000,2000,10000]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from benchmarks.corpus import make_rules
+from src.matcher import PlainMatcher
+
+
+def make_paragraphs(rules: List[dict], count: int = 200,
+                    seed: int = 1) -> List[str]:
+    """Generate paragraphs of ~500 characters with a few rule hits each."""
+    rng = random.Random(seed)
+    filler = "lorem ipsum dolor sit amet consectetur adipiscing elit "
+    paragraphs = []
+    for _ in range(count):
+        parts = [filler * 4]
+        for rule in rng.sample(rules, min(3, len(rules))):
+            parts.append(rule["old_text"])
+            parts.append(filler)
+        paragraphs.append(" ".join(parts))
+    return paragraphs
+
+
+def naive_replace(rules: List[dict]) -> Callable[[str], str]:
+    def run(text: str) -> str:
+        for rule in rules:
+            text = text.replace(rule["old_text"], rule["new_text"])
+        return text
+    return run
+
+
+def timed(func: Callable[[str], object], paragraphs: List[str],
+          repeat: int = 3) -> float:
+    """Best-of-``repeat`` microseconds per paragraph."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in paragraphs:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(paragraphs) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", default="1,10,100,1000,2000,10000",
+                        help="Comma separated rule counts")
+    parser.add_argument("--paragraphs", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rules':>7} {'compile ms':>11} {'naive us/p':>11} "
+          f"{'compiled us/p':>14} {'speedup':>8}")
+    for count in (int(n) for n in args.rules.split(",")):
+        rules = make_rules(count)
+        paragraphs = make_paragraphs(rules, args.paragraphs)
+
+        start = time.perf_counter()
+        matcher = PlainMatcher(rules)
+        compile_ms = (time.perf_counter() - start) * 1e3
+
+        naive = timed(naive_replace(rules), paragraphs)
+        compiled = timed(matcher.replace, paragraphs)
+        print(f"{count:>7} {compile_ms:>11.1f} {naive:>11.1f} "
+              f"{compiled:>14.1f} {naive / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
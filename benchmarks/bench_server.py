@@ -0,0 +1,105 @@
+"""Load-test the local replacement service: requests/s and latency percentiles.
+
+Each client thread keeps one connection open and posts the same document
+to ``/replace`` until the duration is over. 503 answers (back-pressure)
+are counted separately from errors.
+
+Usage:
+    # against a running ``wr-cl --serve`` instance
+    python -m benchmarks.bench_server --address unix:/tmp/wr-cl.sock
+    # or start a server in-process from a config file
+    python -m benchmarks.bench_server --config config.json --concurrency 16
+"""
+import argparse
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+from benchmarks.corpus import CorpusSpec, make_corpus
+from src.config import load_config
+from src.metrics import percentile
+from src.server import DEFAULT_ADDRESS, ReplacementServer, connect
+
+
+def client(address: str, data: bytes, deadline: float,
+           latencies: List[float], statuses: Counter,
+           lock: threading.Lock) -> None:
+    conn = connect(address)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/replace", body=data)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except OSError:
+                conn.close()
+                conn = connect(address)
+                status = "error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help="host:port or unix:PATH")
+    parser.add_argument("--config", type=Path,
+                        help="Start a server with this config in-process")
+    parser.add_argument("--file", type=Path,
+                        help="Document to send (default: a generated one)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.file:
+            data = args.file.read_bytes()
+        else:
+            paths = make_corpus(Path(tmp), 1, CorpusSpec(paragraphs=50,
+                                                         table_rows=10))
+            data = paths[0].read_bytes()
+        if args.config:
+            config = load_config(str(args.config))
+            config.setdefault("log_level", "error")
+            server = ReplacementServer(config, args.address)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.duration
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(
+            server.address if server else args.address, data, deadline,
+            latencies, statuses, lock)) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        if server:
+            server.shutdown()
+
+    latencies.sort()
+    print(f"document: {len(data) / 1e3:.0f} kB, "
+          f"concurrency: {args.concurrency}, duration: {wall:.1f}s")
+    print(f"ok: {statuses[200]}  busy (503): {statuses[503]}  "
+          f"other: {sum(statuses.values()) - statuses[200] - statuses[503]}")
+    print(f"throughput: {statuses[200] / wall:.1f} req/s")
+    print("latency ms: " + "  ".join(
+        f"p{q}={percentile(latencies, q) * 1e3:.1f}" for q in (50, 90, 99)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark CLI start-up time for ``--help`` and a single-file run.
+
+Each command is run in a fresh process, like the scheduler does, so the
+numbers include interpreter start-up, imports and (for a PyInstaller
+one-file build) self-extraction. ``python -c pass`` is reported as the
+floor for the source checkout.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 20]
+    python -m benchmarks.bench_startup --exe dist/wr-cl          # onefile
+    python -m benchmarks.bench_startup --exe dist/wr-cl/wr-cl    # onedir
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+from benchmarks.corpus import CorpusSpec, make_corpus
+
+
+def timed_runs(command: Sequence[str], repeat: int) -> List[float]:
+    """Wall-clock milliseconds of ``repeat`` runs of ``command``."""
+    # 先运行一次预热文件系统缓存，不计入结果
+    subprocess.run(command, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1e3)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exe", type=Path,
+                        help="Built executable to measure instead of "
+                             "the source checkout")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cli = [str(args.exe)] if args.exe else [sys.executable, "-m", "src.cli"]
+    with tempfile.TemporaryDirectory() as tmp:
+        make_corpus(Path(tmp), 1, CorpusSpec(paragraphs=50, table_rows=0,
+                                             rules=10))
+        config = str(Path(tmp) / "config.json")
+        cases = [("--help", cli + ["--help"]),
+                 ("single file", cli + ["--config", config,
+                                        "--log-level", "error"])]
+        if not args.exe:
+            cases.insert(0, ("python -c pass", [sys.executable, "-c", "pass"]))
+
+        print(f"{'command':<16} {'min ms':>8} {'median ms':>10} {'max ms':>8}")
+        for name, command in cases:
+            times = timed_runs(command, args.repeat)
+            print(f"{name:<16} {min(times):>8.1f} "
+                  f"{statistics.median(times):>10.1f} {max(times):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
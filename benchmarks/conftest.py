@@ -0,0 +1,47 @@
+"""Fixtures for the benchmark suite.
+
+Run with:
+    pytest benchmarks --benchmark-only --no-cov -p no:randomly
+"""
+import shutil
+from pathlib import Path
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, make_corpus, make_rules
+
+pytest.importorskip("pytest_benchmark")
+
+# 生成语料较慢，整个会话内按参数缓存
+_CORPORA = {}
+
+
+@pytest.fixture(scope="session")
+def corpus_root(tmp_path_factory):
+    return tmp_path_factory.mktemp("corpus")
+
+
+@pytest.fixture(scope="session")
+def corpus(corpus_root):
+    """Return a factory ``corpus(docs, **spec) -> (paths, config)``."""
+    def build(docs: int = 8, **spec):
+        key = (docs, tuple(sorted(spec.items())))
+        if key not in _CORPORA:
+            directory = corpus_root / f"c{len(_CORPORA)}"
+            spec = CorpusSpec(**spec)
+            paths = make_corpus(directory, docs, spec)
+            config = {
+                "replacements": {"pattern_type": "plain",
+                                 "rules": make_rules(spec.rules, spec.seed)},
+                "file_settings": {"input_path": str(directory / "input"),
+                                  "output_path": str(directory / "output")},
+                "advanced": {"max_workers": 4, "timeout": 30},
+                "log_level": "error",
+            }
+            _CORPORA[key] = (paths, config)
+        paths, config = _CORPORA[key]
+        output = Path(config["file_settings"]["output_path"])
+        shutil.rmtree(output, ignore_errors=True)
+        output.mkdir(parents=True)
+        return paths, config
+    return build
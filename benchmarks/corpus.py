@@ -0,0 +1,136 @@
+"""Deterministic synthetic docx corpus for benchmarks.
+
+Usage:
+    python -m benchmarks.corpus OUTPUT_DIR [--docs 100] [--paragraphs 200]
+        [--table-rows 50] [--table-cols 5] [--runs-per-paragraph 4]
+        [--image-kb 0] [--rules 100] [--seed 0]
+"""
+import argparse
+import json
+import random
+import string
+import struct
+import zlib
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import List
+
+from docx import Document
+
+FILLER = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do "
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of every generated document."""
+    paragraphs: int = 200
+    table_rows: int = 50
+    table_cols: int = 5
+    runs_per_paragraph: int = 4
+    image_kb: int = 0
+    rules: int = 100
+    # 命中规则的段落比例
+    hit_rate: float = 0.1
+    seed: int = 0
+
+
+def make_rules(count: int, seed: int = 0) -> List[dict]:
+    """Generate ``count`` distinct brand-like rules."""
+    rng = random.Random(seed)
+    seen = set()
+    rules = []
+    while len(rules) < count:
+        word = "".join(rng.choices(string.ascii_letters, k=rng.randint(5, 12)))
+        if word in seen:
+            continue
+        seen.add(word)
+        rules.append({"old_text": word, "new_text": word.upper()})
+    return rules
+
+
+def make_png(size_kb: int, seed: int = 0) -> bytes:
+    """A valid RGB PNG of roughly ``size_kb`` kilobytes of noise."""
+    rng = random.Random(seed)
+    width = 256
+    height = max(1, size_kb * 1024 // (width * 3))
+    rows = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + tag + data
+                + struct.pack(">I", zlib.crc32(tag + data)))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(rows, 1)) + chunk(b"IEND", b""))
+
+
+def _fragments(text: str, count: int) -> List[str]:
+    step = max(1, len(text) // max(1, count))
+    return [text[i:i + step] for i in range(0, len(text), step)]
+
+
+def make_document(path: Path, spec: CorpusSpec, rules: List[dict],
+                  index: int = 0) -> Path:
+    """Write one synthetic document described by ``spec`` to ``path``."""
+    rng = random.Random(spec.seed * 100003 + index)
+
+    def sentence() -> str:
+        text = FILLER * 2
+        if rules and rng.random() < spec.hit_rate:
+            text += rng.choice(rules)["old_text"] + " " + FILLER
+        return text
+
+    doc = Document()
+    for _ in range(spec.paragraphs):
+        paragraph = doc.add_paragraph()
+        # 将文本拆成多个 run，模拟 Word 中被编辑过多次的段落
+        for fragment in _fragments(sentence(), spec.runs_per_paragraph):
+            paragraph.add_run(fragment)
+    if spec.table_rows and spec.table_cols:
+        table = doc.add_table(rows=spec.table_rows, cols=spec.table_cols)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = sentence()[:40]
+    if spec.image_kb:
+        doc.add_picture(BytesIO(make_png(spec.image_kb, spec.seed + index)))
+    doc.save(str(path))
+    return path
+
+
+def make_corpus(directory: Path, docs: int, spec: CorpusSpec) -> List[Path]:
+    """Write ``docs`` documents and a matching ``config.json`` to ``directory``."""
+    directory = Path(directory)
+    input_dir = directory / "input"
+    input_dir.mkdir(parents=True, exist_ok=True)
+    rules = make_rules(spec.rules, spec.seed)
+    paths = [make_document(input_dir / f"doc_{i:05d}.docx", spec, rules, i)
+             for i in range(docs)]
+    config = {
+        "replacements": {"pattern_type": "plain", "rules": rules},
+        "file_settings": {"input_path": str(input_dir),
+                          "output_path": str(directory / "output")},
+        "advanced": {"max_workers": 4, "timeout": 30},
+        "corpus": asdict(spec),
+    }
+    with open(directory / "config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--docs", type=int, default=100)
+    for name, value in asdict(CorpusSpec()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value),
+                            default=value)
+    args = vars(parser.parse_args())
+    output, docs = args.pop("output"), args.pop("docs")
+    paths = make_corpus(output, docs, CorpusSpec(**args))
+    size = sum(p.stat().st_size for p in paths)
+    print(f"Wrote {len(paths)} documents ({size / 1e6:.1f} MB) to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Peak memory of one benchmark workload, measured in a fresh process.
+
+``ru_maxrss`` of the pytest process is the peak of the whole session and
+only grows from one benchmark to the next, so each workload is run once
+more in its own interpreter. The peak of that process and, for
+``executor: "process"``, the largest per-worker peak collected by the
+run's metrics are reported.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def measure(config: Dict[str, Any],
+            document: Optional[Path] = None) -> Dict[str, float]:
+    """Run ``process_document(document)``, or ``process_all()``, in a new process.
+
+    Returns ``peak_rss_mb`` (the measuring process) and
+    ``workers_peak_rss_mb`` (the largest worker process, 0 without one).
+    """
+    advanced = dict(config["advanced"], metrics=True)
+    request = {"config": dict(config, advanced=advanced, log_level="error"),
+               "document": str(document) if document else None}
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.peak_rss"], cwd=ROOT,
+        input=json.dumps(request), capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    from src.processor import DocumentProcessor
+    from src.utils import peak_rss_mb
+
+    request = json.load(sys.stdin)
+    processor = DocumentProcessor(request["config"])
+    results = []
+    if request["document"]:
+        processor.process_document(
+            Path(request["document"]),
+            Path(request["config"]["file_settings"]["output_path"]))
+    else:
+        results = processor.process_all()
+    # 工作进程的峰值由 metrics 随每个文件的结果带回
+    workers = [r.peak_rss_mb for r in results
+               if r.pid not in (None, os.getpid()) and r.peak_rss_mb]
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(),
+                      "workers_peak_rss_mb": max(workers, default=0.0)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Throughput benchmarks for paragraph, document and batch processing.
+
+Each benchmark records docs/s, MB/s and the peak RSS of the workload in
+``extra_info`` so runs can be compared with ``pytest-benchmark compare``.
+Peak RSS is measured by a separate run in a fresh process (see
+``benchmarks.peak_rss``), including the largest process-pool worker.
+"""
+import copy
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from docx import Document
+
+from benchmarks import peak_rss
+from src.processor import DocumentProcessor
+
+RULE_COUNTS = [1, 100, 1000, 10000]
+
+
+def _record(benchmark, docs: int, size: int, config,
+            document: Optional[Path] = None) -> None:
+    if benchmark.stats is None:
+        # --benchmark-disable 时只运行一次，没有统计数据
+        return
+    seconds = benchmark.stats.stats.mean
+    benchmark.extra_info.update({
+        "docs_per_s": docs / seconds,
+        "mb_per_s": size / 1e6 / seconds,
+        **peak_rss.measure(config, document),
+    })
+
+
+@pytest.mark.parametrize("rules", RULE_COUNTS)
+def test_process_paragraph(benchmark, corpus, rules):
+    """Matching cost per paragraph as the rule set grows."""
+    paths, config = corpus(docs=1, rules=rules, table_rows=0, hit_rate=0.5)
+    processor = DocumentProcessor(config)
+    paragraphs = Document(str(paths[0])).paragraphs
+
+    def setup():
+        # 每轮使用新的段落副本，避免上一轮的替换结果影响匹配；复制不计入耗时
+        return (copy.deepcopy(paragraphs),), {}
+
+    def run(copies):
+        return sum(processor._process_paragraph(p) for p in copies)
+
+    benchmark.pedantic(run, setup=setup, rounds=20, iterations=1)
+    benchmark.extra_info["paragraphs"] = len(paragraphs)
+
+
+@pytest.mark.parametrize("engine", ["docx", "xml"])
+@pytest.mark.parametrize("shape", [
+    {"paragraphs": 200, "table_rows": 0},
+    {"paragraphs": 50, "table_rows": 400, "table_cols": 6},
+    {"paragraphs": 200, "runs_per_paragraph": 20},
+    {"paragraphs": 50, "image_kb": 4096},
+], ids=["paragraphs", "table", "fragmented", "image"])
+def test_process_document(benchmark, corpus, engine, shape):
+    """Single document processing for different document shapes."""
+    paths, config = corpus(docs=1, **shape)
+    config = dict(config, advanced=dict(config["advanced"], engine=engine))
+    processor = DocumentProcessor(config)
+    output = Path(config["file_settings"]["output_path"])
+
+    benchmark(processor.process_document, paths[0], output)
+    _record(benchmark, 1, paths[0].stat().st_size, config, paths[0])
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_process_all(benchmark, corpus, executor):
+    """Batch throughput of process_all per executor."""
+    paths, config = corpus(docs=32, paragraphs=100, table_rows=50)
+    config = dict(config, advanced=dict(config["advanced"], executor=executor))
+    processor = DocumentProcessor(config)
+
+    benchmark.pedantic(processor.process_all, rounds=3, iterations=1)
+    _record(benchmark, len(paths), sum(p.stat().st_size for p in paths),
+            config)
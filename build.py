@@ -1,4 +1,5 @@
 """Build script for creating executable."""
+import argparse
 import os
 import sys
 import shutil
@@ -16,35 +17,51 @@ def clean_build_dirs():
             print(f"Removed {dir_path}")
 
 
-def create_spec_file():
-    """Create spec file for PyInstaller."""
+def create_spec_file(mode="onefile", upx=True):
+    """Create spec file for PyInstaller.
+
+    ``onefile`` bundles everything into one executable that unpacks itself
+    to a temporary directory on every run; ``onedir`` leaves the unpacked
+    tree in ``dist/<APP_NAME>/`` so each run starts without extraction.
+    """
     icon_path = ''
     if ICON_FILE and ICON_FILE.exists():
         icon_path = str(ICON_FILE).replace('\\', '\\\\')
+    icon = f"'{icon_path}'" if icon_path else "None"
 
-    spec_content = f"""# -*- mode: python ; coding: utf-8 -*-
-
-block_cipher = None
-
-a = Analysis(
-    ['main.py'],
-    pathex=['{ROOT_DIR}'],
-    binaries=[],
-    datas={DATA_FILES},
-    hiddenimports={HIDDEN_IMPORTS},
-    hookspath=[],
-    hooksconfig={{}},
-    runtime_hooks=[],
-    excludes=[],
-    win_no_prefer_redirects=False,
-    win_private_assemblies=False,
-    cipher=block_cipher,
-    noarchive=False,
+    if mode == "onedir":
+        # onedir：exe 只包含脚本，依赖库与数据文件放在同一目录，启动时无需解压
+        exe_content = f"""exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='{APP_NAME}',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx={upx},
+    console=True,
+    disable_windowed_traceback=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon={icon},
 )
 
-pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
-
-exe = EXE(
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx={upx},
+    upx_exclude=[],
+    name='{APP_NAME}',
+)
+"""
+    else:
+        exe_content = f"""exe = EXE(
     pyz,
     a.scripts,
     a.binaries,
@@ -55,7 +72,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx={upx},
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,
@@ -63,16 +80,40 @@ exe = EXE(
     target_arch=None,
     codesign_identity=None,
     entitlements_file=None,
-    icon='{icon_path}' if '{icon_path}' else None,
+    icon={icon},
 )
 """
+
+    spec_content = f"""# -*- mode: python ; coding: utf-8 -*-
+
+block_cipher = None
+
+a = Analysis(
+    ['main.py'],
+    pathex=['{ROOT_DIR}'],
+    binaries=[],
+    datas={DATA_FILES},
+    hiddenimports={HIDDEN_IMPORTS},
+    hookspath=[],
+    hooksconfig={{}},
+    runtime_hooks=[],
+    excludes={EXCLUDES},
+    win_no_prefer_redirects=False,
+    win_private_assemblies=False,
+    cipher=block_cipher,
+    noarchive=False,
+)
+
+pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+
+{exe_content}"""
     spec_file = ROOT_DIR / f"{APP_NAME}.spec"
     spec_file.write_text(spec_content, encoding='utf-8')
     print(f"Created spec file: {spec_file}")
     return spec_file
 
 
-def build_executable():
+def build_executable(mode="onefile", upx=True):
     """Build the executable using PyInstaller."""
     try:
         # Install PyInstaller if not already installed
@@ -83,7 +124,7 @@ def build_executable():
         clean_build_dirs()
 
         # Create spec file
-        spec_file = create_spec_file()
+        spec_file = create_spec_file(mode, upx)
 
         # Build executable
         print("\nBuilding executable...")
@@ -99,7 +140,8 @@ def build_executable():
         )
 
         print("\nBuild completed successfully!")
-        exe_path = DIST_DIR / \
+        exe_dir = DIST_DIR / APP_NAME if mode == "onedir" else DIST_DIR
+        exe_path = exe_dir / \
             (f"{APP_NAME}.exe" if sys.platform.startswith('win') else APP_NAME)
         print(f"Executable location: {exe_path}")
 
@@ -115,8 +157,22 @@ def build_executable():
 
 def main():
     """Main entry point for build script."""
+    parser = argparse.ArgumentParser(description="Build the wr-cl executable")
+    parser.add_argument(
+        "--mode",
+        choices=BUILD_MODES,
+        default="onefile",
+        help="onefile: single executable, unpacked on every run; onedir: "
+             "unpacked directory that starts faster (default: onefile)",
+    )
+    parser.add_argument(
+        "--no-upx",
+        action="store_true",
+        help="Do not compress binaries with UPX (faster startup, larger size)",
+    )
+    args = parser.parse_args()
     try:
-        if build_executable():
+        if build_executable(args.mode, upx=not args.no_upx):
             print("\nBuild successful!")
             sys.exit(0)
         else:
@@ -35,6 +35,16 @@ HIDDEN_IMPORTS = [
     'concurrent.futures',
 ]
 
+# 未被程序使用、但可能被分析器顺带收集的大型模块
+EXCLUDES = [
+    'tkinter',
+    'unittest',
+    'pydoc',
+]
+
+# 打包模式：onefile 每次运行都要解压到临时目录，onedir 直接从目录启动
+BUILD_MODES = ("onefile", "onedir")
+
 # Icon Files
 ICON_FILE = None
 if sys.platform.startswith('win'):
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """Main entry point for the application."""
+import multiprocessing
 import sys
 from src.cli import main
 
 if __name__ == "__main__":
+    # PyInstaller 打包后使用进程池需要 freeze_support
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,184 @@
+"""Asyncio pipeline that overlaps slow file I/O with CPU-bound processing."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from src import utils
+from src.cache import Manifest, bytes_digest
+from src.discovery import FoundFile
+from src.memory import MB, MemoryBudget
+from src.metrics import RunSummary
+from src.pool import WorkerPool
+from src.processor import FileResult
+from src.report import ChangeReport
+
+# 预读文档占用内存的上限（MB）
+DEFAULT_PREFETCH_MB = 256
+# 负责打开、读取、写入文件的 I/O 线程数；网络存储上延迟越高越需要更多线程
+DEFAULT_IO_WORKERS = 16
+
+
+def _read(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class AsyncDriver:
+    """Runs a batch as an asyncio pipeline, for inputs on slow storage.
+
+    Discovery, reads and writes run on a pool of ``advanced.io_workers``
+    I/O threads driven by the event loop, so many files can wait on the
+    network at once. The next ``advanced.prefetch`` documents are read
+    into memory ahead of the CPU work, bounded by ``advanced.prefetch_mb``.
+    The CPU work runs on the supervised process pool, so it never competes
+    with the I/O threads for the GIL. A file's bytes count against the
+    budget until its output is written.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        advanced = processor.advanced
+        self.max_workers = advanced["max_workers"]
+        self.prefetch = advanced.get("prefetch") or self.max_workers * 2
+        self.budget = MemoryBudget(
+            int(advanced.get("prefetch_mb", DEFAULT_PREFETCH_MB) * MB))
+        self.io_workers = advanced.get("io_workers", DEFAULT_IO_WORKERS)
+        self.logger = processor.logger
+
+    def run(self) -> List[FileResult]:
+        return asyncio.run(self._run())
+
+    async def _run(self) -> List[FileResult]:
+        p = self.processor
+        input_path = Path(p.file_settings["input_path"])
+        output_path = Path(p.file_settings["output_path"])
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input path does not exist: {input_path}")
+        if not p.dry_run:
+            output_path.mkdir(parents=True, exist_ok=True)
+
+        run_start = time.perf_counter()
+        results: List[FileResult] = []
+        manifest = p._open_manifest(output_path)
+        report = (ChangeReport(p.report_path)
+                  if p.dry_run and p.report_path else None)
+        # 预读的文件数与正在处理的文件数之和有上限
+        slots = asyncio.Semaphore(self.prefetch + self.max_workers)
+        self._budget_changed = asyncio.Condition()
+        tasks = set()
+
+        def finished(task: "asyncio.Task[FileResult]") -> None:
+            tasks.discard(task)
+            slots.release()
+            try:
+                result = task.result()
+            except Exception as e:
+                result = FileResult(path=task.get_name(), error=str(e))
+            # 清单已在 I/O 线程中更新，这里只记录日志和报告
+            p._record(result, None, report)
+            results.append(result)
+
+        with ThreadPoolExecutor(self.io_workers,
+                                thread_name_prefix="wr-cl-io") as io, \
+                WorkerPool(p, "process", self.max_workers, p.timeout) as pool:
+            self._io, self._pool = io, pool
+            async for found in self._discover(input_path):
+                await slots.acquire()
+                task = asyncio.create_task(
+                    self._process(found, output_path, manifest),
+                    name=str(found.path))
+                task.add_done_callback(finished)
+                tasks.add(task)
+            if tasks:
+                await asyncio.wait(set(tasks))
+
+        if manifest:
+            manifest.save()
+        if report:
+            report.close()
+            self.logger.info("Dry run: %d replacements written to %s",
+                             report.count, report.path)
+        if not results:
+            self.logger.warning("No files found to process")
+        else:
+            self.logger.info("Processed %d files from %s", len(results),
+                             input_path)
+        if p.collect_metrics:
+            p._report_metrics(RunSummary(results,
+                                         time.perf_counter() - run_start))
+        return results
+
+    async def _io_call(self, func: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._io, partial(func, *args))
+
+    async def _discover(self, root: Path) -> AsyncIterator[FoundFile]:
+        """Walk the input tree on an I/O thread, one entry at a time."""
+        files = self.processor._iter_files(root)
+        while True:
+            found = await self._io_call(next, files, None)
+            if found is None:
+                return
+            yield found
+
+    async def _process(self, found: FoundFile, output_path: Path,
+                       manifest: Optional[Manifest]) -> FileResult:
+        p = self.processor
+        file_path, size, relative = found
+        target_dir = utils.mirror_output_dir(relative, output_path)
+        output_file = utils.get_output_path(file_path, target_dir)
+        if manifest and await self._io_call(manifest.is_fresh, file_path,
+                                            output_file):
+            return FileResult(path=str(file_path), action="cached")
+
+        async with self._budget_changed:
+            await self._budget_changed.wait_for(lambda: self.budget.fits(size))
+            self.budget.acquire(file_path, size)
+        timings: Dict[str, float] = {}
+        try:
+            start = time.perf_counter()
+            try:
+                data = await self._io_call(_read, file_path)
+            except OSError as e:
+                return FileResult(path=str(file_path), error=str(e))
+            timings["read"] = time.perf_counter() - start
+
+            result = (await asyncio.wrap_future(
+                self._pool.submit([(str(file_path), data)])))[0]
+            if not result.error and not p.dry_run:
+                start = time.perf_counter()
+                try:
+                    await self._io_call(self._write, file_path, target_dir,
+                                        output_file, result)
+                    if manifest:
+                        result.input_hash = bytes_digest(data)
+                        await self._io_call(manifest.record, result)
+                except OSError as e:
+                    result.error = str(e)
+                timings["write"] = time.perf_counter() - start
+        finally:
+            async with self._budget_changed:
+                self.budget.release(file_path)
+                self._budget_changed.notify_all()
+
+        result.data = None
+        if p.collect_metrics:
+            result.timings.update(timings)
+        return result
+
+    def _write(self, file_path: Path, target_dir: Path, output_file: Path,
+               result: FileResult) -> None:
+        """Publish one result on an I/O thread."""
+        target_dir.mkdir(parents=True, exist_ok=True)
+        if result.modified:
+            with utils.atomic_output(output_file) as tmp_file:
+                tmp_file.write_bytes(result.data)
+            result.output = str(output_file)
+        else:
+            result.action = self.processor._write_unchanged(file_path,
+                                                            output_file)
+            if result.action != "skipped":
+                result.output = str(output_file)
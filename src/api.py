@@ -0,0 +1,161 @@
+"""Library API for replacing text in documents held in memory.
+
+Example::
+
+    from src.api import Replacer, replace_bytes
+
+    output, report = replace_bytes(data, [{"old_text": "公司A",
+                                           "new_text": "DeepSeek"}])
+
+    replacer = Replacer(rules)          # compile once, reuse for many calls
+    for result in replacer.replace_many(documents, max_workers=4):
+        store(result.path, result.data)
+
+Nothing here touches the disk (except reading paths passed to
+``replace_many``) or configures logging: messages go to the standard
+``src.api`` logger, which is silent unless the application configures
+logging itself.
+"""
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import (IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
+
+from src.pool import Job, WorkerPool
+from src.processor import DocumentProcessor, FileResult
+
+# 库模式不配置终端输出：处理器的日志交给标准的 src.api logger
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+# 规则可以是规则列表、完整的 replacements 配置段或已编译的 Replacer
+Rules = Union[List[Dict[str, Any]], Dict[str, Any], "Replacer"]
+# replace_many 的输入：bytes、(名称, bytes) 或文件路径
+Item = Union[bytes, Tuple[str, bytes], "os.PathLike[str]", str]
+
+
+class Replacer:
+    """A compiled rule set that processes documents in memory.
+
+    ``rules`` is a list of rule dicts (as in the ``replacements.rules``
+    config section) or a whole ``replacements`` section. ``options`` are
+    ``advanced`` settings such as ``engine`` or ``large_file_mb``. With
+    ``dry_run`` the documents are not rewritten and each result lists the
+    matches in ``changes``.
+    """
+
+    def __init__(self, rules: Union[List[Dict[str, Any]], Dict[str, Any]],
+                 pattern_type: str = "plain", dry_run: bool = False,
+                 **options: Any):
+        replacements = rules if isinstance(rules, dict) else {
+            "pattern_type": pattern_type, "rules": list(rules)}
+        self.config = {
+            "replacements": replacements,
+            "file_settings": {"input_path": "", "output_path": ""},
+            "advanced": dict({"max_workers": os.cpu_count() or 1}, **options),
+        }
+        self.processor = DocumentProcessor(self.config, dry_run=dry_run,
+                                           logger=_logger)
+
+    def replace_bytes(self, data: bytes,
+                      name: str = "<memory>") -> Tuple[bytes, FileResult]:
+        """Return the rewritten document and its result record.
+
+        Raises on documents that cannot be processed. A document without
+        matches is returned unchanged; in dry-run mode the input is
+        returned and ``report.changes`` lists the matches.
+        """
+        report = self.processor.process_bytes(data, name)
+        output = data if report.data is None else report.data
+        # 输出内容只通过返回值传递，报告保持轻量
+        report.data = None
+        return output, report
+
+    def replace_stream(self, fin: IO[bytes], fout: IO[bytes],
+                       name: str = "<stream>") -> FileResult:
+        """Read a document from ``fin`` and write the result to ``fout``."""
+        output, report = self.replace_bytes(fin.read(), name)
+        fout.write(output)
+        return report
+
+    def replace_many(self, items: Iterable[Item],
+                     max_workers: Optional[int] = None,
+                     executor: str = "thread") -> Iterator[FileResult]:
+        """Process many documents, yielding each result as it completes.
+
+        ``items`` are bytes, ``(name, bytes)`` pairs or paths. Results come
+        in completion order with the output in ``result.data`` (the input
+        itself for documents without matches, and in dry-run mode);
+        failures are reported in ``result.error`` instead of raised. At most
+        ``2 * max_workers`` documents are held in memory at a time, and
+        ``items`` is consumed lazily.
+        """
+        max_workers = max_workers or self.config["advanced"]["max_workers"]
+        pending: Dict[Future, Job] = {}
+        with WorkerPool(self.processor, executor, max_workers) as pool:
+            for index, item in enumerate(items):
+                while len(pending) >= max_workers * 2:
+                    yield from self._completed(pending)
+                try:
+                    job = _job(item, index)
+                except OSError as e:
+                    yield FileResult(path=str(item), error=str(e))
+                    continue
+                pending[pool.submit([job])] = job
+            while pending:
+                yield from self._completed(pending)
+
+    @staticmethod
+    def _completed(pending: Dict[Future, Job]) -> Iterator[FileResult]:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, data = pending.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                yield FileResult(path=name, error=str(e))
+                continue
+            for result in results:
+                if result.data is None and not result.error:
+                    # 工作进程不回传未修改的文档，这里补上原始内容
+                    result.data = data
+                yield result
+
+
+def _job(item: Item, index: int) -> Job:
+    if isinstance(item, bytes):
+        return f"<memory:{index}>", item
+    if isinstance(item, tuple):
+        name, data = item
+        return str(name), bytes(data)
+    with open(item, "rb") as f:
+        return os.fspath(item), f.read()
+
+
+def _replacer(rules: Rules, **options: Any) -> Replacer:
+    return rules if isinstance(rules, Replacer) else Replacer(rules, **options)
+
+
+def replace_bytes(data: bytes, rules: Rules,
+                  **options: Any) -> Tuple[bytes, FileResult]:
+    """Replace text in a docx held in memory; see :meth:`Replacer.replace_bytes`.
+
+    Pass a :class:`Replacer` as ``rules`` to avoid recompiling the rules on
+    every call.
+    """
+    return _replacer(rules, **options).replace_bytes(data)
+
+
+def replace_stream(fin: IO[bytes], fout: IO[bytes], rules: Rules,
+                   **options: Any) -> FileResult:
+    """Stream variant of :func:`replace_bytes`."""
+    return _replacer(rules, **options).replace_stream(fin, fout)
+
+
+def replace_many(items: Iterable[Item], rules: Rules,
+                 max_workers: Optional[int] = None, executor: str = "thread",
+                 **options: Any) -> Iterator[FileResult]:
+    """Generator over many documents; see :meth:`Replacer.replace_many`."""
+    return _replacer(rules, **options).replace_many(items, max_workers,
+                                                    executor)
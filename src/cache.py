@@ -0,0 +1,145 @@
+"""Persistent manifest used to skip documents that are already up to date."""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MANIFEST_NAME = ".wr-cl-manifest.json"
+MANIFEST_VERSION = 1
+
+# 会影响输出内容的 advanced 配置项，修改后缓存失效
+_OUTPUT_SETTINGS = ("engine", "unchanged_files")
+
+
+def file_digest(path: Path) -> str:
+    """Return the content hash of a file."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def bytes_digest(data: bytes) -> str:
+    """Return the content hash of data already in memory (see file_digest)."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """Fingerprint the parts of the configuration that affect output."""
+    advanced = config.get("advanced", {})
+    relevant = {
+        "replacements": config["replacements"],
+        "advanced": {key: advanced.get(key) for key in _OUTPUT_SETTINGS},
+    }
+    data = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _stat_key(path: Path) -> Optional[Dict[str, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class Manifest:
+    """On-disk record of processed inputs, their hashes and outputs.
+
+    A file is fresh when its content hash and the config fingerprint match
+    the entry and the recorded output is still in place. The content hash
+    is only recomputed when the input's size or mtime changed.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, Dict[str, Any]] = self._read()
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def is_fresh(self, file_path: Path, output_file: Path) -> bool:
+        """Return True if ``file_path`` does not need to be processed again."""
+        entry = self.entries.get(str(file_path))
+        if not entry or entry.get("fingerprint") != self.fingerprint:
+            return False
+
+        if entry.get("output"):
+            if _stat_key(output_file) != entry.get("output_stat"):
+                return False
+        elif output_file.exists():
+            # 上次未输出（skip），但现在存在同名文件，需要重新处理
+            return False
+
+        stat = _stat_key(file_path)
+        if stat is None:
+            return False
+        if stat == entry.get("stat"):
+            return True
+        if file_digest(file_path) != entry.get("hash"):
+            return False
+        # 内容未变，只是 mtime 改变：更新记录避免下次再计算哈希
+        self._update(str(file_path), dict(entry, stat=stat))
+        return True
+
+    def record(self, result) -> None:
+        """Record a successfully processed file."""
+        if result.error or not result.input_hash:
+            return
+        file_path = Path(result.path)
+        self._update(result.path, {
+            "hash": result.input_hash,
+            "stat": _stat_key(file_path),
+            "fingerprint": self.fingerprint,
+            "output": result.output,
+            "output_stat": _stat_key(Path(result.output)) if result.output else None,
+        })
+
+    def _update(self, key: str, entry: Dict[str, Any]) -> None:
+        self.entries[key] = entry
+        self._dirty[key] = entry
+
+    def save(self) -> None:
+        """Merge pending entries into the manifest file atomically.
+
+        Entries written by other runs in the meantime are kept; an exclusive
+        lock serializes concurrent writers where the platform supports it.
+        """
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        with open(lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            entries = self._read()
+            entries.update(self._dirty)
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=self.path.name, dir=self.path.parent)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"version": MANIFEST_VERSION, "entries": entries},
+                              f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_name, self.path)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        self.entries = entries
+        self._dirty = {}
@@ -3,10 +3,11 @@ import sys
 from pathlib import Path
 from typing import List, Optional
 
-# 导入抽离的 logger 配置方法
-from src import config
-from src import processor
-from src.logger_config import setup_logger
+# 启动时只导入参数解析需要的轻量模块；config / processor（python-docx、
+# lxml、进程池）、profiling（cProfile 等）在解析参数之后才导入，
+# --help 和参数错误无需加载它们。以下取值与 src.profiling 保持一致
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_SAMPLE_INTERVAL = 0.005
 
 
 def main(args: Optional[List[str]] = None) -> int:
@@ -25,14 +26,67 @@ def main(args: Optional[List[str]] = None) -> int:
         action="store_true",
         help="Preview changes without modifying files",
     )
+    parser.add_argument(
+        "--report",
+        type=str,
+        metavar="PATH",
+        help="With --dry-run, write every match to PATH "
+             "(.jsonl, or .csv for CSV) instead of logging it",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its journal, skipping files "
+             "that were already processed",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: process existing documents, then every new or "
+             "changed document under input_path; reload rules when the "
+             "config file changes",
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const="127.0.0.1:8765",
+        metavar="ADDRESS",
+        help="Run a local replacement service on host:port or unix:PATH "
+             "(default: 127.0.0.1:8765) instead of processing input_path",
+    )
     parser.add_argument(
         "--log-level",
         choices=["debug", "info", "warning", "error"],
-        default="debug",
-        help="Set the logging level (default: debug)",
+        default="info",
+        help="Set the logging level (default: info)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="PATH",
+        help="Profile the run, including all workers, and write the merged "
+             "result to PATH (pstats for cprofile, collapsed stacks for sample)",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default="cprofile",
+        help="Profiler to use with --profile (default: cprofile)",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=DEFAULT_SAMPLE_INTERVAL,
+        help="Sampling interval in seconds for --profile-mode sample "
+             f"(default: {DEFAULT_SAMPLE_INTERVAL})",
     )
 
     parsed_args = parser.parse_args(args)
+    if parsed_args.report and not parsed_args.dry_run:
+        parser.error("--report requires --dry-run")
+
+    # 导入抽离的 logger 配置方法
+    from src.logger_config import setup_logger
 
     # 使用抽离的 logger 设置方法
     logger = setup_logger("src.cli", level=parsed_args.log_level)
@@ -41,6 +95,8 @@ def main(args: Optional[List[str]] = None) -> int:
     logger.debug("Starting application with arguments: %s", vars(parsed_args))
 
     try:
+        from src import config
+
         config_path = Path(parsed_args.config)
         if not config_path.exists():
             logger.error("Configuration file not found: %s",
@@ -50,6 +106,24 @@ def main(args: Optional[List[str]] = None) -> int:
         logger.debug("Loading configuration from: %s", config_path)
         cfg = config.load_config(str(config_path))
         logger.info("Configuration loaded successfully")
+        # 未在配置中指定时，处理器沿用命令行的日志等级
+        cfg.setdefault("log_level", parsed_args.log_level)
+        if parsed_args.report:
+            cfg["advanced"]["report"] = parsed_args.report
+        if parsed_args.resume:
+            cfg["advanced"]["resume"] = True
+
+        # 服务模式按请求处理文档，不需要 input_path
+        if parsed_args.serve:
+            from src.server import ReplacementServer
+
+            server = ReplacementServer(cfg, parsed_args.serve,
+                                       dry_run=parsed_args.dry_run)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logger.info("Server stopped")
+            return 0
 
         input_path = Path(cfg["file_settings"]["input_path"])
         if not input_path.exists():
@@ -60,13 +134,36 @@ def main(args: Optional[List[str]] = None) -> int:
         logger.debug("Output directory set to: %s",
                      cfg["file_settings"]["output_path"])
 
+        if parsed_args.watch:
+            from src.watch import WatchService
+
+            service = WatchService(config_path, dry_run=parsed_args.dry_run,
+                                   config=cfg)
+            try:
+                service.run()
+            except KeyboardInterrupt:
+                logger.info("Watch mode stopped")
+            return 0
+
         logger.debug("Initializing document processor...")
+        from src import processor
+
         doc_processor = processor.DocumentProcessor(
             cfg, dry_run=parsed_args.dry_run)
         logger.info("Document processor initialized")
 
         logger.info("Starting document processing...")
-        doc_processor.process_all()
+        if parsed_args.profile:
+            from src import profiling
+
+            with profiling.profile_run(
+                    Path(parsed_args.profile), parsed_args.profile_mode,
+                    parsed_args.profile_interval) as profile:
+                doc_processor.profile = profile
+                doc_processor.process_all()
+            logger.info("Profile written to: %s", parsed_args.profile)
+        else:
+            doc_processor.process_all()
         logger.info("Processing completed successfully")
         return 0
 
@@ -4,8 +4,7 @@ from pathlib import Path
 from typing import Dict, Any
 from src.logger_config import setup_logger
 
-logger = setup_logger(
-    "src.config", level="debug")
+logger = setup_logger("src.config")
 
 DEFAULT_CONFIG = {
     "replacements": {
@@ -28,7 +27,8 @@ DEFAULT_CONFIG = {
     },
     "advanced": {
         "max_workers": 4,
-        "timeout": 30
+        "timeout": 30,
+        "executor": "thread"
     }
 }
 
@@ -37,7 +37,27 @@ def create_default_config(config_path: str) -> None:
     """Create a default configuration file."""
     with open(config_path, 'w', encoding='utf-8') as f:
         json.dump(DEFAULT_CONFIG, f, indent=2, ensure_ascii=False)
-    logger.info(f"Created default configuration file at {config_path}")
+    logger.info("Created default configuration file at %s", config_path)
+
+
+# 仅 regex 模式支持的规则选项及其默认值；plain 模式按原文逐字匹配
+REGEX_ONLY_OPTIONS = {"case_sensitive": True, "whole_word": False}
+
+
+def check_rule_options(config: Dict[str, Any]) -> None:
+    """Warn about rule options that plain rules do not honor."""
+    replacements = config.get("replacements") or {}
+    if replacements.get("pattern_type", "plain") != "plain":
+        return
+    for index, rule in enumerate(replacements.get("rules") or []):
+        options = rule.get("options") or {}
+        ignored = [name for name, default in REGEX_ONLY_OPTIONS.items()
+                   if options.get(name, default) != default]
+        if ignored:
+            logger.warning(
+                "Rule %d (%r): %s only apply with pattern_type 'regex' and "
+                "are ignored for plain rules", index, rule.get("old_text"),
+                ", ".join(ignored))
 
 
 def load_config(config_path: str) -> Dict[str, Any]:
@@ -45,13 +65,14 @@ def load_config(config_path: str) -> Dict[str, Any]:
     config_file = Path(config_path)
 
     if not config_file.exists():
-        logger.warning(f"Configuration file not found at {config_path}")
+        logger.warning("Configuration file not found at %s", config_path)
         create_default_config(config_path)
         return DEFAULT_CONFIG
 
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
             config = json.load(f)
+        check_rule_options(config)
         return config
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in configuration file: {str(e)}")
@@ -0,0 +1,95 @@
+"""Streaming discovery of documents to process."""
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence
+
+FILE_TYPE = ".docx"
+
+
+class FoundFile(NamedTuple):
+    """A discovered document, its size in bytes and its path below the root."""
+    path: Path
+    size: int
+    # 相对于发现根目录的路径（以 / 分隔），用于在输出目录中镜像目录结构
+    relative: str
+
+
+def _matches(rel_path: str, name: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch(rel_path, p) or fnmatch(name, p) for p in patterns)
+
+
+def _entry_size(entry: os.DirEntry) -> int:
+    try:
+        return entry.stat().st_size
+    except OSError:
+        return 0
+
+
+def is_document(relative: str, include: Sequence[str] = (),
+                exclude: Sequence[str] = (),
+                max_depth: Optional[int] = None) -> bool:
+    """Return True if the file at ``relative`` would be discovered.
+
+    Applies the same rules as :func:`iter_found_files` to a single path
+    below the root, including excluded or too deep parent directories;
+    used for files reported one at a time, e.g. by watch mode.
+    """
+    parts = relative.split("/")
+    name = parts[-1]
+    if max_depth is not None and len(parts) - 1 > max_depth:
+        return False
+    if exclude:
+        for i in range(1, len(parts)):
+            if _matches("/".join(parts[:i]), parts[i - 1], exclude):
+                return False
+    return (name.endswith(FILE_TYPE) and not name.startswith("~$")
+            and (not include or _matches(relative, name, include))
+            and not (exclude and _matches(relative, name, exclude)))
+
+
+def iter_found_files(root: Path, include: Sequence[str] = (),
+                     exclude: Sequence[str] = (),
+                     max_depth: Optional[int] = None,
+                     skip: Iterable[Path] = ()) -> Iterator[FoundFile]:
+    """Yield .docx files under ``root`` with their sizes as they are found.
+
+    Directories are walked with ``os.scandir`` without building a full
+    listing first. Patterns are matched with ``fnmatch`` against the path
+    relative to ``root`` (``*`` also matches ``/``) or against the bare
+    name; excluded directories are not descended into. ``max_depth`` limits
+    how many directory levels below ``root`` are visited (0 = root only).
+    Word lock files (``~$*.docx``) are always skipped. Sizes come from
+    the directory entry, so scheduling needs no separate ``stat`` pass.
+    Files and directories in ``skip`` (e.g. the output directory when it
+    lies inside ``root``) are left out, so outputs written while the walk
+    is still running are not picked up as inputs.
+    """
+    skipped = {os.path.abspath(path) for path in skip}
+    stack = [(str(root), "", 0)]
+    while stack:
+        directory, rel_dir, depth = stack.pop()
+        subdirs = []
+        try:
+            it = os.scandir(directory)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                rel_path = f"{rel_dir}{entry.name}"
+                if skipped and os.path.abspath(entry.path) in skipped:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    if exclude and _matches(rel_path, entry.name, exclude):
+                        continue
+                    subdirs.append((entry.path, rel_path + "/", depth + 1))
+                elif (entry.name.endswith(FILE_TYPE)
+                      and not entry.name.startswith("~$")
+                      and (not include or _matches(rel_path, entry.name, include))
+                      and not (exclude and _matches(rel_path, entry.name, exclude))):
+                    yield FoundFile(Path(entry.path), _entry_size(entry),
+                                    rel_path)
+        # 子目录在当前目录的文件之后处理，深度优先
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,333 @@
+"""Raw WordprocessingML processing without the python-docx object model."""
+import html
+import re
+import zipfile
+from bisect import bisect_right
+from typing import IO, Any, Dict, Iterator, List, Tuple, Union
+
+from lxml import etree
+
+from src.metrics import NULL_TIMER
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W_P = f"{{{W_NS}}}p"
+W_T = f"{{{W_NS}}}t"
+W_R = f"{{{W_NS}}}r"
+# 制表符与换行在段落文本中作为分隔符，匹配不能跨越它们
+SEPARATORS = {f"{{{W_NS}}}tab": "\t", f"{{{W_NS}}}br": "\n",
+              f"{{{W_NS}}}cr": "\n"}
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+CT_OVERRIDE = "{http://schemas.openxmlformats.org/package/2006/content-types}Override"
+
+# 含正文文本的部件（story）的内容类型后缀：正文、页眉页脚、脚注尾注、批注。
+# 文本框位于这些部件内部，随所在部件一起处理
+STORY_CONTENT_TYPES = ("main+xml", "header+xml", "footer+xml",
+                       "footnotes+xml", "endnotes+xml", "comments+xml")
+# 缺少 [Content_Types].xml 时按部件名识别
+_STORY_PART_NAME = re.compile(
+    r"word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml")
+
+# 预扫描用：按字节提取 w:t 文本节点内容，以及作为分隔符的 w:tab/w:br/w:cr。
+# 段落属性中的制表位定义也是 w:tab，但它们位于所有文本之前，不会拆开文本
+_TEXT_NODE = re.compile(
+    rb"<w:t(?:\s[^>]*)?>([^<]*)</w:t>|<w:(?:tab|br|cr)(?:\s[^>]*)?/>")
+
+# 不解析外部实体；大文档需要 huge_tree
+_PARSER = etree.XMLParser(resolve_entities=False, huge_tree=True)
+
+PathOrFile = Union[str, IO[bytes]]
+
+# 预览报告中匹配前后各保留的上下文字符数
+CONTEXT_CHARS = 40
+
+
+def is_story_content_type(content_type: str) -> bool:
+    """Return True for WordprocessingML content types that hold document text."""
+    return (content_type.endswith(STORY_CONTENT_TYPES)
+            and ("wordprocessingml" in content_type or "ms-word" in content_type))
+
+
+def story_parts(zin: zipfile.ZipFile) -> List[str]:
+    """List the story parts of a package, each exactly once.
+
+    Parts are identified by their content type, so every header or footer
+    part is visited once no matter how many sections link to it.
+    """
+    names = zin.namelist()
+    try:
+        root = etree.fromstring(zin.read("[Content_Types].xml"), _PARSER)
+    except KeyError:
+        return [name for name in names if _STORY_PART_NAME.fullmatch(name)]
+    present = set(names)
+    parts = []
+    for override in root.iter(CT_OVERRIDE):
+        name = override.get("PartName", "").lstrip("/")
+        if name in present and is_story_content_type(
+                override.get("ContentType", "")):
+            parts.append(name)
+    return parts
+
+
+def _nearest_paragraph(node):
+    parent = node.getparent()
+    while parent is not None and parent.tag != W_P:
+        parent = parent.getparent()
+    return parent
+
+
+def _is_text_node(node) -> bool:
+    if node.tag == W_T:
+        return True
+    # w:pPr/w:tabs 中的 w:tab 是制表位定义，不是文本
+    parent = node.getparent()
+    return parent is not None and parent.tag == W_R
+
+
+def _node_text(node) -> str:
+    return node.text or "" if node.tag == W_T else SEPARATORS[node.tag]
+
+
+def paragraph_text_nodes(p) -> List:
+    """Return the text nodes that belong to paragraph ``p`` itself.
+
+    These are its ``w:t`` nodes plus the ``w:tab``, ``w:br`` and ``w:cr``
+    separators between them. Text of paragraphs nested inside ``p`` (text
+    boxes) is excluded.
+    """
+    return [t for t in p.iter(W_T, *SEPARATORS)
+            if _is_text_node(t) and _nearest_paragraph(t) is p]
+
+
+def iter_paragraph_text_nodes(root) -> Iterator[List]:
+    """Yield the text nodes of every paragraph under ``root``.
+
+    Text nodes (see :func:`paragraph_text_nodes`) are grouped by their
+    nearest enclosing ``w:p`` so paragraphs nested in text boxes are
+    yielded separately from the outer paragraph.
+    """
+    groups: Dict = {}
+    for t in root.iter(W_T, *SEPARATORS):
+        if _is_text_node(t):
+            groups.setdefault(_nearest_paragraph(t), []).append(t)
+    for p, nodes in groups.items():
+        if p is not None:
+            yield nodes
+
+
+def _find_in_segment(matcher, text: str, start: int, end: int) -> List:
+    if end <= start:
+        return []
+    if not start and end == len(text):
+        return list(matcher.finditer(text))
+    return [m._replace(start=m.start + start, end=m.end + start)
+            for m in matcher.finditer(text[start:end])]
+
+
+def find_in_text_nodes(nodes: List, matcher) -> Tuple[List[str], List]:
+    """Match the concatenated text of ``nodes``; returns (texts, matches).
+
+    Separators contribute a tab or newline character to the text, and the
+    ``w:t`` text between two separators is matched on its own, so no match
+    spans a tab or line break.
+    """
+    texts = [_node_text(t) for t in nodes]
+    full_text = "".join(texts)
+    if not full_text:
+        return texts, []
+    matches = []
+    start = position = 0
+    for node, text in zip(nodes, texts):
+        if node.tag != W_T:
+            matches += _find_in_segment(matcher, full_text, start, position)
+            start = position + len(text)
+        position += len(text)
+    matches += _find_in_segment(matcher, full_text, start, position)
+    return texts, matches
+
+
+def apply_to_text_nodes(nodes: List, texts: List[str], matches: List) -> int:
+    """Write ``matches`` found by :func:`find_in_text_nodes` into ``nodes``.
+
+    Each match is written into the first node it touches and removed from
+    the rest, so only nodes overlapping a match are edited and run
+    properties are kept. Returns the number of replacements.
+    """
+    if not matches:
+        return 0
+    offsets = []
+    position = 0
+    for text in texts:
+        offsets.append(position)
+        position += len(text)
+
+    touched = set()
+    # 从后往前替换，前面匹配在原文本中的偏移保持有效
+    for start, end, replacement in reversed(matches):
+        first = max(bisect_right(offsets, start) - 1, 0)
+        if start == position:
+            first = len(texts) - 1
+        # 段末的空匹配会落在其后的分隔符上，改写入前面的 w:t
+        while first > 0 and nodes[first].tag != W_T:
+            first -= 1
+        last = bisect_right(offsets, end - 1) - 1 if end > start else first
+        head = texts[first][:start - offsets[first]]
+        if first == last:
+            texts[first] = head + replacement + texts[first][end - offsets[first]:]
+        else:
+            texts[first] = head + replacement
+            for index in range(first + 1, last):
+                texts[index] = ""
+            texts[last] = texts[last][end - offsets[last]:]
+        touched.update(range(first, last + 1))
+
+    for index in touched:
+        node = nodes[index]
+        node.text = texts[index]
+        node.set(XML_SPACE, "preserve")
+    return len(matches)
+
+
+def replace_in_text_nodes(nodes: List, matcher) -> int:
+    """Apply ``matcher`` to the concatenated text of ``nodes`` in place.
+
+    Returns the number of replacements.
+    """
+    texts, matches = find_in_text_nodes(nodes, matcher)
+    return apply_to_text_nodes(nodes, texts, matches)
+
+
+def replace_in_element(root, matcher, timer=NULL_TIMER) -> int:
+    """Apply ``matcher`` to every paragraph under ``root`` in place.
+
+    Each paragraph is matched and rewritten before the next one, so only
+    one paragraph's texts and matches are alive at a time. With metrics
+    enabled, traversal, matching and rewriting run as separate passes so
+    each can be timed on its own. Returns the number of replacements.
+    """
+    if not timer.enabled:
+        count = 0
+        for nodes in iter_paragraph_text_nodes(root):
+            texts, matches = find_in_text_nodes(nodes, matcher)
+            if matches:
+                count += apply_to_text_nodes(nodes, texts, matches)
+        return count
+    with timer.stage("traverse"):
+        paragraphs = list(iter_paragraph_text_nodes(root))
+    with timer.stage("match"):
+        found = [(nodes,) + find_in_text_nodes(nodes, matcher)
+                 for nodes in paragraphs]
+    with timer.stage("rebuild"):
+        count = sum(apply_to_text_nodes(nodes, texts, matches)
+                    for nodes, texts, matches in found if matches)
+    timer.count("paragraphs", len(paragraphs))
+    timer.count("matches", count)
+    return count
+
+
+def replace_in_xml(data: bytes, matcher,
+                   timer=NULL_TIMER) -> Tuple[bytes, int]:
+    """Rewrite the text of one story part; returns (xml, replacements)."""
+    with timer.stage("parse"):
+        root = etree.fromstring(data, _PARSER)
+    count = replace_in_element(root, matcher, timer)
+    if not count:
+        return data, 0
+    with timer.stage("rebuild"):
+        xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8",
+                             standalone=True)
+    return xml, count
+
+
+def collect_updates(source: PathOrFile, matcher,
+                    timer=NULL_TIMER) -> Tuple[Dict[str, bytes], int]:
+    """Rewrite the story parts of a package in memory.
+
+    Returns the changed parts keyed by member name and the number of
+    replacements made.
+    """
+    updates: Dict[str, bytes] = {}
+    total = 0
+    with zipfile.ZipFile(source) as zin:
+        for name in story_parts(zin):
+            with timer.stage("parse"):
+                data = zin.read(name)
+            xml, count = replace_in_xml(data, matcher, timer)
+            if count:
+                updates[name] = xml
+                total += count
+    return updates, total
+
+
+def find_changes(source: PathOrFile, matcher,
+                 timer=NULL_TIMER) -> List[Dict[str, Any]]:
+    """List every replacement a real run would make, without changing anything.
+
+    Uses the same story parts, paragraph grouping and matcher as
+    :func:`replace_in_element`. ``paragraph`` is the index among the
+    text-bearing paragraphs of the part; ``start``/``end`` are offsets in
+    that paragraph's text.
+    """
+    changes: List[Dict[str, Any]] = []
+    with zipfile.ZipFile(source) as zin:
+        for name in story_parts(zin):
+            with timer.stage("parse"):
+                root = etree.fromstring(zin.read(name), _PARSER)
+            with timer.stage("traverse"):
+                paragraphs = list(iter_paragraph_text_nodes(root))
+            with timer.stage("match"):
+                for index, nodes in enumerate(paragraphs):
+                    texts, matches = find_in_text_nodes(nodes, matcher)
+                    if not matches:
+                        continue
+                    text = "".join(texts)
+                    for start, end, replacement in matches:
+                        changes.append({
+                            "part": name,
+                            "paragraph": index,
+                            "start": start,
+                            "end": end,
+                            "old_text": text[start:end],
+                            "new_text": replacement,
+                            "context": text[max(0, start - CONTEXT_CHARS):
+                                            end + CONTEXT_CHARS],
+                        })
+            timer.count("paragraphs", len(paragraphs))
+    timer.count("matches", len(changes))
+    return changes
+
+
+def _iter_prescan_texts(data: bytes) -> Iterator[str]:
+    """Yield the text between separators of each paragraph in ``data``."""
+    for chunk in data.split(b"</w:p>"):
+        texts: List[bytes] = []
+        for m in _TEXT_NODE.finditer(chunk):
+            if m.group(1) is not None:
+                texts.append(m.group(1))
+            elif texts:
+                yield html.unescape(b"".join(texts).decode("utf-8"))
+                texts = []
+        if texts:
+            yield html.unescape(b"".join(texts).decode("utf-8"))
+
+
+def may_match(source: PathOrFile, matcher) -> bool:
+    """Cheaply decide whether any rule can match before a full parse.
+
+    The raw story XML is searched per paragraph with a byte-level scan of
+    the ``w:t`` nodes. The answer is conservative: False means no rule can
+    match, True means the document has to be processed.
+    """
+    with zipfile.ZipFile(source) as zin:
+        for name in story_parts(zin):
+            data = zin.read(name)
+            # 非 w: 前缀或含文本框（段落嵌套）时无法按字节拆分段落
+            if b"<w:p" not in data or b"txbxContent" in data:
+                return True
+            try:
+                if any(matcher.search(text)
+                       for text in _iter_prescan_texts(data)):
+                    return True
+            except UnicodeDecodeError:
+                return True
+    return False
@@ -0,0 +1,99 @@
+"""Append-only checkpoint journal used to resume interrupted runs."""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+JOURNAL_NAME = ".wr-cl-journal.jsonl"
+# 每个文件的状态：已提交待处理 / 已完成 / 失败
+STATES = ("pending", "done", "failed")
+DEFAULT_FSYNC_INTERVAL = 1.0
+DEFAULT_FSYNC_LINES = 1024
+
+
+class Journal:
+    """Per-file state of a run, one JSON object per line.
+
+    Lines are only ever appended; the state of a file is its last line.
+    Writes go through the file buffer and are flushed and fsynced at most
+    every ``fsync_interval`` seconds or ``fsync_lines`` lines, so a crash
+    can lose only the last batch, which a resumed run simply redoes. A
+    torn final line is ignored when the journal is read back.
+    """
+
+    def __init__(self, path: Path, resume: bool = False,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 fsync_lines: int = DEFAULT_FSYNC_LINES):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.fsync_lines = fsync_lines
+        self.entries: Dict[str, Dict[str, Any]] = self._read() if resume else {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 非续跑时开始新的日志
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry["path"]] = entry
+        except OSError:
+            pass
+        return entries
+
+    def is_done(self, path: str) -> bool:
+        entry = self.entries.get(path)
+        return bool(entry) and entry.get("state") == "done"
+
+    def mark_pending(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self._append({"path": path, "state": "pending"})
+
+    def record(self, result, attempt: int = 0) -> None:
+        """Record the outcome of one processing attempt."""
+        self._append({
+            "path": result.path,
+            "state": "failed" if result.error else "done",
+            "action": result.action,
+            "error": result.error,
+            "duration": result.timings.get("total"),
+            "attempt": attempt,
+        })
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        entry["time"] = time.time()
+        self.entries[entry["path"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_lines
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush buffered lines and fsync them to disk."""
+        if not self._unsynced:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        self.sync()
+        self._file.close()
+
+
+def open_journal(setting: Any, output_path: Path, resume: bool) -> Optional[Journal]:
+    """Open the journal configured by ``advanced.journal`` / ``--resume``."""
+    if not setting and not resume:
+        return None
+    path = setting if isinstance(setting, str) else output_path / JOURNAL_NAME
+    return Journal(Path(path), resume=resume)
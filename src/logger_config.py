@@ -1,14 +1,76 @@
+import atexit
 import logging
+import queue
+import sys
+import weakref
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
 
 
-def setup_logger(name: str, level: str = "debug") -> Logger:
+class _StderrHandler(logging.StreamHandler):
+    """Console handler that always writes to the current ``sys.stderr``."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+_console = _StderrHandler()
+_console.setFormatter(logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+))
+
+# 所有 logger 只把记录放入队列，由后台 QueueListener 线程统一写终端，
+# 处理文件的线程/进程不会因终端输出而阻塞
+_queue: Any = queue.SimpleQueue()
+_handlers: "weakref.WeakSet[QueueHandler]" = weakref.WeakSet()
+_listener: Optional[QueueListener] = None
+
+
+def _start_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_queue, _console)
+        _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records to the console and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def set_queue(target: Any) -> None:
+    """Send the records of every configured logger to ``target``.
+
+    Used by worker processes, whose records must travel back to the parent;
+    ``target`` only needs a ``put_nowait`` method.
+    """
+    global _queue, _listener
+    _queue = target
+    # fork 继承的 listener 属于父进程，子进程中不再使用
+    _listener = None
+    for handler in _handlers:
+        handler.queue = target
+
+
+def setup_logger(name: str, level: str = "info") -> Logger:
     """
     Set up and return a logger with the specified name and log level.
-    This logger is configured to output logs to the console with a formatted output.
+    Records are queued and written to the console by a background listener.
     """
     log_level = level.upper()
-    level_value = getattr(logging, log_level, logging.DEBUG)
+    level_value = getattr(logging, log_level, logging.INFO)
 
     logger = logging.getLogger(name)
     logger.setLevel(level_value)
@@ -17,15 +79,11 @@ def setup_logger(name: str, level: str = "debug") -> Logger:
     if logger.hasHandlers():
         logger.handlers.clear()
 
-    # 创建终端 Handler 并设置级别和格式
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level_value)
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    if isinstance(_queue, queue.SimpleQueue):
+        _start_listener()
+    handler = QueueHandler(_queue)
+    _handlers.add(handler)
+    logger.addHandler(handler)
 
     # 禁止日志向上层传播，避免重复输出
     logger.propagate = False
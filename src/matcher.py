@@ -0,0 +1,208 @@
+"""Compiled matchers for replacement rules."""
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# 规则较少时，逐条用 `in` 预筛（C 实现的子串查找）比遍历大 trie 正则更快
+SMALL_RULESET = 128
+
+
+class Match(NamedTuple):
+    """A single match span in a text and the text that replaces it."""
+    start: int
+    end: int
+    replacement: str
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Merge literal words into one trie-shaped regex.
+
+    Optional tails are greedy, so at any position the longest rule wins.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # 终止标记
+
+    # 显式栈后序遍历：规则很长时递归会超出 Python 的递归深度
+    built: Dict[int, str] = {}
+    stack: List[Tuple[Dict[str, Any], bool]] = [(trie, False)]
+    while stack:
+        node, expanded = stack.pop()
+        children = [(char, child) for char, child in sorted(node.items())
+                    if char]
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for _, child in children)
+            continue
+        branches = [re.escape(char) + built.pop(id(child))
+                    for char, child in children]
+        terminal = "" in node
+        if not branches:
+            body = ""
+        elif len(branches) == 1 and not terminal:
+            body = branches[0]
+        else:
+            body = "(?:" + "|".join(branches) + ")"
+            if terminal:
+                body += "?"
+        built[id(node)] = body
+    return built[id(trie)]
+
+
+@lru_cache(maxsize=1024)
+def _compile_trie(words: Tuple[str, ...]) -> "re.Pattern[str]":
+    return re.compile(_trie_pattern(list(words)))
+
+
+class PlainMatcher:
+    """Single-pass literal matcher built from all rules at once.
+
+    Each paragraph is scanned once; replaced text is never re-scanned, so
+    rules do not cascade into each other's output. Small rule sets first
+    check which literals occur and match with a cached trie of just those.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.mapping: Dict[str, str] = {}
+        for rule in rules:
+            old_text = rule["old_text"]
+            # 空规则无意义；重复规则以第一条为准
+            if old_text and old_text not in self.mapping:
+                self.mapping[old_text] = rule["new_text"]
+        self.literals = tuple(self.mapping)
+        self.small = len(self.literals) <= SMALL_RULESET
+        self.pattern = (_compile_trie(self.literals)
+                        if self.literals and not self.small else None)
+
+    def _pattern_for(self, text: str) -> Optional["re.Pattern[str]"]:
+        if not self.small:
+            return self.pattern
+        present = tuple(word for word in self.literals if word in text)
+        return _compile_trie(present) if present else None
+
+    def search(self, text: str) -> bool:
+        """Return True if any rule matches the text."""
+        if self.small:
+            return any(word in text for word in self.literals)
+        return self.pattern is not None and self.pattern.search(text) is not None
+
+    def finditer(self, text: str) -> Iterator[Match]:
+        """Yield non-overlapping matches from left to right."""
+        pattern = self._pattern_for(text)
+        if pattern is None:
+            return
+        for m in pattern.finditer(text):
+            yield Match(m.start(), m.end(), self.mapping[m.group()])
+
+    def replace(self, text: str) -> Tuple[str, int]:
+        """Apply all rules in one pass and return (new_text, count)."""
+        pattern = self._pattern_for(text)
+        if pattern is None:
+            return text, 0
+        return pattern.subn(lambda m: self.mapping[m.group()], text)
+
+
+# 含反向引用的规则合并后组号会错位，此时不能使用合并预筛
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _rule_flags(options: Dict[str, Any]) -> int:
+    return 0 if options.get("case_sensitive", True) else re.IGNORECASE
+
+
+def _rule_source(rule: Dict[str, Any]) -> str:
+    source = rule["old_text"]
+    if rule.get("options", {}).get("whole_word", False):
+        source = rf"\b(?:{source})\b"
+    return source
+
+
+class RegexMatcher:
+    """Regex rules compiled once, with per-rule options applied as flags.
+
+    A combined alternation of every rule acts as a prefilter, so paragraphs
+    without any hit cost a single scan. Rules are then matched against the
+    original text in order; earlier rules win overlapping spans.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules: List[Tuple["re.Pattern[str]", str]] = []
+        for index, rule in enumerate(rules):
+            if not rule["old_text"]:
+                continue
+            flags = _rule_flags(rule.get("options", {}))
+            try:
+                compiled = re.compile(_rule_source(rule), flags)
+            except re.error as e:
+                raise ValueError(
+                    f"Invalid regex in rule {index} ({rule['old_text']!r}): {e}")
+            self.rules.append((compiled, rule["new_text"]))
+        self.prefilter = self._build_prefilter()
+
+    def _build_prefilter(self) -> Optional["re.Pattern[str]"]:
+        if not self.rules:
+            return None
+        parts = []
+        for compiled, _ in self.rules:
+            if _BACKREFERENCE.search(compiled.pattern):
+                return None
+            prefix = "(?i:" if compiled.flags & re.IGNORECASE else "(?:"
+            parts.append(prefix + compiled.pattern + ")")
+        try:
+            return re.compile("|".join(parts))
+        except re.error:
+            return None
+
+    def search(self, text: str) -> bool:
+        """Return True if any rule matches the text."""
+        if self.prefilter is not None:
+            return self.prefilter.search(text) is not None
+        return any(compiled.search(text) for compiled, _ in self.rules)
+
+    def finditer(self, text: str) -> Iterator[Match]:
+        """Yield non-overlapping matches from left to right."""
+        if not self.search(text):
+            return
+        claimed: List[Tuple[int, int, str]] = []
+        starts: List[int] = []
+        for compiled, template in self.rules:
+            for m in compiled.finditer(text):
+                start, end = m.span()
+                pos = bisect_right(starts, start)
+                if pos and claimed[pos - 1][1] > start:
+                    continue
+                if pos < len(claimed) and claimed[pos][0] < end:
+                    continue
+                starts.insert(pos, start)
+                claimed.insert(pos, (start, end, m.expand(template)))
+        for start, end, replacement in claimed:
+            yield Match(start, end, replacement)
+
+    def replace(self, text: str) -> Tuple[str, int]:
+        """Apply all rules and return (new_text, count)."""
+        pieces = []
+        last = count = 0
+        for match in self.finditer(text):
+            pieces.append(text[last:match.start])
+            pieces.append(match.replacement)
+            last = match.end
+            count += 1
+        if not count:
+            return text, 0
+        pieces.append(text[last:])
+        return "".join(pieces), count
+
+
+def compile_rules(replacements: Dict[str, Any]):
+    """Compile the ``replacements`` config section into a matcher."""
+    pattern_type = replacements.get("pattern_type", "plain")
+    if pattern_type == "regex":
+        return RegexMatcher(replacements["rules"])
+    if pattern_type == "plain":
+        return PlainMatcher(replacements["rules"])
+    raise ValueError(
+        f"Unknown pattern_type '{pattern_type}', expected 'plain' or 'regex'")
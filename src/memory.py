@@ -0,0 +1,41 @@
+"""Memory budget used to throttle the scheduling of large documents."""
+from typing import Dict, Hashable, Optional
+
+# 每字节输入文件估算的处理内存（粗略上限）：docx 引擎会把包内所有部件
+# （包括媒体）读入内存并建立对象树，xml 引擎只解析文本部件
+MEMORY_FACTORS = {"docx": 8, "xml": 4}
+# 超过该大小的文档单独成为一个任务，并走不加载媒体的流式路径
+DEFAULT_LARGE_FILE_MB = 64
+MB = 1024 * 1024
+
+
+def estimate_memory(size: int, engine: str) -> int:
+    """Rough peak memory in bytes needed to process a file of ``size`` bytes."""
+    return size * MEMORY_FACTORS.get(engine, MEMORY_FACTORS["docx"])
+
+
+class MemoryBudget:
+    """Tracks the estimated memory of in-flight work against a limit.
+
+    Work is admitted while the estimates of everything in flight fit in
+    the budget. A single item larger than the whole budget is still
+    admitted once nothing else is running, so it runs alone instead of
+    never running. ``limit`` None disables the budget.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.used = 0
+        self._costs: Dict[Hashable, int] = {}
+
+    def fits(self, cost: int) -> bool:
+        if self.limit is None or not self._costs:
+            return True
+        return self.used + cost <= self.limit
+
+    def acquire(self, key: Hashable, cost: int) -> None:
+        self._costs[key] = cost
+        self.used += cost
+
+    def release(self, key: Hashable) -> None:
+        self.used -= self._costs.pop(key, 0)
@@ -0,0 +1,227 @@
+"""Per-file stage timings, counters and run summaries."""
+import json
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 文件处理的各个阶段
+STAGES = ("queue", "prescan", "parse", "traverse", "match", "rebuild",
+          "save", "total")
+PERCENTILES = (50, 90, 99)
+
+
+class StageTimer:
+    """Accumulates stage durations and counters for one file."""
+
+    enabled = True
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (self.timings.get(name, 0.0)
+                                  + time.perf_counter() - start)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+class NullTimer:
+    """Timer used when metrics are disabled; every call is a no-op."""
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name: str):
+        return self._context
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class RunSummary:
+    """Aggregate of the result records of one run."""
+
+    def __init__(self, results: Iterable, wall_time: float,
+                 run_timings: Optional[Dict[str, float]] = None):
+        self.results = list(results)
+        self.wall_time = wall_time
+        self.run_timings = run_timings or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages: Dict[str, List[float]] = {}
+        counters: Dict[str, int] = {}
+        actions: Dict[str, int] = {}
+        errors = 0
+        for result in self.results:
+            for name, value in result.timings.items():
+                stages.setdefault(name, []).append(value)
+            for name, value in result.counters.items():
+                counters[name] = counters.get(name, 0) + value
+            if result.error:
+                errors += 1
+            else:
+                action = result.action or "none"
+                actions[action] = actions.get(action, 0) + 1
+
+        stage_stats = {}
+        for name, values in stages.items():
+            values.sort()
+            stats = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+            stats.update(max=values[-1], sum=sum(values), count=len(values))
+            stage_stats[name] = stats
+
+        # 每个 worker 进程的峰值 RSS（MB）
+        workers: Dict[str, float] = {}
+        for result in self.results:
+            if result.pid is not None and result.peak_rss_mb is not None:
+                key = str(result.pid)
+                workers[key] = max(workers.get(key, 0.0), result.peak_rss_mb)
+
+        files = len(self.results)
+        wall = self.wall_time or float("inf")
+        return {
+            "files": files,
+            "errors": errors,
+            "actions": actions,
+            "wall_time": self.wall_time,
+            "run_timings": self.run_timings,
+            "docs_per_s": files / wall,
+            "mb_in_per_s": counters.get("bytes_in", 0) / 1e6 / wall,
+            "counters": counters,
+            "stages": stage_stats,
+            "workers_peak_rss_mb": workers,
+        }
+
+    def format(self) -> str:
+        """Human readable multi-line summary."""
+        data = self.to_dict()
+        lines = [
+            f"files={data['files']} errors={data['errors']} "
+            f"wall={data['wall_time']:.2f}s docs/s={data['docs_per_s']:.1f} "
+            f"MB/s={data['mb_in_per_s']:.2f}",
+            "actions: " + ", ".join(
+                f"{k}={v}" for k, v in sorted(data["actions"].items())),
+            "counters: " + ", ".join(
+                f"{k}={v}" for k, v in sorted(data["counters"].items())),
+        ]
+        if data["workers_peak_rss_mb"]:
+            lines.append("peak RSS per worker: " + ", ".join(
+                f"{pid}={mb:.0f}MB" for pid, mb in
+                sorted(data["workers_peak_rss_mb"].items())))
+        for name, value in data["run_timings"].items():
+            lines.append(f"run {name}: {value:.3f}s")
+        for name in sorted(data["stages"], key=_stage_order):
+            stats = data["stages"][name]
+            lines.append(
+                f"stage {name:<9} " + " ".join(
+                    f"p{q}={stats[f'p{q}'] * 1e3:.1f}ms" for q in PERCENTILES)
+                + f" max={stats['max'] * 1e3:.1f}ms sum={stats['sum']:.2f}s")
+        return "\n".join(lines)
+
+
+def _stage_order(name: str) -> int:
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+class MetricsHook:
+    """Base class for metrics consumers; override the events you need."""
+
+    def on_file(self, result) -> None:
+        pass
+
+    def on_run_end(self, summary: RunSummary) -> None:
+        pass
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name, dir=path.parent)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_name, path)
+
+
+class JsonExporter(MetricsHook):
+    """Writes the run summary, and optionally every file record, as JSON."""
+
+    def __init__(self, path: str, include_files: bool = False):
+        self.path = Path(path)
+        self.include_files = include_files
+
+    def on_run_end(self, summary: RunSummary) -> None:
+        data = summary.to_dict()
+        if self.include_files:
+            data["files_detail"] = [
+                {"path": r.path, "action": r.action, "error": r.error,
+                 "replacements": r.replacements, "timings": r.timings,
+                 "counters": r.counters} for r in summary.results]
+        _atomic_write(self.path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+class PrometheusExporter(MetricsHook):
+    """Writes a node_exporter textfile-collector compatible file."""
+
+    def __init__(self, path: str, prefix: str = "wr_cl"):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def on_run_end(self, summary: RunSummary) -> None:
+        data = summary.to_dict()
+        p = self.prefix
+        lines = [
+            f"# TYPE {p}_files gauge", f"{p}_files {data['files']}",
+            f"# TYPE {p}_errors gauge", f"{p}_errors {data['errors']}",
+            f"# TYPE {p}_wall_seconds gauge",
+            f"{p}_wall_seconds {data['wall_time']:.6f}",
+            f"# TYPE {p}_counter gauge",
+        ]
+        lines += [f'{p}_counter{{name="{k}"}} {v}'
+                  for k, v in sorted(data["counters"].items())]
+        lines.append(f"# TYPE {p}_worker_peak_rss_megabytes gauge")
+        lines += [f'{p}_worker_peak_rss_megabytes{{pid="{pid}"}} {mb:.1f}'
+                  for pid, mb in sorted(data["workers_peak_rss_mb"].items())]
+        lines.append(f"# TYPE {p}_stage_seconds summary")
+        for name, stats in sorted(data["stages"].items()):
+            for q in PERCENTILES:
+                lines.append(f'{p}_stage_seconds{{stage="{name}",'
+                             f'quantile="{q / 100}"}} {stats[f"p{q}"]:.6f}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} '
+                         f'{stats["sum"]:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} '
+                         f'{stats["count"]}')
+        _atomic_write(self.path, "\n".join(lines) + "\n")
+
+
+def hooks_from_config(settings: Optional[Dict[str, Any]]) -> List[MetricsHook]:
+    """Build exporters from the ``advanced.metrics`` config section."""
+    if not settings or not isinstance(settings, dict):
+        return []
+    hooks: List[MetricsHook] = []
+    if settings.get("json"):
+        hooks.append(JsonExporter(settings["json"],
+                                  include_files=settings.get("per_file", False)))
+    if settings.get("prometheus"):
+        hooks.append(PrometheusExporter(settings["prometheus"]))
+    return hooks
@@ -0,0 +1,342 @@
+"""Worker pool used to run document processing jobs."""
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait as wait_connections
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from src import logger_config, profiling
+
+EXECUTOR_KINDS = ("thread", "process")
+
+# 每个任务是 (输入文件, 输出目录) 的字符串对，便于跨进程传递；
+# 第二项为 bytes 时表示内存中的文档 (名称, 内容)，结果的 data 为输出内容
+Job = Tuple[str, Union[str, bytes]]
+
+# 进程池中每个 worker 进程持有的处理器实例，由 _init_worker 初始化一次
+_worker_processor = None
+
+
+def _init_worker(config: Dict[str, Any], dry_run: bool, matcher,
+                 profile: Optional[profiling.ProfileSettings] = None,
+                 log_target: Optional[Tuple[str, int]] = None) -> None:
+    """Build the per-process DocumentProcessor once when a worker starts.
+
+    ``log_target`` is the name and level of the parent processor's logger;
+    the worker logs under the same name, so the parent hands its records
+    to the same handlers (e.g. the silent ``src.api`` logger of the API).
+    """
+    global _worker_processor
+    from src.processor import DocumentProcessor
+
+    logger = None
+    if log_target is not None:
+        name, level = log_target
+        logger = logger_config.setup_logger(name,
+                                            logging.getLevelName(level))
+    _worker_processor = DocumentProcessor(
+        config, dry_run=dry_run, matcher=matcher, logger=logger)
+    _worker_processor.profile = profile
+
+
+def _run_job(processor, job: Job, queued_at: float):
+    src, dst = job
+    if isinstance(dst, bytes):
+        return processor.process_data(dst, src, queued_at)
+    return processor.process_file(Path(src), Path(dst), queued_at)
+
+
+class _ConnLogQueue:
+    """Queue-like sink that ships log records to the parent over ``conn``."""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self.conn.send(record)
+
+
+def _worker_main(conn: Connection, config: Dict[str, Any], dry_run: bool,
+                 matcher, profile: Optional[profiling.ProfileSettings],
+                 log_target: Optional[Tuple[str, int]] = None) -> None:
+    """Worker process loop: run chunks and stream back one result per file.
+
+    Log records travel over the same pipe, so killing a worker can never
+    leave a lock shared with other workers held.
+    """
+    logger_config.set_queue(_ConnLogQueue(conn))
+    _init_worker(config, dry_run, matcher, profile, log_target)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        jobs, queued_at = message
+        with profiling.section(profile):
+            for job in jobs:
+                conn.send(_run_job(_worker_processor, job, queued_at))
+        # worker 进程没有退出钩子，每个 chunk 后写出累计的分析数据
+        profiling.flush(profile)
+        conn.send(None)
+
+
+@dataclass
+class _Task:
+    jobs: List[Job]
+    queued_at: float
+    future: Future
+    results: list = field(default_factory=list)
+    started: bool = False
+
+    def remaining(self) -> List[Job]:
+        return self.jobs[len(self.results):]
+
+
+class _Worker:
+    """One supervised worker process and the task it is running."""
+
+    def __init__(self, ctx, initargs: tuple):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn,) + initargs, daemon=True)
+        self.process.start()
+        # 父进程关闭子端，worker 退出时 conn 才能读到 EOF
+        child_conn.close()
+        self.task: Optional[_Task] = None
+        self.file_started = 0.0
+
+    def start(self, task: _Task) -> None:
+        self.task = task
+        self.file_started = time.monotonic()
+        self.conn.send((task.remaining(), task.queued_at))
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join()
+        self.conn.close()
+
+
+class SupervisedProcessPool:
+    """Process pool that enforces a per-file deadline.
+
+    Each worker streams back one result per file, so the supervisor knows
+    which file is running and since when. A worker that exceeds ``timeout``
+    on one file, or dies, is killed and replaced; the file is reported as
+    timed out (or failed) and the rest of its chunk continues on the new
+    worker. Chunks that have not started yet can be cancelled through their
+    future, like with ``concurrent.futures`` executors.
+    """
+
+    def __init__(self, max_workers: int, initargs: tuple,
+                 timeout: Optional[float] = None):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.timeout = timeout or None
+        self._ctx = multiprocessing.get_context()
+        self._initargs = initargs
+        self._queue: Deque[_Task] = deque()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._wakeup_r, self._wakeup_w = self._ctx.Pipe(duplex=False)
+        self._workers = [_Worker(self._ctx, initargs)
+                         for _ in range(self.max_workers)]
+        self._thread = threading.Thread(
+            target=self._supervise, name="wr-cl-supervisor", daemon=True)
+        self._thread.start()
+
+    def submit(self, jobs: List[Job], queued_at: float) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queue.append(_Task(list(jobs), queued_at, future))
+        self._wakeup()
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            already, self._shutdown = self._shutdown, True
+        if not already:
+            self._wakeup()
+        if wait:
+            self._thread.join()
+
+    def _wakeup(self) -> None:
+        self._wakeup_w.send_bytes(b"")
+
+    def _dispatch(self) -> None:
+        while True:
+            # 持锁只做分配；向管道发送任务可能阻塞，放在锁外进行
+            assigned: List[Tuple[_Worker, _Task]] = []
+            with self._lock:
+                for worker in self._workers:
+                    while worker.task is None and self._queue:
+                        task = self._queue.popleft()
+                        # 已被取消的任务（如运行截止时间已到）直接丢弃
+                        if not task.started:
+                            if not task.future.set_running_or_notify_cancel():
+                                continue
+                            task.started = True
+                        worker.task = task
+                        assigned.append((worker, task))
+            respawned = False
+            for worker, task in assigned:
+                try:
+                    worker.start(task)
+                except OSError:
+                    # worker 在空闲时意外退出：替换后重新排队，不计入文件
+                    worker.task = None
+                    with self._lock:
+                        self._queue.appendleft(task)
+                    self._respawn(worker)
+                    respawned = True
+            if not respawned:
+                return
+
+    def _supervise(self) -> None:
+        while True:
+            self._dispatch()
+            busy = [w for w in self._workers if w.task is not None]
+            with self._lock:
+                if self._shutdown and not busy and not self._queue:
+                    break
+            wait_timeout = None
+            if self.timeout and busy:
+                nearest = min(w.file_started for w in busy) + self.timeout
+                wait_timeout = max(0.0, nearest - time.monotonic())
+
+            ready = wait_connections([self._wakeup_r] + [w.conn for w in busy],
+                                     wait_timeout)
+            for conn in ready:
+                if conn is self._wakeup_r:
+                    self._wakeup_r.recv_bytes()
+                    continue
+                worker = next(w for w in busy if w.conn is conn)
+                self._receive(worker)
+
+            if self.timeout:
+                now = time.monotonic()
+                for worker in busy:
+                    if (worker.task is not None
+                            and now - worker.file_started >= self.timeout):
+                        self._replace(worker, timed_out=True)
+
+        for worker in self._workers:
+            worker.stop()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _receive(self, worker: _Worker) -> None:
+        try:
+            result = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker, timed_out=False)
+            return
+        if isinstance(result, logging.LogRecord):
+            logging.getLogger(result.name).handle(result)
+            return
+        task = worker.task
+        if result is None:
+            worker.task = None
+            task.future.set_result(task.results)
+        else:
+            task.results.append(result)
+            worker.file_started = time.monotonic()
+
+    def _respawn(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        replacement = _Worker(self._ctx, self._initargs)
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    def _replace(self, worker: _Worker, timed_out: bool) -> None:
+        """Kill ``worker``, fail its current file and requeue the rest."""
+        from src.processor import FileResult
+
+        task, worker.task = worker.task, None
+        self._respawn(worker)
+
+        if not task.remaining():
+            # 所有文件的结果都已收到，只是结束标记前 worker 退出（如写出分析数据时）
+            task.future.set_result(task.results)
+            return
+        src, _ = task.remaining()[0]
+        if timed_out:
+            task.results.append(FileResult(
+                path=src, error=f"Timed out after {self.timeout}s",
+                action="timeout"))
+        else:
+            task.results.append(FileResult(
+                path=src, error=f"Worker exited with code "
+                                f"{worker.process.exitcode}"))
+        if task.remaining():
+            with self._lock:
+                # 剩余文件优先交给新 worker，保持原有顺序
+                self._queue.appendleft(task)
+        else:
+            task.future.set_result(task.results)
+
+
+class WorkerPool:
+    """Runs chunks of jobs on a thread or process executor.
+
+    Thread workers share the caller's processor. Process workers build their
+    own processor once at start-up and only send small result records back;
+    only they can enforce ``timeout``, since a thread cannot be killed.
+    """
+
+    def __init__(self, processor, kind: str = "thread",
+                 max_workers: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(
+                f"Unknown executor '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.processor = processor
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = self._create_executor()
+
+    def _create_executor(self):
+        if self.kind == "process":
+            # worker 沿用父进程处理器 logger 的名称和级别，记录回到同一 logger
+            logger = self.processor.logger
+            return SupervisedProcessPool(
+                self.max_workers,
+                (self.processor.config, self.processor.dry_run,
+                 self.processor.matcher, self.processor.profile,
+                 (logger.name, logger.getEffectiveLevel())),
+                timeout=self.timeout,
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def submit(self, jobs: List[Job]) -> Future:
+        """Submit a chunk of jobs; the future resolves to a list of results."""
+        queued_at = time.time()
+        if self.kind == "process":
+            return self._executor.submit(jobs, queued_at)
+        return self._executor.submit(self._run_chunk_local, jobs, queued_at)
+
+    def _run_chunk_local(self, jobs: List[Job], queued_at: float) -> list:
+        with profiling.section(self.processor.profile):
+            return [_run_job(self.processor, job, queued_at) for job in jobs]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
@@ -1,18 +1,129 @@
 """Document processing functionality."""
+import heapq
+import logging
+import os
+import time
+from io import BytesIO
+from src import docxml, utils
+from src.cache import MANIFEST_NAME, Manifest, config_fingerprint, file_digest
 from src.logger_config import setup_logger
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.discovery import FoundFile, iter_found_files
+from src.journal import Journal, open_journal
+from src.matcher import compile_rules
+from src.memory import (DEFAULT_LARGE_FILE_MB, MB, MemoryBudget,
+                        estimate_memory)
+from src.metrics import (NULL_TIMER, MetricsHook, RunSummary, StageTimer,
+                         hooks_from_config)
+from src.pool import Job, WorkerPool
+from src.report import ChangeReport
+from src.schedule import (DEFAULT_TINY_FILE_KB, SCHEDULES, estimate_makespan,
+                          largest_first)
+from src.ziputil import copy_package
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from docx.opc.oxml import serialize_part_xml
+from docx.opc.part import XmlPart
+from docx.oxml import parse_xml
 from docx.text.paragraph import Paragraph
 from docx import Document
-from docx.enum.section import WD_HEADER_FOOTER
+
+# docx: 通过 python-docx 对象模型处理；xml: 直接改写包内 XML，速度更快
+ENGINES = ("docx", "xml")
+# 无匹配文档的输出方式：copy 复制（优先 reflink），link 硬链接，skip 不输出
+UNCHANGED_POLICIES = ("copy", "link", "skip")
+# 进程模式下每个任务默认包含的文件数，用于摊薄进程间通信开销
+DEFAULT_PROCESS_CHUNK_SIZE = 8
+# async 驱动尚不支持的设置（断点续跑、失败重试、整次运行时限）
+ASYNC_UNSUPPORTED = ("journal", "resume", "retries", "run_timeout")
+
+
+@dataclass
+class FileResult:
+    """Small per-file result record returned by workers."""
+    path: str
+    output: Optional[str] = None
+    modified: bool = False
+    replacements: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    # written / reflink / copy_file_range / copy / hardlink / skipped / cached
+    # / timeout / deferred（运行截止时间已到，未处理）/ preview（dry-run）
+    # / resumed（续跑时上次已完成）/ unchanged（内存中的文档无需修改）
+    # / in_place（输出路径就是输入文件本身，无需写出）
+    action: Optional[str] = None
+    input_hash: Optional[str] = None
+    # 处理该文件的 worker 进程及其当时的峰值内存（仅开启 metrics 时记录）
+    pid: Optional[int] = None
+    peak_rss_mb: Optional[float] = None
+    # dry-run 时的匹配记录（见 docxml.find_changes）
+    changes: List[Dict[str, Any]] = field(default_factory=list)
+    # 内存中处理的文档的输出内容（见 DocumentProcessor.process_data）
+    data: Optional[bytes] = None
+
+
+def _timed_iter(iterable: Iterable, timings: Dict[str, float],
+                name: str) -> Iterator:
+    """Yield from ``iterable`` while adding the time spent in it to ``timings``."""
+    iterator = iter(iterable)
+    timings.setdefault(name, 0.0)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings[name] += time.perf_counter() - start
+            return
+        timings[name] += time.perf_counter() - start
+        yield item
+
+
+@dataclass
+class _Run:
+    """State of one ``process_all`` call shared by its helpers."""
+    pool: WorkerPool
+    results: List[FileResult]
+    manifest: Optional[Manifest]
+    report: Optional[ChangeReport]
+    budget: MemoryBudget
+    deadline: Optional[float] = None
+    # 已提交文件的大小，由 _iter_chunks 填写
+    sizes: Dict[str, int] = field(default_factory=dict)
+    journal: Optional[Journal] = None
+    pending: Dict[Future, List[Job]] = field(default_factory=dict)
+    attempts: Dict[str, int] = field(default_factory=dict)
+    # 等待退避后重试的失败文件：(可重试时间, 序号, 任务, 上次结果)
+    retries: List[Tuple[float, int, Job, FileResult]] = field(
+        default_factory=list)
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def submit(self, chunk: List[Job], cost: int) -> None:
+        future = self.pool.submit(chunk)
+        self.pending[future] = chunk
+        self.budget.acquire(future, cost)
+        if self.journal:
+            self.journal.mark_pending(src for src, _ in chunk)
+
+    def schedule_retry(self, job: Job, result: FileResult,
+                       delay: float) -> None:
+        heapq.heappush(self.retries, (time.perf_counter() + delay,
+                                      len(self.attempts), job, result))
 
 
 class DocumentProcessor:
     """Handles the processing of Word documents, including replacing text in headers and footers."""
 
-    def __init__(self, config: Dict[str, Any], dry_run: bool = False):
-        """Initialize the document processor."""
+    def __init__(self, config: Dict[str, Any], dry_run: bool = False,
+                 matcher=None, logger: Optional[logging.Logger] = None):
+        """Initialize the document processor.
+
+        ``matcher`` lets worker processes reuse an already compiled rule set.
+        ``logger`` replaces the console logger, e.g. for library use.
+        """
         self.config = config
         self.dry_run = dry_run
         self.replacements = config["replacements"]
@@ -20,39 +131,166 @@ class DocumentProcessor:
         self.advanced = config["advanced"]
         self.pattern_type = self.replacements["pattern_type"]
         self.rules = self.replacements["rules"]
-
-        # Set the log level from config if available, otherwise use default 'debug'
-        self.logger = setup_logger(
-            "src.processor", level=config.get("log_level", "debug")
+        self.matcher = matcher or compile_rules(self.replacements)
+        self.engine = self.advanced.get("engine", "docx")
+        if self.engine not in ENGINES:
+            raise ValueError(
+                f"Unknown engine '{self.engine}', expected one of {ENGINES}")
+        # 增量缓存：跳过输入、规则和输出均未变化的文件（dry-run 不使用）
+        self.use_cache = bool(self.advanced.get("cache")) and not dry_run
+        self.unchanged_files = self.advanced.get("unchanged_files", "copy")
+        if self.unchanged_files not in UNCHANGED_POLICIES:
+            raise ValueError(
+                f"Unknown unchanged_files policy '{self.unchanged_files}', "
+                f"expected one of {UNCHANGED_POLICIES}")
+
+        # 指标：advanced.metrics 为 true 或导出配置时按阶段计时
+        self.metrics_hooks: List[MetricsHook] = hooks_from_config(
+            self.advanced.get("metrics"))
+        self.collect_metrics = bool(self.advanced.get("metrics"))
+        # 单个文件的处理时限（秒，仅进程模式可强制执行）、超时重试次数
+        # 以及整次运行的截止时间
+        self.timeout = self.advanced.get("timeout") or None
+        self.timeout_retries = self.advanced.get("timeout_retries", 1)
+        self.run_timeout = self.advanced.get("run_timeout") or None
+        # 内存预算（MB）：按估算内存限制同时处理的文档；超过 large_file_mb
+        # 的文档单独处理，并始终使用不加载媒体部件的 xml 引擎
+        budget_mb = self.advanced.get("memory_budget_mb")
+        self.memory_budget = int(budget_mb * MB) if budget_mb else None
+        self.large_file_size = int(
+            self.advanced.get("large_file_mb", DEFAULT_LARGE_FILE_MB) * MB)
+        # 调度顺序：discovery 按发现顺序流式提交，lpt 按大小从大到小提交
+        self.schedule = self.advanced.get("schedule", "discovery")
+        if self.schedule not in SCHEDULES:
+            raise ValueError(
+                f"Unknown schedule '{self.schedule}', expected one of {SCHEDULES}")
+        self.tiny_file_size = int(
+            self.advanced.get("tiny_file_kb", DEFAULT_TINY_FILE_KB) * 1024)
+        # 处理失败（非超时）文件的重试次数与指数退避的初始间隔（秒）
+        self.retries = self.advanced.get("retries", 1)
+        self.retry_backoff = self.advanced.get("retry_backoff", 1.0)
+        # 断点续跑：跳过日志中已完成的文件
+        self.resume = bool(self.advanced.get("resume"))
+        # dry-run 报告文件（.jsonl 或 .csv）
+        self.report_path = self.advanced.get("report")
+        if self.advanced.get("executor") == "async":
+            unsupported = [key for key in ASYNC_UNSUPPORTED
+                           if self.advanced.get(key)]
+            if self.schedule != "discovery":
+                unsupported.append("schedule")
+            if unsupported:
+                raise ValueError(
+                    f"advanced.executor 'async' does not support "
+                    f"{', '.join(unsupported)}; remove these settings or use "
+                    f"executor 'process'")
+
+        # 性能分析会话（见 src.profiling），由 CLI 的 --profile 设置
+        self.profile = None
+
+        # Set the log level from config if available, otherwise use default 'info'
+        self.logger = logger or setup_logger(
+            "src.processor", level=config.get("log_level", "info")
         )
+        if self.report_path and not dry_run:
+            self.logger.warning("advanced.report is only written in dry-run "
+                                "mode; ignoring %s", self.report_path)
 
-    def _get_files_to_process(self, input_path: Path) -> List[Path]:
+    @property
+    def pool_executor(self) -> str:
+        """Executor kind for a long-lived ``WorkerPool`` (watch and serve).
+
+        ``async`` only changes how a batch reads and writes files; its CPU
+        work runs on processes, which is what a persistent pool uses.
         """
-        Get list of .docx files to process while excluding temporary files.
+        executor = self.advanced.get("executor", "thread")
+        return "process" if executor == "async" else executor
 
-        Args:
-            input_path (Path): The directory path to search for .docx files
+    def _iter_files(self, input_path: Path) -> Iterator[FoundFile]:
+        """Stream the .docx files to process, honoring the discovery settings.
 
-        Returns:
-            List[Path]: List of valid .docx files to process
+        The output directory and the cache manifest and journal files are
+        never walked, even when they lie inside ``input_path``.
         """
-        # Only process .docx files
-        file_type = '.docx'
-        # Get all .docx files
-        all_files = list(input_path.rglob(f'*{file_type}'))
+        skip = [Path(self.file_settings["output_path"])]
+        for setting in (self.advanced.get("cache_path"),
+                        self.advanced.get("journal")):
+            if isinstance(setting, str):
+                skip.append(Path(setting))
+        return iter_found_files(
+            input_path,
+            include=self.file_settings.get("include", ()),
+            exclude=self.file_settings.get("exclude", ()),
+            max_depth=self.file_settings.get("max_depth"),
+            skip=skip,
+        )
 
-        # Filter out temporary files (those starting with ~$)
-        files = [f for f in all_files if not f.name.startswith('~$')]
+    def _iter_chunks(self, files: Iterable[FoundFile], output_path: Path,
+                     manifest: Optional[Manifest], chunk_size: int,
+                     results: List[FileResult], sizes: Dict[str, int]
+                     ) -> Iterator[Tuple[List[Job], int]]:
+        """Group discovered files into job chunks, skipping cached files.
 
-        self.logger.info(
-            f"Found {len(files)} valid .docx files to process in {input_path}")
-        for file in files:
-            self.logger.debug(f"Found file: {file}")
+        Yields each chunk with its estimated memory cost. Large files always
+        form a chunk of their own; with the ``lpt`` schedule only tiny files
+        are batched. ``sizes`` is filled with the size of every submitted
+        file.
 
-        return files
+        Each job targets the output directory that mirrors the file's place
+        in the input tree; those directories are created here, once each,
+        so workers never race on ``mkdir``.
+        """
+        lpt = self.schedule == "lpt"
+        created = set()
+        chunk: List[Job] = []
+        cost = 0
+        for file_path, size, relative in files:
+            target_dir = utils.mirror_output_dir(relative, output_path)
+            if manifest and manifest.is_fresh(
+                    file_path, utils.get_output_path(file_path, target_dir)):
+                results.append(FileResult(path=str(file_path), action="cached"))
+                continue
+            if not self.dry_run and target_dir not in created:
+                target_dir.mkdir(parents=True, exist_ok=True)
+                created.add(target_dir)
+            job = (str(file_path), str(target_dir))
+            sizes[job[0]] = size
+            job_cost = estimate_memory(size, self._engine_for(size))
+            if size >= self.large_file_size or (
+                    lpt and size >= self.tiny_file_size):
+                yield [job], job_cost
+                continue
+            chunk.append(job)
+            cost += job_cost
+            if len(chunk) >= chunk_size:
+                yield chunk, cost
+                chunk, cost = [], 0
+        if chunk:
+            yield chunk, cost
+
+    def _engine_for(self, size: int) -> str:
+        """Engine used for a file: large files always take the xml path."""
+        return "xml" if size >= self.large_file_size else self.engine
+
+    def process_all(self) -> List[FileResult]:
+        """Process all documents in the input directory.
+
+        Files are submitted while discovery is still running; at most
+        ``advanced.queue_size`` chunks wait in the executor at a time, and
+        with ``advanced.memory_budget_mb`` only as many as fit in the
+        estimated memory budget. Files that exceed ``advanced.timeout`` are
+        retried ``timeout_retries`` times and files that fail ``retries``
+        times, with exponential backoff. Once ``advanced.run_timeout``
+        passes, queued chunks are cancelled and reported as deferred while
+        in-flight work finishes. With ``advanced.journal`` the state of each
+        file is appended to a journal, and ``advanced.resume`` skips files a
+        previous run already finished.
+        """
+        executor = self.advanced.get("executor", "thread")
+        if executor == "async":
+            # 网络存储：asyncio 预读 + 进程池计算 + 异步写出
+            from src.aio import AsyncDriver
+            return AsyncDriver(self).run()
 
-    def process_all(self) -> None:
-        """Process all documents in the input directory."""
         input_path = Path(self.file_settings["input_path"])
         output_path = Path(self.file_settings["output_path"])
 
@@ -62,224 +300,432 @@ class DocumentProcessor:
         if not self.dry_run:
             output_path.mkdir(parents=True, exist_ok=True)
 
-        files_to_process = self._get_files_to_process(input_path)
-        if not files_to_process:
+        max_workers = self.advanced["max_workers"]
+        chunk_size = self.advanced.get("chunk_size") or (
+            DEFAULT_PROCESS_CHUNK_SIZE
+            if executor == "process" or self.schedule == "lpt" else 1)
+        max_pending = self.advanced.get("queue_size") or max_workers * 2
+
+        run_start = time.perf_counter()
+        run_timings: Dict[str, float] = {}
+        files = self._iter_files(input_path)
+        if self.collect_metrics:
+            files = _timed_iter(files, run_timings, "discovery")
+        if self.schedule == "lpt":
+            # LPT 需要先完成发现；大小来自目录项，无需额外 stat
+            files = largest_first(files)
+
+        results: List[FileResult] = []
+        sizes: Dict[str, int] = {}
+        manifest = self._open_manifest(output_path)
+        journal = None if self.dry_run else open_journal(
+            self.advanced.get("journal"), output_path, self.resume)
+        if journal and self.resume:
+            files = self._skip_completed(files, journal, results)
+        chunks = self._iter_chunks(files, output_path, manifest, chunk_size,
+                                   results, sizes)
+        dispatch_start = time.perf_counter()
+        report = (ChangeReport(self.report_path)
+                  if self.dry_run and self.report_path else None)
+        if self.timeout and executor != "process":
+            self.logger.debug(
+                "advanced.timeout is only enforced with executor 'process'")
+
+        try:
+            with WorkerPool(self, executor, max_workers, self.timeout) as pool:
+                run = _Run(pool, results, manifest, report,
+                           MemoryBudget(self.memory_budget),
+                           run_start + self.run_timeout if self.run_timeout
+                           else None, sizes, journal)
+                self._dispatch(run, chunks, max_pending)
+        finally:
+            # 中断（如 Ctrl+C）时也要把已记录的状态落盘，便于 --resume
+            if journal:
+                journal.close()
+
+        if self.schedule == "lpt" or self.collect_metrics:
+            self._report_makespan(results, sizes, max_workers,
+                                  time.perf_counter() - dispatch_start,
+                                  run_timings)
+        if manifest:
+            manifest.save()
+        if report:
+            report.close()
+            self.logger.info("Dry run: %d replacements written to %s",
+                             report.count, report.path)
+        if not results:
             self.logger.warning("No files found to process")
+        else:
+            self.logger.info("Processed %d files from %s", len(results),
+                             input_path)
+        if self.collect_metrics:
+            self._report_metrics(RunSummary(
+                results, time.perf_counter() - run_start, run_timings))
+        return results
+
+    def _report_makespan(self, results: List[FileResult],
+                         sizes: Dict[str, int], workers: int, actual: float,
+                         run_timings: Dict[str, float]) -> None:
+        """Log the size-based makespan estimate next to the actual one."""
+        processed = [r for r in results
+                     if r.path in sizes and "total" in r.timings]
+        if not processed:
             return
+        estimated, lower_bound = estimate_makespan(
+            [sizes[r.path] for r in processed],
+            [r.timings["total"] for r in processed], workers)
+        run_timings.update(makespan=actual, makespan_estimated=estimated,
+                           makespan_lower_bound=lower_bound)
+        self.logger.info(
+            "Makespan: actual %.2fs, estimated %.2fs (%s schedule), "
+            "lower bound %.2fs", actual, estimated, self.schedule, lower_bound)
+
+    def _report_metrics(self, summary: RunSummary) -> None:
+        """Log the end-of-run summary and hand it to the metrics hooks."""
+        self.logger.info("Run summary:\n%s", summary.format())
+        for hook in self.metrics_hooks:
+            for result in summary.results:
+                hook.on_file(result)
+            hook.on_run_end(summary)
+
+    def _dispatch(self, run: _Run, chunks: Iterable[Tuple[List[Job], int]],
+                  max_pending: int) -> None:
+        """Submit every chunk and collect results until nothing is left."""
+        for chunk, cost in chunks:
+            # 有界提交：队列已满或内存预算不足时先等待已有任务完成
+            while ((len(run.pending) >= max_pending
+                    or not run.budget.fits(cost)) and not run.expired()):
+                self._wait_some(run)
+            if run.expired():
+                run.results.extend(self._deferred(chunk))
+                self.logger.warning(
+                    "Run deadline reached; remaining inputs were not scanned")
+                break
+            run.submit(chunk, cost)
+
+        while run.pending or run.retries:
+            if run.expired():
+                # 截止时间已到：取消尚未开始的任务，只等待进行中的任务；
+                # 等待重试的文件按最后一次失败记录
+                for future in [f for f in run.pending if f.cancel()]:
+                    run.budget.release(future)
+                    run.results.extend(self._deferred(run.pending.pop(future)))
+                while run.retries:
+                    *_, result = heapq.heappop(run.retries)
+                    self._finish(run, result)
+                if not run.pending:
+                    break
+            self._wait_some(run)
+
+    def _wait_some(self, run: _Run) -> None:
+        """Wait for at least one chunk and collect it, retrying failures.
+
+        Before the run deadline the wait returns early when the deadline
+        passes or a retry becomes due; afterwards it blocks until in-flight
+        work finishes, and failed files are no longer retried.
+        """
+        now = time.perf_counter()
+        timeout = None
+        if run.deadline is not None and not run.expired():
+            timeout = run.deadline - now
+        if run.retries:
+            due = max(0.0, run.retries[0][0] - now)
+            timeout = due if timeout is None else min(timeout, due)
+        if run.pending:
+            done, _ = wait(run.pending, timeout=timeout,
+                           return_when=FIRST_COMPLETED)
+        else:
+            # 只剩等待退避的重试
+            time.sleep(timeout or 0)
+            done = set()
+
+        for future in done:
+            chunk = run.pending.pop(future)
+            run.budget.release(future)
+            jobs = dict(chunk)
+            for result in self._collect(future, chunk):
+                job = (result.path, jobs[result.path])
+                attempt = run.attempts.get(result.path, 0)
+                if run.journal and result.error:
+                    run.journal.record(result, attempt + 1)
+                if result.error and not run.expired():
+                    if result.action == "timeout":
+                        if attempt < self.timeout_retries:
+                            run.attempts[result.path] = attempt + 1
+                            self.logger.warning(
+                                "Retrying %s after timeout (attempt %d)",
+                                result.path, attempt + 2)
+                            self._resubmit(run, job)
+                            continue
+                    elif attempt < self.retries:
+                        run.attempts[result.path] = attempt + 1
+                        delay = self.retry_backoff * 2 ** attempt
+                        self.logger.warning(
+                            "Retrying %s in %.1fs after error: %s",
+                            result.path, delay, result.error)
+                        run.schedule_retry(job, result, delay)
+                        continue
+                self._finish(run, result)
+
+        while run.retries and run.retries[0][0] <= time.perf_counter():
+            _, _, job, _ = heapq.heappop(run.retries)
+            self._resubmit(run, job)
+
+    def _resubmit(self, run: _Run, job: Job) -> None:
+        size = run.sizes.get(job[0], 0)
+        run.submit([job], estimate_memory(size, self._engine_for(size)))
+
+    def _finish(self, run: _Run, result: FileResult) -> None:
+        """Record a file's final result."""
+        self._record(result, run.manifest, run.report)
+        if run.journal and not result.error:
+            run.journal.record(result, run.attempts.get(result.path, 0))
+        run.results.append(result)
+
+    @staticmethod
+    def _skip_completed(files: Iterable[FoundFile], journal: Journal,
+                        results: List[FileResult]) -> Iterator[FoundFile]:
+        """Drop files the journal of a previous run marks as done."""
+        for found in files:
+            if journal.is_done(str(found.path)):
+                results.append(FileResult(path=str(found.path),
+                                          action="resumed"))
+            else:
+                yield found
+
+    @staticmethod
+    def _deferred(chunk: List[Job]) -> List[FileResult]:
+        """Result records for files left unprocessed by the run deadline."""
+        return [FileResult(path=src, action="deferred") for src, _ in chunk]
+
+    @staticmethod
+    def _collect(future: Future, chunk: List[Job]) -> List[FileResult]:
+        """Turn a finished chunk future into result records."""
+        try:
+            return future.result()
+        except Exception as e:
+            # 整个 chunk 失败时逐个记录
+            return [FileResult(path=src, error=str(e)) for src, _ in chunk]
+
+    def _record(self, result: FileResult, manifest: Optional[Manifest],
+                report: Optional[ChangeReport] = None) -> None:
+        """Log a final result and record it in the manifest or report."""
+        if result.error:
+            self.logger.error("Error processing %s: %s", result.path,
+                              result.error)
+        elif manifest:
+            manifest.record(result)
+        if report:
+            # 写入报告后释放匹配记录，大批量预览时内存不随文件数增长
+            report.write(result.path, result.changes)
+            result.changes = []
+        elif result.changes:
+            self.logger.info("%s: %d replacements would be made",
+                             result.path, len(result.changes))
+
+    def _open_manifest(self, output_path: Path) -> Optional[Manifest]:
+        """Open the incremental cache manifest when ``advanced.cache`` is on."""
+        if not self.use_cache:
+            return None
+        path = self.advanced.get("cache_path") or output_path / MANIFEST_NAME
+        return Manifest(Path(path), config_fingerprint(self.config))
+
+    def process_file(self, file_path: Path, output_path: Path,
+                     queued_at: Optional[float] = None) -> FileResult:
+        """Process a single document and return a result record instead of raising.
+
+        ``queued_at`` is the wall-clock submit time, used to report how long
+        the file waited for a worker.
+        """
+        def work(timer) -> FileResult:
+            result = self.process_document(file_path, output_path, timer)
+            if self.use_cache:
+                result.input_hash = file_digest(file_path)
+            return result
 
-        with ThreadPoolExecutor(max_workers=self.advanced["max_workers"]) as executor:
-            future_to_file = {
-                executor.submit(self.process_document, file_path, output_path): file_path
-                for file_path in files_to_process
-            }
-
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    future.result(timeout=self.advanced["timeout"])
-                except Exception as e:
-                    self.logger.error(
-                        f"Error processing {file_path}: {str(e)}")
-
-    def process_document(self, file_path: Path, output_path: Path) -> None:
+        return self._measure(str(file_path), queued_at, work)
+
+    def process_data(self, data: bytes, name: str = "<memory>",
+                     queued_at: Optional[float] = None) -> FileResult:
+        """Process an in-memory document, returning a result record.
+
+        The rewritten document is in ``result.data``; nothing is read from
+        or written to disk. Errors are reported like in :meth:`process_file`.
+        """
+        return self._measure(name, queued_at,
+                             lambda timer: self.process_bytes(data, name, timer))
+
+    def _measure(self, name: str, queued_at: Optional[float],
+                 work: Callable[[Any], FileResult]) -> FileResult:
+        """Run ``work(timer)``, capturing errors and per-stage metrics."""
+        start = time.perf_counter()
+        timer = StageTimer() if self.collect_metrics else NULL_TIMER
+        if timer.enabled and queued_at is not None:
+            timer.timings["queue"] = max(0.0, time.time() - queued_at)
+        try:
+            result = work(timer)
+        except Exception as e:
+            result = FileResult(path=name, error=str(e))
+        if timer.enabled:
+            result.timings.update(timer.timings)
+            result.counters.update(timer.counters)
+            result.pid = os.getpid()
+            result.peak_rss_mb = utils.peak_rss_mb()
+        result.timings["total"] = time.perf_counter() - start
+        return result
+
+    def process_document(self, file_path: Path, output_path: Path,
+                         timer=NULL_TIMER) -> FileResult:
         """Process a single document, including headers and footers."""
-        self.logger.info(f"Processing document: {file_path}")
+        # 每个文件都会经过的日志使用 debug 级别和惰性 % 格式化
+        self.logger.debug("Processing document: %s", file_path)
 
         if self.dry_run:
-            self.logger.info(f"Dry run - would process {file_path}")
-            self._preview_changes(file_path)
-            return
+            if timer.enabled:
+                timer.count("bytes_in", file_path.stat().st_size)
+            return self._preview_document(str(file_path), str(file_path),
+                                          timer)
 
         try:
-            doc = Document(str(file_path))
-            modified = False
-
-            # Process main document paragraphs
-            for paragraph in doc.paragraphs:
-                if self._process_paragraph(paragraph):
-                    modified = True
-
-            # Process tables in the document body
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if self._process_paragraph(paragraph):
-                                modified = True
-
-            # 处理所有分节（文献[9]）
-                # for i, section in enumerate(doc.sections):
-                    # if i > 0 and not section.different_first_page_header_footer:
-                    #     section.header.is_linked_to_previous = False
-                    #     section.footer.is_linked_to_previous = False
-
-                    # if self._process_header_footer(section):
-                    #     modified = True
-
-            # Save the document regardless; adjust if you wish to save only modified files.
-            output_file = output_path / file_path.name
-            # 处理完成后需强制刷新页面布局：
-            # doc.element.xml = doc.element.xml.replace(
-            #     b'<w:view>normal</w:view>',
-            #     b'<w:view>print</w:view>'
-            # )
-            doc.save(str(output_file))
-            if modified:
-                self.logger.info(f"Saved modified document to {output_file}")
+            output_file = utils.get_output_path(file_path, output_path)
+            size = file_path.stat().st_size
+            timer.count("bytes_in", size)
+            updates, replacements = self._find_updates(str(file_path), size,
+                                                       timer)
+
+            if replacements:
+                with timer.stage("save"), \
+                        utils.atomic_output(output_file) as tmp_file:
+                    copy_package(str(file_path), str(tmp_file), updates)
+                self.logger.debug("Saved modified document to %s",
+                                  output_file)
+                result = FileResult(path=str(file_path), output=str(output_file),
+                                    modified=True, replacements=replacements,
+                                    action="written")
             else:
-                self.logger.info(f"No changes needed for {file_path}")
-
-        except Exception as e:
-            self.logger.error(f"Error processing {file_path}: {str(e)}")
+                self.logger.debug("No changes needed for %s", file_path)
+                with timer.stage("save"):
+                    action = self._write_unchanged(file_path, output_file)
+                result = FileResult(
+                    path=str(file_path),
+                    output=None if action == "skipped" else str(output_file),
+                    action=action)
+            if timer.enabled and result.output:
+                timer.count("bytes_out", output_file.stat().st_size)
+            return result
+
+        except Exception:
+            # 错误由 process_all 统一记录，这里只补充调试信息
+            self.logger.debug("Failed processing %s", file_path, exc_info=True)
             raise
 
-    def _process_paragraph(self, paragraph: Paragraph) -> bool:
-        """带格式保留的文本替换"""
-        original_text = paragraph.text
-        if not original_text:
-            return False
-
-        # 记录所有run的格式和位置
-        runs_data = []
-        for run in paragraph.runs:
-            runs_data.append({
-                "text": run.text,
-                "font": {
-                    "name": run.font.name,
-                    "size": run.font.size,
-                    "bold": run.font.bold,
-                    "italic": run.font.italic,
-                    "color": run.font.color.rgb if run.font.color else None
-                }
-            })
-
-        # 合并所有文本进行替换
-        full_text = ''.join([rd["text"] for rd in runs_data])
-        modified_text = full_text
-        for rule in self.rules:
-            modified_text = modified_text.replace(
-                rule["old_text"], rule["new_text"])
-
-        if modified_text == full_text:
-            return False
-
-        # 重建带格式的runs（文献[5]）
-        paragraph.clear()
-        new_run = paragraph.add_run(modified_text)
-
-        # 继承第一个run的格式（可根据需要调整）
-        if runs_data:
-            original_font = runs_data[0]["font"]
-            new_run.font.name = original_font["name"]
-            new_run.font.size = original_font["size"]
-            new_run.font.bold = original_font["bold"]
-            new_run.font.italic = original_font["italic"]
-            if original_font["color"]:
-                new_run.font.color.rgb = original_font["color"]
-
-        return True
-
-    def _process_header_footer(self, section) -> bool:
-        """处理所有类型页眉页脚"""
-        modified = False
-
-        # 处理三种页眉类型（文献[8]）
-        for header_type in [WD_HEADER_FOOTER.PRIMARY,
-                            WD_HEADER_FOOTER.FIRST_PAGE,
-                            WD_HEADER_FOOTER.EVEN_PAGE]:
-            header = section.header if header_type == WD_HEADER_FOOTER.PRIMARY \
-                else section.first_page_header if header_type == WD_HEADER_FOOTER.FIRST_PAGE \
-                else section.even_page_header
-
-            if header:
-                # 处理表格中的页眉内容（文献[4]）
-                for table in header.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for paragraph in cell.paragraphs:
-                                if self._process_paragraph(paragraph):
-                                    modified = True
-
-                # 处理普通段落
-                for paragraph in header.paragraphs:
-                    if self._process_paragraph(paragraph):
-                        modified = True
-
-        # 相同逻辑处理页脚
-        for footer_type in [WD_HEADER_FOOTER.PRIMARY,
-                            WD_HEADER_FOOTER.FIRST_PAGE,
-                            WD_HEADER_FOOTER.EVEN_PAGE]:
-            footer = section.footer if footer_type == WD_HEADER_FOOTER.PRIMARY \
-                else section.first_page_footer if footer_type == WD_HEADER_FOOTER.FIRST_PAGE \
-                else section.even_page_footer
-
-            if footer:
-                # 处理表格型页脚
-                for table in footer.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for paragraph in cell.paragraphs:
-                                if self._process_paragraph(paragraph):
-                                    modified = True
-
-                for paragraph in footer.paragraphs:
-                    if self._process_paragraph(paragraph):
-                        modified = True
-
-        return modified
-
-    def _preview_changes(self, file_path: Path) -> None:
-        """Preview changes that would be made to the document."""
-        try:
-            doc = Document(str(file_path))
-            changes = []
-
-            # Check main document paragraphs
-            for paragraph in doc.paragraphs:
-                if not paragraph.text:
-                    continue
-                original_text = paragraph.text
-                for rule in self.rules:
-                    old_text = rule["old_text"]
-                    new_text = rule["new_text"]
-                    if old_text in original_text:
-                        changes.append({
-                            "location": "body",
-                            "old_text": old_text,
-                            "new_text": new_text,
-                            "context": original_text
-                        })
-
-            # Check headers and footers
-            for section in doc.sections:
-                for part, name in [(section.header, "header"), (section.footer, "footer")]:
-                    if part:
-                        for paragraph in part.paragraphs:
-                            if not paragraph.text:
-                                continue
-                            original_text = paragraph.text
-                            for rule in self.rules:
-                                old_text = rule["old_text"]
-                                new_text = rule["new_text"]
-                                if old_text in original_text:
-                                    changes.append({
-                                        "location": name,
-                                        "old_text": old_text,
-                                        "new_text": new_text,
-                                        "context": original_text
-                                    })
-
-            if changes:
-                self.logger.info(f"\nPreview of changes for {file_path}:")
-                for i, change in enumerate(changes, 1):
-                    self.logger.info(f"\nChange {i} in {change['location']}:")
-                    self.logger.info(f"Old text: {change['old_text']}")
-                    self.logger.info(f"New text: {change['new_text']}")
-                    self.logger.info(f"Context: {change['context']}")
-            else:
-                self.logger.info(f"No changes would be made to {file_path}")
+    def process_bytes(self, data: bytes, name: str = "<memory>",
+                      timer=NULL_TIMER) -> FileResult:
+        """Process a document held in memory; the output is in ``result.data``.
 
-        except Exception as e:
-            self.logger.error(
-                f"Error previewing changes for {file_path}: {str(e)}")
-            raise
+        Uses the same prescan, engines and run-preserving edits as
+        :meth:`process_document`. For a document without matches (action
+        ``unchanged``) ``data`` is None, so the input is not sent back from
+        worker processes; in dry-run mode ``changes`` lists the matches.
+        """
+        self.logger.debug("Processing document: %s", name)
+        timer.count("bytes_in", len(data))
+        source = BytesIO(data)
+        if self.dry_run:
+            return self._preview_document(source, name, timer)
+        updates, replacements = self._find_updates(source, len(data), timer)
+        if not replacements:
+            return FileResult(path=name, action="unchanged")
+        output = BytesIO()
+        with timer.stage("save"):
+            copy_package(source, output, updates)
+        timer.count("bytes_out", output.tell())
+        return FileResult(path=name, modified=True, replacements=replacements,
+                          action="written", data=output.getvalue())
+
+    def _find_updates(self, source: docxml.PathOrFile, size: int,
+                      timer=NULL_TIMER) -> Tuple[Dict[str, bytes], int]:
+        """Collect the rewritten parts of a document and the replacement count."""
+        # 预扫描原始 XML，确定无匹配时跳过完整解析
+        with timer.stage("prescan"):
+            candidate = docxml.may_match(source, self.matcher)
+        if not candidate:
+            return {}, 0
+        # 大文档走流式路径：只读取文本部件，媒体按原始压缩数据复制
+        if self._engine_for(size) == "xml":
+            return docxml.collect_updates(source, self.matcher, timer)
+        return self._process_with_docx(source, timer)
+
+    def _write_unchanged(self, file_path: Path, output_file: Path) -> str:
+        """Apply the ``unchanged_files`` policy to a document without matches."""
+        if self.unchanged_files == "skip":
+            return "skipped"
+        return utils.publish_unchanged(file_path, output_file,
+                                       self.unchanged_files)
+
+    def _process_with_docx(self, source: docxml.PathOrFile,
+                           timer=NULL_TIMER) -> Tuple[Dict[str, bytes], int]:
+        """Replace text through the python-docx object model.
+
+        Returns the changed parts keyed by member name and the number of
+        replacements made.
+        """
+        with timer.stage("parse"):
+            doc = Document(source)
+        updates = {}
+        replacements = 0
+
+        for part, element in self._iter_story_elements(doc):
+            count = docxml.replace_in_element(element, self.matcher, timer)
+            if count:
+                # 只重新编码修改过的部件，其余成员按原压缩数据直接复制
+                with timer.stage("rebuild"):
+                    updates[part.partname.lstrip("/")] = serialize_part_xml(
+                        element)
+                replacements += count
+
+        # 处理完成后需强制刷新页面布局：
+        # doc.element.xml = doc.element.xml.replace(
+        #     b'<w:view>normal</w:view>',
+        #     b'<w:view>print</w:view>'
+        # )
+        return updates, replacements
+
+    @staticmethod
+    def _iter_story_elements(doc) -> Iterator[Tuple[Any, Any]]:
+        """Yield (part, root element) for every text-bearing part once.
+
+        Covers the body with nested tables, headers, footers, footnotes,
+        endnotes and comments; text boxes are reached through the part that
+        contains them. Parts shared by linked sections are yielded once.
+        """
+        for part in doc.part.package.iter_parts():
+            if not docxml.is_story_content_type(part.content_type):
+                continue
+            # 脚注、尾注没有专门的 python-docx 部件类型，需自行解析
+            element = part.element if isinstance(part, XmlPart) \
+                else parse_xml(part.blob)
+            yield part, element
+
+    def _process_paragraph(self, paragraph: Paragraph) -> int:
+        """带格式保留的文本替换，返回替换次数
+
+        匹配位置映射回各个 run 的文本节点，只修改匹配涉及的 run，
+        其余 run 及其格式保持不变（文献[5]）。
+        """
+        return docxml.replace_in_text_nodes(
+            docxml.paragraph_text_nodes(paragraph._p), self.matcher)
+
+    def _preview_document(self, source: docxml.PathOrFile, name: str,
+                          timer=NULL_TIMER) -> FileResult:
+        """Find the replacements a real run would make, without writing.
+
+        Runs the same prescan, story traversal and compiled matcher as
+        :meth:`process_document`.
+        """
+        with timer.stage("prescan"):
+            candidate = docxml.may_match(source, self.matcher)
+        changes = docxml.find_changes(source, self.matcher, timer) \
+            if candidate else []
+        return FileResult(path=name, replacements=len(changes),
+                          action="preview", changes=changes)
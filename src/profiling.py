@@ -0,0 +1,242 @@
+"""Profiling of a whole run, including thread and process workers."""
+import cProfile
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# cprofile: 确定性分析，输出 pstats；sample: 采样分析，输出 collapsed stacks
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+@dataclass(frozen=True)
+class ProfileSettings:
+    """Picklable description of a profiling session shared with workers."""
+    mode: str
+    directory: str
+    interval: float = DEFAULT_SAMPLE_INTERVAL
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return (f"{code.co_name} ({os.path.basename(code.co_filename)}"
+            f":{code.co_firstlineno})")
+
+
+def collapse_stack(frame) -> str:
+    """Render a frame and its callers as a ``root;...;leaf`` line."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Background thread sampling the stacks of registered threads."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="wr-cl-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def add(self, ident: int) -> None:
+        with self._lock:
+            self._threads.add(ident)
+
+    def discard(self, ident: int) -> None:
+        with self._lock:
+            self._threads.discard(ident)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                # 只采样正在处理文档的线程，空闲等待的 worker 不计入
+                for ident in self._threads:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self.counts[collapse_stack(frame)] += 1
+
+
+class _ProcessProfile:
+    """Profiling state of the current process for one session."""
+
+    def __init__(self, settings: ProfileSettings):
+        self.settings = settings
+        self._local = threading.local()
+        self._profiles: List[cProfile.Profile] = []
+        self._sampler: Optional[StackSampler] = None
+        self._lock = threading.Lock()
+
+    def _thread_profile(self) -> cProfile.Profile:
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def _get_sampler(self) -> StackSampler:
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = StackSampler(self.settings.interval)
+                self._sampler.start()
+            return self._sampler
+
+    @contextmanager
+    def section(self) -> Iterator[None]:
+        if self.settings.mode == "sample":
+            sampler = self._get_sampler()
+            ident = threading.get_ident()
+            sampler.add(ident)
+            try:
+                yield
+            finally:
+                sampler.discard(ident)
+            return
+
+        profile = self._thread_profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 同一时刻只允许一个 cProfile 处于启用状态，
+            # 此时该线程的这段工作不计入结果
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def flush(self) -> None:
+        """Write this process's accumulated data into the session directory."""
+        directory = Path(self.settings.directory)
+        pid = os.getpid()
+        if self.settings.mode == "sample":
+            if self._sampler is None:
+                return
+            path = directory / f"{pid}.collapsed"
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for stack, count in self._sampler.snapshot().items():
+                    f.write(f"{stack} {count}\n")
+        else:
+            with self._lock:
+                profiles = list(self._profiles)
+            if not profiles:
+                return
+            path = directory / f"{pid}.prof"
+            tmp_path = path.with_suffix(".tmp")
+            import pstats  # 仅在输出时导入，避免拖慢 CLI 启动
+            pstats.Stats(*profiles).dump_stats(str(tmp_path))
+        # 每个 chunk 后覆盖写入，worker 被回收时已有的数据不会丢失
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+
+
+# 以 (pid, 会话目录) 为键：fork 出的子进程不能复用父进程的 profiler 和采样线程
+_states: Dict[Tuple[int, str], _ProcessProfile] = {}
+_states_lock = threading.Lock()
+
+
+def _state(settings: ProfileSettings) -> _ProcessProfile:
+    key = (os.getpid(), settings.directory)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = _ProcessProfile(settings)
+        return state
+
+
+def section(settings: Optional[ProfileSettings]):
+    """Profile the enclosed work in the calling thread (no-op when None)."""
+    if settings is None:
+        return nullcontext()
+    return _state(settings).section()
+
+
+def flush(settings: Optional[ProfileSettings]) -> None:
+    """Persist the calling process's profile data for the merge step."""
+    if settings is not None:
+        _state(settings).flush()
+
+
+def merge(settings: ProfileSettings, output: Path) -> int:
+    """Merge every per-process file of a session into ``output``.
+
+    Returns the number of per-process profiles merged.
+    """
+    directory = Path(settings.directory)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if settings.mode == "sample":
+        files = sorted(directory.glob("*.collapsed"))
+        counts: Counter = Counter()
+        for path in files:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    stack, _, count = line.rstrip("\n").rpartition(" ")
+                    counts[stack] += int(count)
+        with open(output, "w", encoding="utf-8") as f:
+            for stack, count in sorted(counts.items()):
+                f.write(f"{stack} {count}\n")
+    else:
+        files = sorted(directory.glob("*.prof"))
+        if files:
+            import pstats
+            pstats.Stats(*(str(p) for p in files)).dump_stats(str(output))
+    return len(files)
+
+
+@contextmanager
+def profile_run(output: Path, mode: str = "cprofile",
+                interval: float = DEFAULT_SAMPLE_INTERVAL
+                ) -> Iterator[ProfileSettings]:
+    """Profile the enclosed run and merge all workers' data into ``output``.
+
+    The yielded settings must be handed to the processor (``profile``
+    attribute) so that the worker pool profiles each chunk as well.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(
+            f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+    settings = ProfileSettings(
+        mode, tempfile.mkdtemp(prefix="wr-cl-profile-"), interval)
+    state = _state(settings)
+    try:
+        with state.section():
+            yield settings
+    finally:
+        state.flush()
+        state.close()
+        with _states_lock:
+            _states.pop((os.getpid(), settings.directory), None)
+        merge(settings, Path(output))
+        shutil.rmtree(settings.directory, ignore_errors=True)
@@ -0,0 +1,46 @@
+"""Machine-readable dry-run reports."""
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+REPORT_FIELDS = ("file", "part", "paragraph", "start", "end", "old_text",
+                 "new_text", "context")
+
+
+class ChangeReport:
+    """Streams change records to a JSONL or CSV file as results arrive.
+
+    The format follows the file extension: ``.csv`` writes CSV with a
+    header row, anything else writes one JSON object per line.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.format = "csv" if self.path.suffix.lower() == ".csv" else "jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # newline="" 交给 csv 模块处理换行
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._writer = None
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=REPORT_FIELDS)
+            self._writer.writeheader()
+        self.count = 0
+
+    def write(self, file_path: str, changes: Iterable[Dict[str, Any]]) -> None:
+        for change in changes:
+            record = dict(change, file=file_path)
+            if self._writer is not None:
+                self._writer.writerow(record)
+            else:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ChangeReport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
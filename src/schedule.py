@@ -0,0 +1,40 @@
+"""Size-aware ordering of work and makespan estimates."""
+import heapq
+from typing import Iterable, List, Sequence, Tuple
+
+# discovery: 按发现顺序边发现边处理；lpt: 先完成发现，再按大小从大到小分发
+SCHEDULES = ("discovery", "lpt")
+# lpt 模式下小于该大小的文件合并成批，其余文件单独分发
+DEFAULT_TINY_FILE_KB = 64
+
+
+def lpt_makespan(durations: Iterable[float], workers: int) -> float:
+    """Makespan of assigning ``durations`` longest-first to ``workers``."""
+    loads = [0.0] * max(1, workers)
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(loads, loads[0] + duration)
+    return max(loads)
+
+
+def estimate_makespan(sizes: Sequence[int], durations: Sequence[float],
+                      workers: int) -> Tuple[float, float]:
+    """Estimate the makespan of a run from file sizes.
+
+    Per-file durations are modelled as proportional to size, with the rate
+    fitted to the measured ``durations``; the estimate is the LPT makespan
+    of those modelled durations. Also returns the lower bound
+    ``max(total / workers, longest)`` of the measured durations.
+    """
+    total_size = sum(sizes)
+    total_time = sum(durations)
+    if not durations:
+        return 0.0, 0.0
+    rate = total_time / total_size if total_size else 0.0
+    estimated = lpt_makespan((size * rate for size in sizes), workers)
+    lower_bound = max(total_time / max(1, workers), max(durations))
+    return estimated, lower_bound
+
+
+def largest_first(files: Iterable, key=lambda f: f.size) -> List:
+    """Return ``files`` sorted for LPT dispatch (largest first)."""
+    return sorted(files, key=key, reverse=True)
@@ -0,0 +1,383 @@
+"""Local HTTP service that rewrites documents in memory."""
+import base64
+import http.client
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import Future
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from src import __version__
+from src.logger_config import setup_logger
+from src.memory import MB
+from src.pool import Job, WorkerPool
+from src.processor import DocumentProcessor, FileResult
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+# 等待处理槽位的最长时间（秒），超时返回 503
+DEFAULT_QUEUE_TIMEOUT = 5.0
+DEFAULT_MAX_BODY_MB = 256
+DOCX_CONTENT_TYPE = ("application/vnd.openxmlformats-officedocument."
+                     "wordprocessingml.document")
+
+# (状态码, Content-Type, 响应体, 额外响应头)
+Response = Tuple[int, str, bytes, Dict[str, str]]
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """Parse ``host:port`` or ``unix:/path/to.sock``."""
+    if address.startswith("unix:"):
+        return address[len("unix:"):]
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}', "
+                         f"expected host:port or unix:PATH")
+    return host or "127.0.0.1", int(port)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP client connection over a Unix domain socket."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def connect(address: str,
+            timeout: Optional[float] = 60.0) -> http.client.HTTPConnection:
+    """Open a client connection to a server at ``address``."""
+    target = parse_address(address)
+    if isinstance(target, str):
+        return UnixHTTPConnection(target, timeout)
+    return http.client.HTTPConnection(*target, timeout=timeout)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn,
+                      socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler 需要 (host, port) 形式的客户端地址
+        return request, ("unix", 0)
+
+
+class _Busy(Exception):
+    """No processing slot became free within the queue timeout."""
+
+
+def _result_dict(result: FileResult) -> Dict[str, Any]:
+    record = asdict(result)
+    data = record.pop("data")
+    if data is not None:
+        record["data"] = base64.b64encode(data).decode("ascii")
+    return record
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = f"wr-cl/{__version__}"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        self.server.service.logger.debug("%s " + format,
+                                         self.address_string(), *args)
+
+    def _host_allowed(self) -> bool:
+        allowed = self.server.service.allowed_hosts
+        if allowed is None or self.headers.get("Host", "").lower() in allowed:
+            return True
+        # 拒绝其他主机名，防止网页通过 DNS 重绑定访问本地服务
+        self.close_connection = True
+        self._send(_json(403, {"error": "Host not allowed"}))
+        return False
+
+    def do_GET(self) -> None:
+        if not self._host_allowed():
+            return
+        if urlsplit(self.path).path == "/health":
+            self._send(self.server.service.health())
+        else:
+            self._send(_json(404, {"error": "Not found"}))
+
+    def do_POST(self) -> None:
+        service = self.server.service
+        if not self._host_allowed():
+            return
+        header = self.headers.get("Content-Length")
+        if header is None:
+            self.close_connection = True
+            self._send(_json(411, {"error": "Content-Length required"}))
+            return
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # 无法确定请求体的边界，不再复用该连接
+            self.close_connection = True
+            self._send(_json(400, {"error": "Invalid Content-Length"}))
+            return
+        if length > service.max_body:
+            # 不读取过大的请求体，直接关闭连接
+            self.close_connection = True
+            self._send(_json(413, {"error": "Request body too large"}))
+            return
+        body = self.rfile.read(length)
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/replace":
+            response = service.replace(body, query.get("name", ["<memory>"])[0])
+        elif url.path == "/batch":
+            # 网页无需预检即可发送 text/plain 等“简单请求”，批处理只接受 JSON
+            if self.headers.get_content_type() != "application/json":
+                response = _json(415, {"error": "Content-Type must be "
+                                                "application/json"})
+            else:
+                response = service.batch(body)
+        else:
+            response = _json(404, {"error": "Not found"})
+        self._send(response)
+
+    def _send(self, response: Response) -> None:
+        status, content_type, body, headers = response
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _json(status: int, payload: Any,
+          headers: Optional[Dict[str, str]] = None) -> Response:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return status, "application/json", body, headers or {}
+
+
+class ReplacementServer:
+    """Rewrites documents sent over localhost HTTP or a Unix socket.
+
+    Rules are compiled once and documents run on one warm ``WorkerPool``,
+    entirely in memory:
+
+    * ``POST /replace`` with docx bytes as the body returns the rewritten
+      document (``X-Replacements`` / ``X-Action`` headers); in dry-run mode
+      it returns the matches as JSON.
+    * ``POST /batch`` with ``{"paths": [...]}`` (``application/json``)
+      returns one JSON result per file, with the output base64 encoded in
+      ``data``; with ``"output_path"`` the outputs are written to that
+      directory instead. Paths must lie under ``file_settings.input_path``
+      and ``output_path`` under ``file_settings.output_path``.
+    * ``GET /health`` reports the number of documents in flight.
+
+    Over TCP only requests whose ``Host`` header names the server itself
+    (or ``advanced.server.allowed_hosts``) are answered.
+
+    At most ``advanced.server.max_inflight`` documents are queued or
+    processed at a time. A request that gets no slot within
+    ``queue_timeout`` seconds is answered with 503 and ``Retry-After``, so
+    callers back off instead of piling up memory in the server.
+    """
+
+    def __init__(self, config: Dict[str, Any], address: str = DEFAULT_ADDRESS,
+                 dry_run: bool = False):
+        self.processor = DocumentProcessor(config, dry_run=dry_run)
+        self.logger = setup_logger("src.server",
+                                   level=config.get("log_level", "info"))
+        advanced = config["advanced"]
+        settings = advanced.get("server") or {}
+        self.max_inflight = (settings.get("max_inflight")
+                             or advanced["max_workers"] * 2)
+        self.queue_timeout = settings.get("queue_timeout",
+                                          DEFAULT_QUEUE_TIMEOUT)
+        self.max_body = int(settings.get("max_body_mb", DEFAULT_MAX_BODY_MB)
+                            * MB)
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.rejected = 0
+
+        target = parse_address(address)
+        if isinstance(target, str):
+            # 清理上次未正常退出时遗留的 socket 文件
+            if os.path.exists(target) and stat.S_ISSOCK(os.stat(target).st_mode):
+                os.unlink(target)
+            self.httpd = _UnixHTTPServer(target, _Handler)
+            self.address = f"unix:{target}"
+            # Unix socket 只有本机进程能连接，不受 DNS 重绑定影响
+            self.allowed_hosts = None
+        else:
+            self.httpd = ThreadingHTTPServer(target, _Handler)
+            self.httpd.daemon_threads = True
+            host, port = self.httpd.server_address[:2]
+            self.address = f"{host}:{port}"
+            self.allowed_hosts = _allowed_hosts(
+                host, port, settings.get("allowed_hosts", ()))
+        self.httpd.service = self
+        file_settings = config.get("file_settings") or {}
+        self.input_root = _resolved(file_settings.get("input_path"))
+        self.output_root = _resolved(file_settings.get("output_path"))
+        self.pool = WorkerPool(self.processor, self.processor.pool_executor,
+                               advanced["max_workers"], self.processor.timeout)
+
+    def serve_forever(self) -> None:
+        self.logger.info("Serving on %s", self.address)
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """Stop :meth:`serve_forever` from another thread."""
+        self.httpd.shutdown()
+
+    def close(self) -> None:
+        self.httpd.server_close()
+        self.pool.shutdown()
+        if self.address.startswith("unix:"):
+            try:
+                os.unlink(self.address[len("unix:"):])
+            except OSError:
+                pass
+
+    def health(self) -> Response:
+        return _json(200, {"status": "ok", "inflight": self.inflight,
+                           "max_inflight": self.max_inflight,
+                           "rejected": self.rejected})
+
+    def _acquire(self, timeout: Optional[float]) -> None:
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.rejected += 1
+            raise _Busy()
+        with self._lock:
+            self.inflight += 1
+
+    def _release(self, _future: Future = None) -> None:
+        with self._lock:
+            self.inflight -= 1
+        self._slots.release()
+
+    def _submit(self, job: Job, timeout: Optional[float]) -> Future:
+        """Submit one document once a slot is free; the slot is freed when done."""
+        self._acquire(timeout)
+        try:
+            future = self.pool.submit([job])
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _busy(self) -> Response:
+        return _json(503, {"error": "Server busy"},
+                     {"Retry-After": str(max(1, round(self.queue_timeout)))})
+
+    def replace(self, data: bytes, name: str) -> Response:
+        try:
+            future = self._submit((name, data), self.queue_timeout)
+        except _Busy:
+            return self._busy()
+        result = _first(future)
+        if result.error:
+            return _json(422, {"path": name, "error": result.error})
+        if self.processor.dry_run:
+            return _json(200, _result_dict(result))
+        return 200, DOCX_CONTENT_TYPE, result.data or data, {
+            "X-Replacements": str(result.replacements),
+            "X-Action": result.action or ""}
+
+    def batch(self, body: bytes) -> Response:
+        try:
+            request = json.loads(body)
+            paths = [str(p) for p in request["paths"]]
+            output_path = request.get("output_path")
+        except (ValueError, KeyError, TypeError) as e:
+            return _json(400, {"error": f"Invalid batch request: {e}"})
+        if output_path:
+            output_path = _within(self.output_root, output_path)
+            if output_path is None:
+                return _json(403, {"error": "output_path must be inside "
+                                            "file_settings.output_path"})
+            if not self.processor.dry_run:
+                output_path.mkdir(parents=True, exist_ok=True)
+
+        futures: List[Tuple[Job, Optional[Future], Optional[str]]] = []
+        try:
+            for index, path in enumerate(paths):
+                resolved = _within(self.input_root, path)
+                if resolved is None:
+                    futures.append(((path, b""), None,
+                                    "Path is outside file_settings.input_path"))
+                    continue
+                path = str(resolved)
+                if output_path:
+                    job: Job = (path, str(output_path))
+                else:
+                    try:
+                        job = (path, Path(path).read_bytes())
+                    except OSError as e:
+                        futures.append(((path, b""), None, str(e)))
+                        continue
+                # 只有第一个文件受排队超时限制；已接受的批次等待槽位，
+                # 以处理速度推进而不是被中途拒绝
+                timeout = self.queue_timeout if index == 0 else None
+                futures.append((job, self._submit(job, timeout), None))
+        except _Busy:
+            return self._busy()
+
+        results = []
+        for (path, data), future, error in futures:
+            if future is None:
+                results.append(FileResult(path=path, error=error))
+                continue
+            result = _first(future)
+            if result.action == "unchanged":
+                # 无需修改的文档原样返回
+                result.data = data
+            results.append(result)
+        return _json(200, {"results": [_result_dict(r) for r in results]})
+
+
+def _allowed_hosts(host: str, port: int, extra) -> Set[str]:
+    """``Host`` header values accepted by a server bound to ``host:port``."""
+    names = {"127.0.0.1", "localhost", "[::1]", host}
+    names.update(extra)
+    hosts = {f"{name}:{port}" for name in names}
+    if port == 80:
+        hosts |= names
+    return {h.lower() for h in hosts}
+
+
+def _resolved(path: Optional[str]) -> Optional[Path]:
+    return Path(path).resolve() if path else None
+
+
+def _within(root: Optional[Path], path: str) -> Optional[Path]:
+    """Resolve ``path`` if it lies under ``root``, else return None."""
+    if root is None:
+        return None
+    resolved = Path(path).resolve()
+    if resolved != root and root not in resolved.parents:
+        return None
+    return resolved
+
+
+def _first(future: Future) -> FileResult:
+    try:
+        return future.result()[0]
+    except Exception as e:
+        return FileResult(path="<request>", error=str(e))
@@ -1,9 +1,28 @@
 """Utility functions for wr-cl."""
 import logging
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 logger = logging.getLogger(__name__)
 
+# Linux ioctl：在支持写时复制的文件系统（btrfs、xfs 等）上克隆文件
+FICLONE = 0x40049409
+
 
 def ensure_directory(path: str) -> Path:
     """Ensure a directory exists, creating it if necessary."""
@@ -15,3 +34,117 @@ def ensure_directory(path: str) -> Path:
 def get_output_path(input_path: Path, output_dir: Path) -> Path:
     """Generate output path for processed files."""
     return output_dir / input_path.name
+
+
+def mirror_output_dir(relative: str, output_root: Path) -> Path:
+    """Output directory for a file found at ``relative`` below the input root.
+
+    The input tree is mirrored, so files with the same name in different
+    folders do not collide.
+    """
+    return output_root.joinpath(*relative.split("/")[:-1])
+
+
+@contextmanager
+def atomic_output(target: Path) -> Iterator[Path]:
+    """Yield a temporary path that replaces ``target`` atomically on success.
+
+    The temporary file lives next to ``target`` so the final rename never
+    crosses file systems; readers see either the old file or the complete
+    new one, never a partial write.
+    """
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp",
+                                    dir=target.parent)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, target)
+        # 两者是同一文件的硬链接时 rename 不做任何事，临时文件会留下
+        if os.path.lexists(tmp_path):
+            tmp_path.unlink()
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def _copy_file_range(src, dst) -> None:
+    remaining = os.fstat(src.fileno()).st_size
+    while remaining:
+        copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+        if not copied:
+            break
+        remaining -= copied
+
+
+def clone_file(source: Path, target: Path) -> str:
+    """Copy a file as cheaply as the platform allows.
+
+    Tries a reflink clone, then an in-kernel ``copy_file_range`` copy and
+    finally ``shutil.copyfile``. Returns the method that was used.
+    """
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return "reflink"
+            except OSError:
+                pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                _copy_file_range(src, dst)
+                return "copy_file_range"
+            except OSError:
+                dst.seek(0)
+                dst.truncate()
+    shutil.copyfile(source, target)
+    return "copy"
+
+
+def link_file(source: Path, target: Path) -> str:
+    """Hardlink ``source`` to ``target``, copying when linking is not possible."""
+    try:
+        if target.exists() or target.is_symlink():
+            target.unlink()
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        return clone_file(source, target)
+
+
+def publish_unchanged(source: Path, target: Path, policy: str) -> str:
+    """Atomically place an unchanged ``source`` at ``target``.
+
+    ``policy`` is ``link`` or ``copy``; returns the method that was used,
+    or ``in_place`` when ``target`` already is ``source`` (output directory
+    equal to the input directory).
+    """
+    try:
+        if os.path.samefile(source, target):
+            return "in_place"
+    except OSError:
+        pass
+    with atomic_output(target) as tmp_path:
+        if policy == "link":
+            return link_file(source, tmp_path)
+        return clone_file(source, tmp_path)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB (0 if unknown)."""
+    # Linux 上 ru_maxrss 在 exec 后仍保留父进程的峰值，VmHWM 只统计当前进程映像
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,340 @@
+"""Long-running watch mode that processes documents as they arrive."""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import config as config_loader
+from src import utils
+from src.discovery import is_document
+from src.logger_config import setup_logger
+from src.pool import Job, WorkerPool
+from src.processor import DocumentProcessor, FileResult
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # 未安装 watchdog 时退回轮询
+    FileSystemEventHandler = object
+    Observer = None
+
+# auto：安装了 watchdog 时使用系统通知（Linux 上为 inotify），否则轮询
+WATCH_BACKENDS = ("auto", "native", "poll")
+DEFAULT_DEBOUNCE = 0.1
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class Debouncer:
+    """Coalesces repeated events for the same key.
+
+    A key becomes due once no event arrived for it for ``delay`` seconds,
+    so a file that is still being written is processed once, after the
+    last write.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._last: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def touch(self, key: str, now: float) -> None:
+        self._last[key] = now
+
+    def next_due(self) -> Optional[float]:
+        """Time at which the earliest key becomes due."""
+        return min(self._last.values()) + self.delay if self._last else None
+
+    def pop_due(self, now: float) -> List[str]:
+        due = [key for key, last in self._last.items()
+               if now - last >= self.delay]
+        for key in due:
+            del self._last[key]
+        return due
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class PollingSource:
+    """Reports created or modified files by comparing periodic snapshots."""
+
+    def __init__(self, root: Path, events: Any, interval: float):
+        self.root = root
+        self.events = events
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="wr-cl-poll", daemon=True)
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                key = _stat_key(Path(path))
+                if key is not None:
+                    snapshot[path] = key
+        return snapshot
+
+    def start(self) -> None:
+        # 启动前已存在的文件由启动时的全量处理负责
+        self._previous = self._snapshot()
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            current = self._snapshot()
+            for path, key in current.items():
+                if self._previous.get(path) != key:
+                    self.events.put(path)
+            self._previous = current
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, events: Any):
+        super().__init__()
+        self.events = events
+
+    def on_created(self, event) -> None:
+        if not event.is_directory:
+            self.events.put(event.src_path)
+
+    on_modified = on_created
+
+    def on_moved(self, event) -> None:
+        # 编辑器常先写临时文件再重命名为目标文件
+        if not event.is_directory:
+            self.events.put(event.dest_path)
+
+
+class NativeSource:
+    """Reports file events through watchdog (inotify on Linux)."""
+
+    def __init__(self, root: Path, events: Any):
+        self._observer = Observer()
+        self._observer.schedule(_EventHandler(events), str(root),
+                                recursive=True)
+
+    def start(self) -> None:
+        self._observer.start()
+
+    def stop(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+
+
+class WatchService:
+    """Keeps compiled rules and a warm worker pool, processing files on change.
+
+    Existing documents are processed once at start-up; afterwards every
+    created, modified or moved-in document under ``input_path`` is
+    processed once its writes have settled for ``debounce`` seconds. When
+    the configuration file changes the rules are recompiled and the pool is
+    restarted; the new rules apply to files changed from then on. An
+    invalid configuration is logged and the previous one stays active.
+    """
+
+    def __init__(self, config_path: Path, dry_run: bool = False,
+                 config: Optional[Dict[str, Any]] = None):
+        self.config_path = Path(config_path)
+        self.dry_run = dry_run
+        self._events: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._config_stat = _stat_key(self.config_path)
+        self._in_flight: Dict[Future, float] = {}
+        self._source = None
+        self._pool: Optional[WorkerPool] = None
+        self.debounce = Debouncer(DEFAULT_DEBOUNCE)
+        config = config or config_loader.load_config(str(self.config_path))
+        self._apply(config, DocumentProcessor(config, dry_run=dry_run))
+
+    @staticmethod
+    def _watch_settings(config: Dict[str, Any]) -> Dict[str, Any]:
+        settings = dict(config["advanced"].get("watch") or {})
+        backend = settings.setdefault("backend", "auto")
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"Unknown watch backend '{backend}', "
+                             f"expected one of {WATCH_BACKENDS}")
+        if backend == "native" and Observer is None:
+            raise ValueError("Watch backend 'native' requires watchdog")
+        return settings
+
+    def _apply(self, config: Dict[str, Any],
+               processor: DocumentProcessor) -> None:
+        settings = self._watch_settings(config)
+        self.config = config
+        self.processor = processor
+        self.logger = setup_logger("src.watch",
+                                   level=config.get("log_level", "info"))
+        # 重新加载配置时保留尚未到期的事件
+        self.debounce.delay = settings.get("debounce", DEFAULT_DEBOUNCE)
+        self.poll_interval = settings.get("poll_interval",
+                                          DEFAULT_POLL_INTERVAL)
+        self.backend = settings["backend"]
+        self.input_root = Path(config["file_settings"]["input_path"])
+        self.output_root = Path(config["file_settings"]["output_path"])
+        self.manifest = processor._open_manifest(self.output_root)
+
+    def _start_source(self) -> None:
+        if self.backend == "poll" or Observer is None:
+            self._source = PollingSource(self.input_root, self._events,
+                                         self.poll_interval)
+        else:
+            self._source = NativeSource(self.input_root, self._events)
+        self._source.start()
+        self.logger.info("Watching %s (%s)", self.input_root,
+                         type(self._source).__name__)
+
+    def _start_pool(self) -> None:
+        advanced = self.config["advanced"]
+        self._pool = WorkerPool(self.processor, self.processor.pool_executor,
+                                advanced["max_workers"],
+                                self.processor.timeout)
+
+    def _stop_pool(self) -> None:
+        """Wait for in-flight files and shut the pool down."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._harvest()
+        if self.manifest:
+            self.manifest.save()
+
+    def run(self, initial_scan: bool = True) -> None:
+        """Watch until :meth:`stop` is called or the process is interrupted."""
+        # 先开始监听，启动时全量处理期间到达的文件不会遗漏
+        self._start_source()
+        try:
+            if initial_scan:
+                self.processor.process_all()
+                if self.manifest:
+                    # 全量处理更新过磁盘上的清单，重新读取
+                    self.manifest = self.processor._open_manifest(
+                        self.output_root)
+            self._start_pool()
+            while not self._stop.is_set():
+                self._step()
+        finally:
+            self._source.stop()
+            self._stop_pool()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._events.put(None)
+
+    def _step(self) -> None:
+        now = time.monotonic()
+        timeout = self.poll_interval
+        due_at = self.debounce.next_due()
+        if due_at is not None:
+            timeout = max(0.0, min(timeout, due_at - now))
+        for path in self._drain(timeout):
+            self.debounce.touch(path, time.monotonic())
+
+        self._harvest()
+        if _stat_key(self.config_path) != self._config_stat:
+            self._reload()
+        for job in self._jobs(self.debounce.pop_due(time.monotonic())):
+            future = self._pool.submit([job])
+            self._in_flight[future] = time.monotonic()
+            # 完成时唤醒主循环以记录结果
+            future.add_done_callback(lambda _: self._events.put(None))
+
+    def _drain(self, timeout: float) -> Iterator[str]:
+        try:
+            path = self._events.get(timeout=timeout)
+            while True:
+                if path is not None:
+                    yield path
+                path = self._events.get_nowait()
+        except queue.Empty:
+            return
+
+    def _jobs(self, paths: Iterable[str]) -> Iterator[Job]:
+        """Turn event paths into jobs, applying the discovery filters."""
+        file_settings = self.config["file_settings"]
+        root = os.path.abspath(self.input_root)
+        output_root = os.path.abspath(self.output_root)
+        for path in paths:
+            absolute = os.path.abspath(path)
+            relative = os.path.relpath(absolute, root).replace(os.sep, "/")
+            # 输出目录位于输入目录内时忽略自己写出的文件
+            if (relative.startswith("../")
+                    or os.path.commonpath([absolute, output_root]) == output_root
+                    or not is_document(relative,
+                                       file_settings.get("include", ()),
+                                       file_settings.get("exclude", ()),
+                                       file_settings.get("max_depth"))):
+                continue
+            # 与全量处理使用相同形式的路径，清单中的记录可以共用
+            file_path = self.input_root.joinpath(*relative.split("/"))
+            if not file_path.is_file():
+                continue
+            target_dir = utils.mirror_output_dir(relative, self.output_root)
+            if self.manifest and self.manifest.is_fresh(
+                    file_path, utils.get_output_path(file_path, target_dir)):
+                self.logger.debug("Skipping unchanged %s", file_path)
+                continue
+            if not self.dry_run:
+                target_dir.mkdir(parents=True, exist_ok=True)
+            yield str(file_path), str(target_dir)
+
+    def _harvest(self) -> None:
+        """Record the results of finished files."""
+        done = [f for f in self._in_flight if f.done()]
+        for future in done:
+            submitted = self._in_flight.pop(future)
+            for result in self._results(future):
+                self.processor._record(result, self.manifest)
+                if not result.error:
+                    self.logger.info(
+                        "%s: %d replacements, %s (%.0f ms)", result.path,
+                        result.replacements, result.action,
+                        (time.monotonic() - submitted) * 1000)
+        if done and self.manifest:
+            self.manifest.save()
+
+    @staticmethod
+    def _results(future: Future) -> List[FileResult]:
+        try:
+            return future.result()
+        except Exception as e:
+            return [FileResult(path="<chunk>", error=str(e))]
+
+    def _reload(self) -> None:
+        """Recompile the rules after the configuration file changed."""
+        self._config_stat = _stat_key(self.config_path)
+        if self._config_stat is None:
+            return
+        old_root = self.input_root
+        try:
+            config = config_loader.load_config(str(self.config_path))
+            config.setdefault("log_level", self.config.get("log_level", "info"))
+            # 先在新配置上完成校验与编译，失败时保持原配置
+            processor = DocumentProcessor(config, dry_run=self.dry_run)
+            self._watch_settings(config)
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.error("Keeping previous configuration, reload "
+                              "failed: %s", e)
+            return
+        self._stop_pool()
+        self._apply(config, processor)
+        if os.path.abspath(self.input_root) != os.path.abspath(old_root):
+            self._source.stop()
+            self._start_source()
+        self._start_pool()
+        self.logger.info("Configuration reloaded from %s", self.config_path)
@@ -0,0 +1,71 @@
+"""Zip package writing that avoids recompressing unchanged members."""
+import copy
+import shutil
+import struct
+import zipfile
+from typing import IO, Dict, Union
+
+PathOrFile = Union[str, IO[bytes]]
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_SIGNATURE = b"PK\003\004"
+# 通用标志位 bit 3：大小与 CRC 写在数据之后的描述符中
+_DATA_DESCRIPTOR_FLAG = 0x08
+_COPY_BUFFER = 1024 * 1024
+
+
+def _copy_raw(zin: zipfile.ZipFile, zout: zipfile.ZipFile,
+              info: zipfile.ZipInfo) -> None:
+    """Copy one member's compressed bytes from ``zin`` to ``zout`` as-is."""
+    source = zin.fp
+    source.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(source.read(_LOCAL_HEADER.size))
+    if header[0] != _LOCAL_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    source.seek(header[-2] + header[-1], 1)
+
+    target_info = copy.copy(info)
+    # 大小已知，直接写入本地头，不再需要数据描述符
+    target_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    target_info.header_offset = zout.fp.tell()
+    zout.fp.write(target_info.FileHeader(False))
+
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.read(min(_COPY_BUFFER, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(target_info)
+    zout.NameToInfo[target_info.filename] = target_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+
+def _needs_zip64(info: zipfile.ZipInfo) -> bool:
+    return max(info.file_size, info.compress_size,
+               info.header_offset) > zipfile.ZIP64_LIMIT
+
+
+def copy_package(source: PathOrFile, target: PathOrFile,
+                 updates: Dict[str, bytes]) -> None:
+    """Write ``source`` to ``target`` with the members in ``updates`` replaced.
+
+    Replaced members are compressed again with their original settings;
+    every other member is streamed through as raw compressed bytes, so
+    media and fonts are never inflated or deflated.
+    """
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, "w") as zout:
+        for info in zin.infolist():
+            data = updates.get(info.filename)
+            if data is not None:
+                zout.writestr(copy.copy(info), data)
+            elif _needs_zip64(info):
+                # zip64 成员走普通的流式读写路径
+                with zin.open(info) as src, \
+                        zout.open(copy.copy(info), "w", force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst, _COPY_BUFFER)
+            else:
+                _copy_raw(zin, zout, info)
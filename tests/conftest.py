@@ -1,5 +1,6 @@
 """Test configuration and fixtures for pytest."""
 import os
+import zipfile
 import pytest
 from pathlib import Path
 from docx import Document
@@ -67,3 +68,72 @@ def output_dir():
     output_path = Path("./tests/output")
     output_path.mkdir(parents=True, exist_ok=True)
     return output_path
+
+
+@pytest.fixture
+def make_docs():
+    """Return a helper that writes one-paragraph documents.
+
+    ``make_docs(directory, names, text="公司A")`` creates missing parent
+    directories and returns the paths written.
+    """
+    def make(directory, names, text="公司A"):
+        paths = []
+        for name in names:
+            path = Path(directory) / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            doc = Document()
+            doc.add_paragraph(text)
+            doc.save(path)
+            paths.append(path)
+        return paths
+    return make
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+FOOTNOTES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:footnotes xmlns:w="{W_NS}"><w:footnote w:id="1"><w:p>'
+    '<w:r><w:t>脚注公司</w:t></w:r><w:r><w:t>A</w:t></w:r>'
+    '</w:p></w:footnote></w:footnotes>')
+
+
+@pytest.fixture
+def story_docx(tmp_path):
+    """A document with 公司A in every kind of story: body, text box, a
+    header shared by two sections, footer and footnotes."""
+    from docx.oxml import parse_xml
+
+    doc = Document()
+    doc.add_paragraph("正文公司A")
+    doc.add_paragraph()._p.append(parse_xml(
+        f'<w:r xmlns:w="{W_NS}" xmlns:v="urn:schemas-microsoft-com:vml">'
+        '<w:pict><v:shape><v:textbox><w:txbxContent><w:p><w:r>'
+        '<w:t>文本框公司A</w:t></w:r></w:p></w:txbxContent></v:textbox>'
+        '</v:shape></w:pict></w:r>'))
+    doc.sections[0].header.paragraphs[0].text = "页眉公司A"
+    doc.sections[0].footer.paragraphs[0].text = "页脚公司A"
+    doc.add_section()  # 第二节沿用（链接到）前一节的页眉页脚
+    doc.add_paragraph("第二节公司A")
+    plain = tmp_path / "plain.docx"
+    doc.save(plain)
+
+    # python-docx 不能创建脚注，直接向包内加入 footnotes 部件
+    path = tmp_path / "stories.docx"
+    rels = "word/_rels/document.xml.rels"
+    with zipfile.ZipFile(plain) as zin, zipfile.ZipFile(path, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info)
+            if info.filename == "[Content_Types].xml":
+                data = data.replace(b"</Types>", (
+                    '<Override PartName="/word/footnotes.xml" ContentType="'
+                    'application/vnd.openxmlformats-officedocument.'
+                    'wordprocessingml.footnotes+xml"/></Types>').encode())
+            elif info.filename == rels:
+                data = data.replace(b"</Relationships>", (
+                    '<Relationship Id="rIdFn" Type="http://schemas.'
+                    'openxmlformats.org/officeDocument/2006/relationships/'
+                    'footnotes" Target="footnotes.xml"/></Relationships>').encode())
+            zout.writestr(info, data)
+        zout.writestr("word/footnotes.xml", FOOTNOTES_XML)
+    return path
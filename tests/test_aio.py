@@ -0,0 +1,104 @@
+"""Tests for the asyncio batch driver."""
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src import aio
+from src.processor import DocumentProcessor
+
+
+def _configure(test_config, input_dir, output_dir, **advanced):
+    test_config["file_settings"].update(input_path=str(input_dir),
+                                        output_path=str(output_dir))
+    test_config["advanced"].update(executor="async", max_workers=2,
+                                   **advanced)
+    return test_config
+
+
+@pytest.mark.parametrize("setting", [
+    {"journal": True}, {"resume": True}, {"retries": 2}, {"run_timeout": 60},
+    {"schedule": "lpt"}])
+def test_async_rejects_unsupported_settings(test_config, tmp_path, setting):
+    """Settings the async driver would ignore are a configuration error."""
+    _configure(test_config, tmp_path, tmp_path / "out", **setting)
+    with pytest.raises(ValueError, match="async"):
+        DocumentProcessor(test_config)
+
+
+def test_async_driver_processes_tree(test_config, tmp_path, make_docs):
+    make_docs(tmp_path / "in", ["a.docx", "sub/b.docx"])
+    make_docs(tmp_path / "in", ["plain.docx"], text="无需替换")
+    config = _configure(test_config, tmp_path / "in", tmp_path / "out",
+                        cache=True)
+    results = {Path(r.path).name: r
+               for r in DocumentProcessor(config).process_all()}
+
+    assert all(r.error is None for r in results.values())
+    assert results["a.docx"].action == "written"
+    assert results["plain.docx"].action in ("reflink", "copy_file_range",
+                                            "copy")
+    with zipfile.ZipFile(tmp_path / "out" / "sub" / "b.docx") as zf:
+        assert "DeepSeek" in zf.read("word/document.xml").decode("utf-8")
+    assert (tmp_path / "out" / "plain.docx").exists()
+
+    again = DocumentProcessor(config).process_all()
+    assert {r.action for r in again} == {"cached"}
+
+
+def _track_reads(monkeypatch, delay):
+    """Make reads take ``delay`` seconds; returns the concurrency counters."""
+    original = aio._read
+    lock = threading.Lock()
+    state = {"reading": 0, "peak": 0}
+
+    def tracked_read(path):
+        with lock:
+            state["reading"] += 1
+            state["peak"] = max(state["peak"], state["reading"])
+        time.sleep(delay)
+        with lock:
+            state["reading"] -= 1
+        return original(path)
+
+    monkeypatch.setattr(aio, "_read", tracked_read)
+    return state
+
+
+def test_async_driver_overlaps_slow_reads(test_config, tmp_path,
+                                          monkeypatch, make_docs):
+    """Slow reads of several files are in flight at the same time."""
+    state = _track_reads(monkeypatch, 0.3)
+    make_docs(tmp_path / "in", [f"doc{i}.docx" for i in range(8)])
+    config = _configure(test_config, tmp_path / "in", tmp_path / "out",
+                        prefetch=8, io_workers=8)
+    results = DocumentProcessor(config).process_all()
+
+    assert len(results) == 8 and all(r.modified for r in results)
+    assert state["peak"] > 1
+
+
+def test_prefetch_budget_limits_buffered_bytes(test_config, tmp_path,
+                                               monkeypatch, make_docs):
+    state = _track_reads(monkeypatch, 0.05)
+    make_docs(tmp_path / "in", [f"doc{i}.docx" for i in range(4)])
+    # 每个文件约 36KB，超过 0.01MB 的预读预算，只能逐个读入
+    config = _configure(test_config, tmp_path / "in", tmp_path / "out",
+                        prefetch=4, prefetch_mb=0.01)
+    results = DocumentProcessor(config).process_all()
+
+    assert len(results) == 4 and all(r.error is None for r in results)
+    assert state["peak"] == 1
+
+
+def test_async_dry_run_report(test_config, tmp_path, make_docs):
+    make_docs(tmp_path / "in", ["a.docx"])
+    config = _configure(test_config, tmp_path / "in", tmp_path / "out",
+                        report=str(tmp_path / "changes.jsonl"))
+    results = DocumentProcessor(config, dry_run=True).process_all()
+
+    assert results[0].action == "preview" and results[0].replacements == 1
+    assert len((tmp_path / "changes.jsonl").read_text("utf-8").splitlines()) == 1
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,100 @@
+"""Tests for the in-memory library API."""
+import io
+import os
+import logging
+import zipfile
+
+import pytest
+
+from src import logger_config
+from src.api import Replacer, replace_bytes, replace_many, replace_stream
+
+RULES = [{"old_text": "公司A", "new_text": "DeepSeek"}]
+
+
+def _text(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return zf.read("word/document.xml").decode("utf-8")
+
+
+def test_replace_bytes_and_stream(sample_docx):
+    data = sample_docx.read_bytes()
+    output, report = replace_bytes(data, RULES)
+    assert report.replacements == 3 and report.action == "written"
+    assert report.data is None
+    assert "DeepSeek" in _text(output) and "公司A" not in _text(output)
+
+    fout = io.BytesIO()
+    report = replace_stream(io.BytesIO(data), fout, Replacer(RULES))
+    assert report.replacements == 3 and fout.getvalue() == output
+
+    with pytest.raises(Exception):
+        replace_bytes(b"not a docx", RULES)
+
+
+def test_dry_run_returns_changes(sample_docx):
+    data = sample_docx.read_bytes()
+    output, report = Replacer(RULES, dry_run=True).replace_bytes(data)
+    assert output == data
+    assert [c["new_text"] for c in report.changes] == ["DeepSeek"] * 3
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_replace_many_yields_every_item(sample_docx, tmp_path, executor):
+    data = sample_docx.read_bytes()
+    items = [data, ("named.docx", data), sample_docx, b"broken",
+             tmp_path / "missing.docx"]
+    results = {r.path: r for r in replace_many(items, RULES, max_workers=2,
+                                               executor=executor)}
+
+    assert len(results) == 5
+    assert results["<memory:0>"].replacements == 3
+    assert "DeepSeek" in _text(results["named.docx"].data)
+    assert results[str(sample_docx)].replacements == 3
+    assert results["<memory:3>"].error
+    assert results[str(tmp_path / "missing.docx")].error
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_replace_many_returns_unchanged_documents(sample_docx, executor):
+    """Documents without matches come back as their input bytes."""
+    data = sample_docx.read_bytes()
+    rules = [{"old_text": "不存在的文本", "new_text": "X"}]
+    results = list(replace_many([("plain.docx", data)], rules,
+                                max_workers=1, executor=executor))
+    assert [(r.action, r.data) for r in results] == [("unchanged", data)]
+
+
+def test_no_logging_side_effects(sample_docx, monkeypatch):
+    """Library calls do not install handlers or start the log listener."""
+    calls = []
+    monkeypatch.setattr(logger_config, "setup_logger",
+                        lambda *a, **k: calls.append(a))
+    monkeypatch.setattr("src.processor.setup_logger",
+                        lambda *a, **k: calls.append(a))
+    before = list(logging.getLogger("src.processor").handlers)
+    replace_bytes(sample_docx.read_bytes(), RULES)
+    assert calls == []
+    assert logging.getLogger("src.processor").handlers == before
+
+
+def test_process_workers_log_to_library_logger(sample_docx):
+    """Worker records reach the ``src.api`` logger, not ``src.processor``."""
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    api_logger = logging.getLogger("src.api")
+    api_logger.addHandler(handler)
+    level, api_logger.level = api_logger.level, logging.DEBUG
+    before = list(logging.getLogger("src.processor").handlers)
+    try:
+        list(replace_many([("a.docx", sample_docx.read_bytes())], RULES,
+                          max_workers=1, executor="process"))
+    finally:
+        api_logger.removeHandler(handler)
+        api_logger.setLevel(level)
+
+    processing = [r for r in records
+                  if r.getMessage() == "Processing document: a.docx"]
+    assert processing and processing[0].process != os.getpid()
+    assert logging.getLogger("src.processor").handlers == before
@@ -0,0 +1,53 @@
+"""Test cases for the incremental cache manifest."""
+import os
+from src.cache import Manifest, config_fingerprint, file_digest
+from src.processor import FileResult
+
+
+def _record(tmp_path, manifest):
+    source = tmp_path / "in.docx"
+    output = tmp_path / "out.docx"
+    source.write_bytes(b"input")
+    output.write_bytes(b"output")
+    manifest.record(FileResult(path=str(source), output=str(output),
+                               input_hash=file_digest(source)))
+    return source, output
+
+
+def test_touched_input_with_same_content_is_fresh(tmp_path):
+    """Only a content change invalidates an entry, not a new mtime."""
+    manifest = Manifest(tmp_path / "m.json", "fp")
+    source, output = _record(tmp_path, manifest)
+    manifest.save()
+
+    reloaded = Manifest(tmp_path / "m.json", "fp")
+    os.utime(source, ns=(0, 0))
+    assert reloaded.is_fresh(source, output)
+
+    source.write_bytes(b"changed")
+    assert not reloaded.is_fresh(source, output)
+    assert not Manifest(tmp_path / "m.json", "other").is_fresh(source, output)
+
+
+def test_save_merges_concurrent_writers(tmp_path):
+    """Entries saved by another writer are kept when saving."""
+    path = tmp_path / "m.json"
+    first, second = Manifest(path, "fp"), Manifest(path, "fp")
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    a = _record(tmp_path / "a", first)
+    b = _record(tmp_path / "b", second)
+    first.save()
+    second.save()
+
+    merged = Manifest(path, "fp")
+    assert merged.is_fresh(*a) and merged.is_fresh(*b)
+
+
+def test_fingerprint_tracks_output_settings(test_config):
+    """Rules and output-affecting settings change the fingerprint."""
+    base = config_fingerprint(test_config)
+    test_config["advanced"]["max_workers"] = 8
+    assert config_fingerprint(test_config) == base
+    test_config["advanced"]["engine"] = "xml"
+    assert config_fingerprint(test_config) != base
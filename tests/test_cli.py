@@ -1,6 +1,8 @@
 """Test cases for CLI interface."""
 import pytest
 import shutil
+import subprocess
+import sys
 from pathlib import Path
 from src.cli import main
 
@@ -50,3 +52,47 @@ def test_cli_dry_run(clean_test_env, caplog):
 
     # Verify results
     assert result == 0, "CLI should return 0 on successful dry run"
+
+
+def test_cli_profile(clean_test_env, tmp_path):
+    """--profile writes a merged profile of the run."""
+    output = tmp_path / "run.pstats"
+    result = main(["--config", str(clean_test_env), "--profile", str(output)])
+    assert result == 0
+    assert output.stat().st_size > 0
+
+
+def test_cli_dry_run_report(clean_test_env, tmp_path):
+    """--report streams dry-run matches to a JSONL file."""
+    report = tmp_path / "changes.jsonl"
+    result = main(["--config", str(clean_test_env), "--dry-run",
+                   "--report", str(report)])
+    assert result == 0
+    assert len(report.read_text(encoding="utf-8").splitlines()) == 3
+
+
+def test_cli_report_requires_dry_run(clean_test_env, tmp_path):
+    """--report without --dry-run is rejected instead of silently ignored."""
+    with pytest.raises(SystemExit) as exc:
+        main(["--config", str(clean_test_env),
+              "--report", str(tmp_path / "changes.jsonl")])
+    assert exc.value.code == 2
+    assert not (tmp_path / "changes.jsonl").exists()
+
+
+def test_cli_import_is_lightweight():
+    """Importing the CLI (e.g. for --help) does not load the heavy modules."""
+    code = ("import sys, src.cli; "
+            "print(sorted(m for m in ('docx', 'lxml', 'concurrent.futures', "
+            "'multiprocessing', 'src.processor', 'src.profiling', 'cProfile') "
+            "if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_cli_profile_options_match_profiling():
+    """The CLI's copies of the profiling defaults stay in sync."""
+    from src import cli, profiling
+    assert cli.PROFILE_MODES == profiling.PROFILE_MODES
+    assert cli.DEFAULT_SAMPLE_INTERVAL == profiling.DEFAULT_SAMPLE_INTERVAL
@@ -0,0 +1,23 @@
+"""Test cases for configuration loading."""
+import json
+import logging
+
+from src.config import load_config
+
+
+def test_plain_rule_options_warned(tmp_path, test_config, caplog):
+    """Regex-only options on plain rules are reported when loading."""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(test_config, ensure_ascii=False),
+                    encoding="utf-8")
+    with caplog.at_level(logging.WARNING, logger="src.config"):
+        load_config(str(path))
+    assert "whole_word only apply with pattern_type 'regex'" in caplog.text
+
+    caplog.clear()
+    test_config["replacements"]["pattern_type"] = "regex"
+    path.write_text(json.dumps(test_config, ensure_ascii=False),
+                    encoding="utf-8")
+    with caplog.at_level(logging.WARNING, logger="src.config"):
+        load_config(str(path))
+    assert "only apply" not in caplog.text
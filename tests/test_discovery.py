@@ -0,0 +1,66 @@
+"""Test cases for streaming file discovery."""
+from src.discovery import is_document, iter_found_files
+
+
+def _tree(root):
+    for rel in ["a.docx", "~$a.docx", "notes.txt", "sub/b.docx",
+                "sub/deep/c.docx", "archive/old.docx", "sub/draft_d.docx"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    return root
+
+
+def _names(root, **kwargs):
+    return sorted(f.relative for f in iter_found_files(root, **kwargs))
+
+
+def test_discovers_docx_recursively(tmp_path):
+    """All .docx files are found; lock files and other types are skipped."""
+    root = _tree(tmp_path)
+    assert _names(root) == ["a.docx", "archive/old.docx", "sub/b.docx",
+                            "sub/deep/c.docx", "sub/draft_d.docx"]
+
+
+def test_include_exclude_and_max_depth(tmp_path):
+    """Glob filters and max_depth narrow the walk."""
+    root = _tree(tmp_path)
+    assert _names(root, exclude=["archive", "draft_*"]) == [
+        "a.docx", "sub/b.docx", "sub/deep/c.docx"]
+    assert _names(root, include=["sub/*"]) == [
+        "sub/b.docx", "sub/deep/c.docx", "sub/draft_d.docx"]
+    assert _names(root, max_depth=0) == ["a.docx"]
+    assert _names(root, max_depth=1) == [
+        "a.docx", "archive/old.docx", "sub/b.docx", "sub/draft_d.docx"]
+
+
+def test_is_lazy(tmp_path):
+    """The first file is available before the walk completes."""
+    root = _tree(tmp_path)
+    files = iter_found_files(root)
+    assert next(files).path.suffix == ".docx"
+
+
+def test_skip_prunes_directories_and_files(tmp_path):
+    """Skipped paths, such as a nested output directory, are not walked."""
+    root = _tree(tmp_path)
+    assert _names(root, skip=[root / "sub", root / "a.docx"]) == [
+        "archive/old.docx"]
+
+
+def test_found_files_carry_sizes(tmp_path):
+    (tmp_path / "a.docx").write_bytes(b"x" * 10)
+    assert [(f.path.name, f.size) for f in iter_found_files(tmp_path)] == [
+        ("a.docx", 10)]
+
+
+def test_is_document_agrees_with_walk(tmp_path):
+    """Single-path checks apply the same filters as the directory walk."""
+    root = _tree(tmp_path)
+    files = ["a.docx", "~$a.docx", "notes.txt", "sub/b.docx",
+             "sub/deep/c.docx", "archive/old.docx", "sub/draft_d.docx"]
+    for kwargs in [{}, {"exclude": ["archive", "draft_*"]},
+                   {"include": ["sub/*"]}, {"max_depth": 0},
+                   {"max_depth": 1}]:
+        assert sorted(f for f in files if is_document(f, **kwargs)) == \
+            _names(root, **kwargs)
@@ -0,0 +1,145 @@
+"""Test cases for the raw XML engine."""
+import zipfile
+import pytest
+from docx import Document
+from docx.shared import Pt
+from src.docxml import may_match, replace_in_xml
+from src.matcher import compile_rules
+from src.metrics import StageTimer
+from src.processor import DocumentProcessor
+
+
+def _matcher(*pairs):
+    return compile_rules({"pattern_type": "plain", "rules": [
+        {"old_text": old, "new_text": new} for old, new in pairs]})
+
+
+def _xml_rewrite(config, source, out_dir):
+    """Rewrite ``source`` into ``out_dir`` with the xml engine."""
+    config["advanced"]["engine"] = "xml"
+    out_dir.mkdir(exist_ok=True)
+    result = DocumentProcessor(config, dry_run=False).process_document(
+        source, out_dir)
+    return result, out_dir / source.name
+
+
+def _split_run_docx(path):
+    """A paragraph whose match spans three differently formatted runs."""
+    doc = Document()
+    p = doc.add_paragraph()
+    p.add_run("关于公")
+    bold = p.add_run("司")
+    bold.bold = True
+    big = p.add_run("A的文档")
+    big.font.size = Pt(20)
+    doc.add_paragraph("  公司A  ")
+    doc.save(path)
+    return path
+
+
+def test_match_across_runs_keeps_run_formatting(test_config, tmp_path):
+    """Replacement lands in the first run and other runs keep their format."""
+    source = _split_run_docx(tmp_path / "in.docx")
+    result, target = _xml_rewrite(test_config, source, tmp_path / "out")
+
+    assert result.replacements == 2
+
+    doc = Document(str(target))
+    runs = doc.paragraphs[0].runs
+    assert doc.paragraphs[0].text == "关于DeepSeek的文档"
+    assert [r.text for r in runs] == ["关于DeepSeek", "", "的文档"]
+    assert runs[1].bold is True
+    assert runs[2].font.size == Pt(20)
+    assert doc.paragraphs[1].text == "  DeepSeek  "
+
+
+def test_other_members_copied_unchanged(test_config, tmp_path):
+    """Parts other than the story XML are copied byte-for-byte."""
+    source = _split_run_docx(tmp_path / "in.docx")
+    _, target = _xml_rewrite(test_config, source, tmp_path / "out")
+
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target) as zout:
+        assert zin.namelist() == zout.namelist()
+        for name in zin.namelist():
+            if name != "word/document.xml":
+                assert zin.read(name) == zout.read(name)
+
+
+def test_xml_engine_in_processor(test_config, sample_docx, tmp_path):
+    """The xml engine handles body paragraphs and table cells."""
+    test_config["advanced"]["engine"] = "xml"
+    processor = DocumentProcessor(test_config, dry_run=False)
+    result = processor.process_document(sample_docx, tmp_path)
+
+    assert result.replacements == 3
+    doc = Document(str(tmp_path / sample_docx.name))
+    assert doc.paragraphs[0].text == "这是一个关于DeepSeek的测试文档。"
+    assert doc.tables[0].cell(1, 1).text == "DeepSeek总部"
+
+
+def test_may_match_prescan(tmp_path):
+    """The byte-level prescan finds matches split across runs and rejects misses."""
+    source = _split_run_docx(tmp_path / "in.docx")
+    assert may_match(str(source), _matcher(("公司A", "X")))
+    assert may_match(str(source), _matcher(("于公司", "X")))
+    assert not may_match(str(source), _matcher(("公司B", "X")))
+    # 跨段落的文本不算匹配
+    assert not may_match(str(source), _matcher(("文档  公司", "X")))
+
+
+def test_docx_engine_edits_only_touched_runs(test_config, tmp_path):
+    """The docx engine keeps every run and its formatting when replacing."""
+    source = _split_run_docx(tmp_path / "in.docx")
+    (tmp_path / "out").mkdir()
+    processor = DocumentProcessor(test_config, dry_run=False)
+    result = processor.process_document(source, tmp_path / "out")
+    assert result.replacements == 2
+
+    paragraph = Document(str(tmp_path / "out" / source.name)).paragraphs[0]
+    assert [r.text for r in paragraph.runs] == ["关于DeepSeek", "", "的文档"]
+    assert paragraph.runs[1].bold is True
+    assert paragraph.runs[2].font.size == Pt(20)
+
+
+@pytest.mark.parametrize("engine", ["docx", "xml"])
+def test_matches_do_not_span_tabs_or_breaks(test_config, tmp_path, engine):
+    """Tabs and line breaks separate text; matches next to them still apply."""
+    source = tmp_path / "in.docx"
+    doc = Document()
+    spanning = doc.add_paragraph("公司\tA 和 公司\nA")
+    spanning.paragraph_format.tab_stops.add_tab_stop(Pt(72))
+    doc.add_paragraph("公司A\t公司A\n")
+    doc.save(source)
+
+    test_config["advanced"]["engine"] = engine
+    (tmp_path / "out").mkdir()
+    result = DocumentProcessor(test_config, dry_run=False).process_document(
+        source, tmp_path / "out")
+
+    assert result.replacements == 2
+    paragraphs = Document(str(tmp_path / "out" / source.name)).paragraphs
+    assert paragraphs[0].text == "公司\tA 和 公司\nA"
+    assert paragraphs[1].text == "DeepSeek\tDeepSeek\n"
+
+
+def test_may_match_prescan_stops_at_separators(tmp_path):
+    """The byte prescan splits text at tabs and breaks like the real pass."""
+    source = tmp_path / "in.docx"
+    doc = Document()
+    doc.add_paragraph("公司\tA 和 公司\nA")
+    doc.save(source)
+    assert not may_match(str(source), _matcher(("公司A", "X")))
+    assert may_match(str(source), _matcher(("A 和 公司", "X")))
+
+
+def test_streaming_and_timed_passes_agree(tmp_path):
+    """The single-pass path without metrics edits exactly like the timed one."""
+    source = _split_run_docx(tmp_path / "in.docx")
+    with zipfile.ZipFile(source) as zf:
+        data = zf.read("word/document.xml")
+    matcher = _matcher(("公司A", "X"), ("文档", "Doc"))
+    timer = StageTimer()
+    timed = replace_in_xml(data, matcher, timer)
+    assert replace_in_xml(data, matcher) == timed
+    assert timed[1] == 3 and timer.counters["matches"] == 3
+    assert {"traverse", "match", "rebuild"} <= set(timer.timings)
@@ -0,0 +1,48 @@
+"""Tests for the checkpoint journal."""
+import json
+
+from src.journal import JOURNAL_NAME, Journal, open_journal
+from src.processor import FileResult
+
+
+def test_journal_round_trip_ignores_torn_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path)
+    journal.mark_pending(["a.docx", "b.docx"])
+    journal.record(FileResult(path="a.docx", modified=True, action="written",
+                              timings={"total": 0.5}))
+    journal.record(FileResult(path="b.docx", error="boom"), attempt=1)
+    journal.close()
+    # 模拟写到一半时崩溃
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "c.docx", "sta')
+
+    resumed = Journal(path, resume=True)
+    assert resumed.is_done("a.docx")
+    assert not resumed.is_done("b.docx")
+    assert resumed.entries["b.docx"]["attempt"] == 1
+    assert "c.docx" not in resumed.entries
+    resumed.close()
+
+
+def test_journal_batches_fsync(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr("src.journal.os.fsync", synced.append)
+    journal = Journal(tmp_path / "journal.jsonl", fsync_interval=3600,
+                      fsync_lines=3)
+    journal.mark_pending([f"{i}.docx" for i in range(7)])
+    assert len(synced) == 2
+    journal.close()
+    assert len(synced) == 3
+    lines = (tmp_path / "journal.jsonl").read_text("utf-8").splitlines()
+    assert [json.loads(line)["state"] for line in lines] == ["pending"] * 7
+
+
+def test_open_journal_setting(tmp_path):
+    assert open_journal(None, tmp_path, resume=False) is None
+    journal = open_journal(True, tmp_path, resume=False)
+    assert journal.path == tmp_path / JOURNAL_NAME
+    journal.close()
+    custom = open_journal(str(tmp_path / "run.jsonl"), tmp_path, resume=True)
+    assert custom.path == tmp_path / "run.jsonl"
+    custom.close()
@@ -0,0 +1,27 @@
+"""Test cases for queued logging."""
+import pytest
+from src.logger_config import setup_logger, stop_logging
+from src.processor import DocumentProcessor
+
+
+def test_records_are_written_by_listener(capsys):
+    logger = setup_logger("tests.logging", level="info")
+    logger.debug("hidden %s", "record")
+    logger.info("visible %s", "record")
+    stop_logging()
+
+    err = capsys.readouterr().err
+    assert "visible record" in err
+    assert "hidden record" not in err
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_worker_records_reach_console(test_config, sample_docx, output_dir,
+                                      capsys, executor):
+    """Records from worker threads and processes end up on the console."""
+    test_config["log_level"] = "debug"
+    test_config["advanced"]["executor"] = executor
+    DocumentProcessor(test_config).process_all()
+    stop_logging()
+
+    assert f"Processing document: {sample_docx}" in capsys.readouterr().err
@@ -0,0 +1,91 @@
+"""Test cases for compiled rule matchers."""
+import pickle
+import pytest
+from src.matcher import PlainMatcher, compile_rules
+
+
+def _rules(*pairs):
+    return [{"old_text": old, "new_text": new} for old, new in pairs]
+
+
+def test_longest_match_wins():
+    """Overlapping rules prefer the longest match at a position."""
+    matcher = PlainMatcher(_rules(("公司", "X"), ("公司A", "DeepSeek")))
+    assert matcher.replace("关于公司A和公司B") == ("关于DeepSeek和XB", 2)
+
+
+def test_rules_do_not_cascade():
+    """Replacement output is not re-scanned by later rules."""
+    matcher = PlainMatcher(_rules(("a", "b"), ("b", "c")))
+    assert matcher.replace("ab") == ("bc", 2)
+
+
+def test_finditer_spans_and_duplicates():
+    """The first of duplicate rules wins and spans index the original text."""
+    matcher = PlainMatcher(_rules(("foo", "bar"), ("foo", "baz"), ("", "x")))
+    assert [tuple(m) for m in matcher.finditer("a foo foo")] == [
+        (2, 5, "bar"), (6, 9, "bar")]
+    assert matcher.search("xfoo")
+    assert not matcher.search("fo")
+
+
+def test_long_rules_do_not_exhaust_recursion():
+    """Rules far longer than the recursion limit still compile."""
+    long_rule = "公司" * 1500
+    matcher = PlainMatcher(_rules((long_rule, "X"), (long_rule + "A", "Y")))
+    assert matcher.replace(long_rule + "A|" + long_rule) == ("Y|X", 2)
+    many = PlainMatcher(_rules((long_rule, "X"),
+                               *((f"rule{i}", "-") for i in range(200))))
+    assert not many.small
+    assert many.replace("a" + long_rule) == ("aX", 1)
+
+
+def test_empty_rules_and_pickling():
+    """Matchers without rules are no-ops and compiled matchers pickle."""
+    empty = compile_rules({"pattern_type": "plain", "rules": []})
+    assert empty.replace("text") == ("text", 0)
+    assert list(empty.finditer("text")) == []
+
+    matcher = pickle.loads(pickle.dumps(PlainMatcher(_rules(("a.b", "c")))))
+    assert matcher.replace("a.b axb") == ("c axb", 1)
+
+
+def test_regex_mode_honors_options():
+    """Regex rules apply case_sensitive and whole_word options."""
+    matcher = compile_rules({"pattern_type": "regex", "rules": [
+        {"old_text": r"acme\s+corp", "new_text": "DeepSeek",
+         "options": {"case_sensitive": False, "whole_word": True}},
+        {"old_text": r"(\d{4})-(\d{2})", "new_text": r"\2/\1"},
+    ]})
+    assert matcher.replace("ACME  Corp, xacme corp, 2024-05") == (
+        "DeepSeek, xacme corp, 05/2024", 2)
+    assert not matcher.search("nothing here")
+
+
+def test_regex_earlier_rule_wins_overlap():
+    """Overlapping regex matches keep the earlier rule's span."""
+    matcher = compile_rules({"pattern_type": "regex", "rules": [
+        {"old_text": "bc", "new_text": "1"},
+        {"old_text": "abcd", "new_text": "2"},
+        {"old_text": "d", "new_text": "3"},
+    ]})
+    assert matcher.replace("abcd") == ("a13", 2)
+
+
+def test_regex_backreference_disables_prefilter():
+    """Rules with backreferences still match without the combined prefilter."""
+    matcher = compile_rules({"pattern_type": "regex", "rules": [
+        {"old_text": r"(a)\1", "new_text": "x"},
+        {"old_text": r"(b)\1", "new_text": "y"},
+    ]})
+    assert matcher.prefilter is None
+    assert matcher.replace("aabb") == ("xy", 2)
+
+
+def test_invalid_pattern_type_and_regex():
+    """Bad pattern types and regexes raise ValueError."""
+    with pytest.raises(ValueError):
+        compile_rules({"pattern_type": "glob", "rules": []})
+    with pytest.raises(ValueError):
+        compile_rules({"pattern_type": "regex",
+                       "rules": [{"old_text": "(", "new_text": ""}]})
@@ -0,0 +1,28 @@
+"""Test cases for the memory budget."""
+from src.memory import MemoryBudget, estimate_memory
+
+
+def test_budget_admits_within_limit():
+    budget = MemoryBudget(100)
+    assert budget.fits(60)
+    budget.acquire("a", 60)
+    assert budget.fits(40) and not budget.fits(41)
+    budget.release("a")
+    assert budget.used == 0
+
+
+def test_oversized_item_runs_alone():
+    budget = MemoryBudget(100)
+    assert budget.fits(500)
+    budget.acquire("big", 500)
+    assert not budget.fits(1)
+
+
+def test_no_limit():
+    budget = MemoryBudget()
+    budget.acquire("a", 10 ** 12)
+    assert budget.fits(10 ** 12)
+
+
+def test_estimate_depends_on_engine():
+    assert estimate_memory(1000, "docx") > estimate_memory(1000, "xml") > 1000
@@ -0,0 +1,80 @@
+"""Test cases for metrics collection and exporters."""
+import json
+from src.metrics import (NULL_TIMER, JsonExporter, PrometheusExporter,
+                         RunSummary, StageTimer, percentile)
+from src.processor import DocumentProcessor, FileResult
+
+
+def test_percentile_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_timers():
+    """Enabled timers accumulate; the null timer records nothing."""
+    timer = StageTimer()
+    with timer.stage("parse"):
+        pass
+    with timer.stage("parse"):
+        pass
+    timer.count("matches", 2)
+    assert timer.timings["parse"] >= 0 and timer.counters == {"matches": 2}
+
+    with NULL_TIMER.stage("parse"):
+        NULL_TIMER.count("matches")
+    assert not NULL_TIMER.enabled
+
+
+def test_summary_and_exporters(tmp_path):
+    """Summaries aggregate results and are written as JSON and textfile."""
+    results = [
+        FileResult(path="a", action="written", timings={"total": 0.2},
+                   counters={"matches": 3, "bytes_in": 1000},
+                   pid=7, peak_rss_mb=120.0),
+        FileResult(path="b", action="copy", timings={"total": 0.1},
+                   counters={"bytes_in": 500}, pid=7, peak_rss_mb=150.0),
+        FileResult(path="c", error="boom"),
+    ]
+    summary = RunSummary(results, 1.0, {"discovery": 0.01})
+    data = summary.to_dict()
+    assert data["files"] == 3 and data["errors"] == 1
+    assert data["actions"] == {"written": 1, "copy": 1}
+    assert data["counters"] == {"matches": 3, "bytes_in": 1500}
+    assert data["stages"]["total"]["max"] == 0.2
+    assert data["workers_peak_rss_mb"] == {"7": 150.0}
+    assert "stage total" in summary.format()
+    assert "7=150MB" in summary.format()
+
+    JsonExporter(str(tmp_path / "m.json"), include_files=True).on_run_end(summary)
+    exported = json.loads((tmp_path / "m.json").read_text(encoding="utf-8"))
+    assert len(exported["files_detail"]) == 3
+
+    PrometheusExporter(str(tmp_path / "m.prom")).on_run_end(summary)
+    text = (tmp_path / "m.prom").read_text()
+    assert 'wr_cl_stage_seconds{stage="total",quantile="0.5"}' in text
+    assert 'wr_cl_counter{name="matches"} 3' in text
+    assert 'wr_cl_worker_peak_rss_megabytes{pid="7"} 150.0' in text
+
+
+def test_processor_collects_stage_timings(test_config, sample_docx, output_dir,
+                                          tmp_path):
+    """With metrics enabled each file reports stages, counters and queue wait."""
+    test_config["advanced"]["metrics"] = {"json": str(tmp_path / "run.json")}
+    results = DocumentProcessor(test_config).process_all()
+
+    timings, counters = results[0].timings, results[0].counters
+    for stage in ("queue", "prescan", "parse", "traverse", "match",
+                  "rebuild", "save", "total"):
+        assert stage in timings
+    assert counters["matches"] == 3 and counters["bytes_in"] > 0
+    assert counters["bytes_out"] > 0 and counters["paragraphs"] >= 5
+    summary = json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))
+    assert "discovery" in summary["run_timings"]
+
+
+def test_metrics_disabled_by_default(test_config, sample_docx, output_dir):
+    results = DocumentProcessor(test_config).process_all()
+    assert set(results[0].timings) == {"total"}
+    assert results[0].counters == {}
@@ -1,6 +1,14 @@
 """Test cases for document processor."""
+import csv
+import io
+import json
+import multiprocessing
+import os
 import pytest
 import shutil
+import threading
+import time
+import zipfile
 from pathlib import Path
 from docx import Document
 from src.processor import DocumentProcessor
@@ -55,3 +63,376 @@ def test_dry_run_mode(test_config, sample_docx, output_dir):
     # Check that no output file was created
     output_file = output_dir / sample_docx.name
     assert not output_file.exists(), "Output file should not exist in dry run mode"
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_dry_run_report_matches_real_run(test_config, sample_docx, output_dir,
+                                         tmp_path, suffix):
+    """Dry-run reports exactly the matches the real run replaces."""
+    report_path = tmp_path / f"report{suffix}"
+    test_config["advanced"]["report"] = str(report_path)
+    preview = DocumentProcessor(test_config, dry_run=True).process_all()
+    assert preview[0].action == "preview"
+    assert not (output_dir / sample_docx.name).exists()
+
+    with open(report_path, encoding="utf-8", newline="") as f:
+        if suffix == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f]
+    real = DocumentProcessor(test_config).process_all()
+
+    assert len(rows) == real[0].replacements == 3
+    body = [r for r in rows if int(r["paragraph"]) == 0][0]
+    assert body["part"] == "word/document.xml"
+    assert body["file"] == str(sample_docx)
+    assert body["old_text"] == "公司A" and body["new_text"] == "DeepSeek"
+    assert (int(body["start"]), int(body["end"])) == (6, 9)
+    assert "关于公司A的" in body["context"]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_process_all_executors(test_config, sample_docx, output_dir, executor):
+    """Both executor modes process files and return result records."""
+    test_config["advanced"]["executor"] = executor
+    test_config["advanced"]["max_workers"] = 2
+    processor = DocumentProcessor(test_config, dry_run=False)
+    results = processor.process_all()
+
+    assert len(results) == 1
+    result = results[0]
+    assert result.error is None
+    assert result.modified is True
+    assert result.replacements == 3
+    assert result.timings["total"] > 0
+    assert (output_dir / sample_docx.name).exists()
+
+
+def test_unknown_executor_rejected(test_config, sample_docx):
+    """An unknown executor name is reported as a configuration error."""
+    test_config["advanced"]["executor"] = "fiber"
+    processor = DocumentProcessor(test_config, dry_run=False)
+    with pytest.raises(ValueError):
+        processor.process_all()
+
+
+@pytest.mark.parametrize("policy, action", [
+    ("copy", None), ("link", "hardlink"), ("skip", "skipped")])
+def test_unchanged_files_policy(test_config, sample_docx, output_dir,
+                                policy, action):
+    """Documents without matches are copied, linked or skipped by policy."""
+    test_config["replacements"]["rules"][0]["old_text"] = "不存在的文本"
+    test_config["advanced"]["unchanged_files"] = policy
+    processor = DocumentProcessor(test_config, dry_run=False)
+    result = processor.process_document(sample_docx, output_dir)
+
+    output_file = output_dir / sample_docx.name
+    assert result.modified is False
+    if policy == "skip":
+        assert result.action == "skipped"
+        assert not output_file.exists()
+    else:
+        assert output_file.read_bytes() == sample_docx.read_bytes()
+        if action:
+            assert result.action == action
+
+
+def test_unchanged_files_linked_in_place(test_config, tmp_path, make_docs):
+    """With output == input, linking unchanged files leaves no temp files."""
+    make_docs(tmp_path, ["a.docx", "b.docx"])
+    test_config["replacements"]["rules"][0]["old_text"] = "不存在的文本"
+    test_config["file_settings"].update(input_path=str(tmp_path),
+                                        output_path=str(tmp_path))
+    test_config["advanced"]["unchanged_files"] = "link"
+    results = DocumentProcessor(test_config).process_all()
+
+    assert [r.action for r in results] == ["in_place"] * 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.docx", "b.docx"]
+
+
+def test_incremental_cache_skips_unchanged_inputs(test_config, sample_docx, output_dir):
+    """A warm re-run skips files whose input, rules and output are unchanged."""
+    test_config["advanced"]["cache"] = True
+    first = DocumentProcessor(test_config).process_all()
+    assert [r.action for r in first] == ["written"]
+    assert (output_dir / ".wr-cl-manifest.json").exists()
+
+    second = DocumentProcessor(test_config).process_all()
+    assert [r.action for r in second] == ["cached"]
+
+    # 规则变化后缓存失效
+    test_config["replacements"]["rules"][0]["new_text"] = "Other"
+    third = DocumentProcessor(test_config).process_all()
+    assert [r.action for r in third] == ["written"]
+
+    # 输出被删除后重新处理
+    (output_dir / sample_docx.name).unlink()
+    fourth = DocumentProcessor(test_config).process_all()
+    assert [r.action for r in fourth] == ["written"]
+
+
+@pytest.mark.parametrize("engine", ["docx", "xml"])
+def test_all_stories_processed_once(test_config, story_docx, output_dir, engine):
+    """Body, text boxes, the shared header, footer and footnotes are all
+    replaced and the header shared by two sections is processed once."""
+    test_config["advanced"]["engine"] = engine
+    processor = DocumentProcessor(test_config, dry_run=False)
+    result = processor.process_document(story_docx, output_dir)
+    assert result.replacements == 6
+
+    with zipfile.ZipFile(output_dir / story_docx.name) as zf:
+        text = "".join(zf.read(name).decode("utf-8") for name in zf.namelist()
+                       if name.startswith("word/") and name.endswith(".xml"))
+    assert text.count("DeepSeek") == 6
+    assert "公司A" not in text
+
+
+def _pathological(original):
+    """Wrap process_document so that some files hang or crash the worker."""
+    def process_document(self, file_path, output_path, timer=None):
+        if file_path.name.startswith("hang"):
+            time.sleep(60)
+        if file_path.name.startswith("crash"):
+            os._exit(3)
+        return original(self, file_path, output_path)
+    return process_document
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="patched worker code needs the fork start method")
+def test_process_timeout_kills_and_retries(test_config, output_dir, tmp_path,
+                                           monkeypatch, make_docs):
+    """A hanging file is killed, retried and reported; others complete."""
+    monkeypatch.setattr(DocumentProcessor, "process_document",
+                        _pathological(DocumentProcessor.process_document))
+    make_docs(tmp_path, ["hang.docx", "a.docx", "b.docx", "crash.docx"])
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(executor="process", max_workers=2,
+                                   chunk_size=4, timeout=0.5,
+                                   timeout_retries=1, retries=0)
+    start = time.perf_counter()
+    results = {Path(r.path).name: r
+               for r in DocumentProcessor(test_config).process_all()}
+
+    assert time.perf_counter() - start < 10
+    assert results["hang.docx"].action == "timeout"
+    assert "Timed out" in results["hang.docx"].error
+    assert "exited with code 3" in results["crash.docx"].error
+    assert results["a.docx"].modified and results["b.docx"].modified
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="patched worker code needs the fork start method")
+def test_worker_exit_after_last_result(test_config, output_dir, tmp_path,
+                                       monkeypatch, make_docs):
+    """A worker dying after its last result still resolves the chunk."""
+    from src import pool
+
+    def crash(profile):
+        os._exit(3)
+
+    monkeypatch.setattr(pool.profiling, "flush", crash)
+    make_docs(tmp_path, ["a.docx", "b.docx"])
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(executor="process", max_workers=1,
+                                   chunk_size=2, retries=0)
+    start = time.perf_counter()
+    results = DocumentProcessor(test_config).process_all()
+
+    assert time.perf_counter() - start < 10
+    assert sorted(Path(r.path).name for r in results) == ["a.docx", "b.docx"]
+    assert all(r.modified and r.error is None for r in results)
+
+
+def test_run_timeout_defers_queued_files(test_config, output_dir, tmp_path,
+                                         monkeypatch, make_docs):
+    """After the run deadline queued files are deferred, not lost."""
+    original = DocumentProcessor.process_document
+
+    def slow(self, file_path, output_path, timer=None):
+        time.sleep(0.2)
+        return original(self, file_path, output_path)
+
+    monkeypatch.setattr(DocumentProcessor, "process_document", slow)
+    names = [f"doc{i}.docx" for i in range(8)]
+    make_docs(tmp_path, names)
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(max_workers=1, queue_size=3,
+                                   run_timeout=0.3)
+    results = DocumentProcessor(test_config).process_all()
+
+    actions = [r.action for r in results]
+    assert "deferred" in actions
+    assert "written" in actions
+    seen = [Path(r.path).name for r in results]
+    assert len(seen) == len(set(seen)) and set(seen) <= set(names)
+    assert all(r.error is None for r in results)
+
+
+def test_memory_budget_limits_concurrency(test_config, output_dir, tmp_path,
+                                          monkeypatch, make_docs):
+    """Files whose estimates exceed the budget together do not overlap."""
+    original = DocumentProcessor.process_document
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def tracked(self, file_path, output_path, timer=None):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        return original(self, file_path, output_path)
+
+    monkeypatch.setattr(DocumentProcessor, "process_document", tracked)
+    make_docs(tmp_path, [f"doc{i}.docx" for i in range(6)])
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    # 每个文件约 36KB，估算内存远超 0.1MB 的预算
+    test_config["advanced"].update(max_workers=4, memory_budget_mb=0.1)
+    results = DocumentProcessor(test_config).process_all()
+
+    assert len(results) == 6 and all(r.error is None for r in results)
+    assert state["peak"] == 1
+
+
+def test_large_files_use_streaming_path(test_config, sample_docx, output_dir,
+                                        monkeypatch):
+    """Documents above large_file_mb never go through python-docx."""
+    def fail(*args, **kwargs):
+        raise AssertionError("python-docx path used for a large file")
+
+    monkeypatch.setattr(DocumentProcessor, "_process_with_docx", fail)
+    test_config["advanced"].update(large_file_mb=0, metrics=True)
+    results = DocumentProcessor(test_config).process_all()
+
+    assert results[0].error is None and results[0].replacements == 3
+    assert results[0].pid == os.getpid() and results[0].peak_rss_mb > 0
+
+
+def test_lpt_schedule_dispatches_largest_first(test_config, output_dir,
+                                               tmp_path):
+    """With the lpt schedule larger documents are processed first."""
+    for name, paragraphs in [("small.docx", 1), ("large.docx", 3000),
+                             ("medium.docx", 300)]:
+        doc = Document()
+        for _ in range(paragraphs):
+            doc.add_paragraph("公司A 的年度报告 " * 5)
+        doc.save(tmp_path / name)
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(schedule="lpt", tiny_file_kb=0)
+    results = DocumentProcessor(test_config).process_all()
+
+    assert [Path(r.path).name for r in results] == [
+        "large.docx", "medium.docx", "small.docx"]
+
+
+def test_unknown_schedule_rejected(test_config):
+    test_config["advanced"]["schedule"] = "random"
+    with pytest.raises(ValueError):
+        DocumentProcessor(test_config)
+
+
+def test_output_mirrors_input_tree(test_config, output_dir, tmp_path,
+                                   make_docs):
+    """Same-named files in different folders keep separate outputs."""
+    make_docs(tmp_path / "a", ["report.docx"])
+    make_docs(tmp_path / "b" / "c", ["report.docx"])
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(executor="process", max_workers=2)
+    results = DocumentProcessor(test_config).process_all()
+
+    assert all(r.error is None for r in results)
+    assert sorted(p.relative_to(output_dir).as_posix()
+                  for p in output_dir.rglob("*") if p.is_file()) == [
+        "a/report.docx", "b/c/report.docx"]
+
+
+def test_nested_output_dir_not_reprocessed(test_config, tmp_path, make_docs):
+    """Outputs written inside the input tree are never picked up as inputs."""
+    make_docs(tmp_path, [f"d{i}.docx" for i in range(6)])
+    output_dir = tmp_path / "modified"
+    test_config["file_settings"].update(input_path=str(tmp_path),
+                                        output_path=str(output_dir))
+    test_config["advanced"]["max_workers"] = 2
+    for _ in range(2):
+        results = DocumentProcessor(test_config).process_all()
+        assert len(results) == 6
+    assert not (output_dir / "modified").exists()
+
+
+def test_failed_files_retried_with_backoff(test_config, output_dir, tmp_path,
+                                           monkeypatch, make_docs):
+    """A transient error is retried after the backoff and then succeeds."""
+    original = DocumentProcessor.process_document
+    calls = []
+
+    def flaky(self, file_path, output_path, timer=None):
+        calls.append((file_path.name, time.perf_counter()))
+        if file_path.name == "flaky.docx" and len(
+                [c for c in calls if c[0] == "flaky.docx"]) == 1:
+            raise OSError("transient")
+        return original(self, file_path, output_path)
+
+    monkeypatch.setattr(DocumentProcessor, "process_document", flaky)
+    make_docs(tmp_path, ["flaky.docx", "ok.docx"])
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(retries=2, retry_backoff=0.1, journal=True)
+    results = {Path(r.path).name: r
+               for r in DocumentProcessor(test_config).process_all()}
+
+    assert len(results) == 2 and all(r.error is None for r in results.values())
+    flaky_calls = [t for name, t in calls if name == "flaky.docx"]
+    assert len(flaky_calls) == 2 and flaky_calls[1] - flaky_calls[0] >= 0.1
+    lines = [json.loads(line) for line in
+             (output_dir / ".wr-cl-journal.jsonl").read_text("utf-8").splitlines()]
+    flaky_states = [e["state"] for e in lines
+                    if e["path"].endswith("flaky.docx")]
+    assert flaky_states == ["pending", "failed", "pending", "done"]
+
+
+def test_resume_skips_completed_files(test_config, output_dir, tmp_path,
+                                      monkeypatch, make_docs):
+    """--resume only processes files the journal does not mark as done."""
+    make_docs(tmp_path, ["a.docx", "b.docx", "c.docx"])
+    test_config["file_settings"]["input_path"] = str(tmp_path)
+    test_config["advanced"].update(retries=0, journal=True)
+    original = DocumentProcessor.process_document
+
+    def failing(self, file_path, output_path, timer=None):
+        if file_path.name == "b.docx":
+            raise OSError("interrupted")
+        return original(self, file_path, output_path)
+
+    monkeypatch.setattr(DocumentProcessor, "process_document", failing)
+    first = DocumentProcessor(test_config).process_all()
+    assert sorted(Path(r.path).name for r in first if r.error) == ["b.docx"]
+
+    monkeypatch.setattr(DocumentProcessor, "process_document", original)
+    test_config["advanced"]["resume"] = True
+    results = {Path(r.path).name: r.action
+               for r in DocumentProcessor(test_config).process_all()}
+
+    assert results == {"a.docx": "resumed", "b.docx": "written",
+                       "c.docx": "resumed"}
+
+
+@pytest.mark.parametrize("engine", ["docx", "xml"])
+def test_process_bytes_matches_file_output(test_config, sample_docx,
+                                           output_dir, engine):
+    """In-memory processing produces the same document as the file path."""
+    test_config["advanced"]["engine"] = engine
+    processor = DocumentProcessor(test_config)
+    result = processor.process_bytes(sample_docx.read_bytes(), "test.docx")
+    processor.process_document(sample_docx, output_dir)
+
+    assert result.action == "written" and result.replacements == 3
+    with zipfile.ZipFile(output_dir / "test.docx") as expected, \
+            zipfile.ZipFile(io.BytesIO(result.data)) as actual:
+        assert actual.read("word/document.xml") == \
+            expected.read("word/document.xml")
+
+    unchanged = processor.process_bytes(result.data, "again.docx")
+    assert unchanged.action == "unchanged" and unchanged.data is None
+    failed = processor.process_data(b"not a docx", "broken.docx")
+    assert failed.error and failed.path == "broken.docx"
@@ -0,0 +1,68 @@
+"""Test cases for the run profiler."""
+import pstats
+import threading
+import time
+import pytest
+from src.profiling import StackSampler, profile_run
+from src.processor import DocumentProcessor
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_cprofile_merges_workers(test_config, sample_docx, output_dir,
+                                 tmp_path, executor):
+    """Work done in worker threads and processes ends up in one pstats file."""
+    test_config["advanced"]["executor"] = executor
+    test_config["file_settings"]["input_path"] = str(sample_docx.parent)
+    test_config["file_settings"]["output_path"] = str(output_dir)
+    processor = DocumentProcessor(test_config)
+    output = tmp_path / "run.pstats"
+
+    with profile_run(output) as profile:
+        processor.profile = profile
+        processor.process_all()
+
+    functions = {name for _, _, name in pstats.Stats(str(output)).stats}
+    assert "process_document" in functions
+    assert "process_all" in functions
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_records_registered_threads_only():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    _busy(0.05)
+    assert not sampler.snapshot()
+
+    sampler.add(threading.get_ident())
+    _busy(0.1)
+    sampler.stop()
+    stacks = sampler.snapshot()
+    assert any(stack.split(";")[-1].startswith("_busy") for stack in stacks)
+
+
+def test_sample_mode_writes_collapsed_stacks(test_config, sample_docx,
+                                             output_dir, tmp_path):
+    test_config["file_settings"]["input_path"] = str(sample_docx.parent)
+    test_config["file_settings"]["output_path"] = str(output_dir)
+    processor = DocumentProcessor(test_config)
+    output = tmp_path / "run.collapsed"
+
+    with profile_run(output, mode="sample", interval=0.001) as profile:
+        processor.profile = profile
+        processor.process_all()
+        _busy(0.05)
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines
+    assert all(line.rpartition(" ")[2].isdigit() for line in lines)
+
+
+def test_unknown_profile_mode(tmp_path):
+    with pytest.raises(ValueError):
+        with profile_run(tmp_path / "out", mode="perf"):
+            pass
@@ -0,0 +1,20 @@
+"""Test cases for size-aware scheduling."""
+import pytest
+from src.schedule import estimate_makespan, largest_first, lpt_makespan
+
+
+def test_lpt_makespan():
+    assert lpt_makespan([3, 3, 2, 2, 2], 2) == 7
+    assert lpt_makespan([5, 1, 1], 4) == 5
+    assert lpt_makespan([], 2) == 0
+
+
+def test_estimate_makespan_fits_rate_to_measurements():
+    estimated, lower = estimate_makespan([100, 100, 200], [1.0, 1.0, 2.0], 2)
+    assert estimated == pytest.approx(2.0)
+    assert lower == pytest.approx(2.0)
+    assert estimate_makespan([], [], 2) == (0.0, 0.0)
+
+
+def test_largest_first():
+    assert largest_first([1, 5, 3], key=lambda x: x) == [5, 3, 1]
@@ -0,0 +1,166 @@
+"""Tests for the local replacement service."""
+import base64
+import io
+import json
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.processor import DocumentProcessor
+from src.server import ReplacementServer, connect, parse_address
+
+
+@pytest.fixture
+def serve(test_config):
+    """Start a server on ``address`` in a thread; stopped after the test."""
+    servers = []
+
+    def start(address="127.0.0.1:0", **settings):
+        test_config["advanced"]["server"] = settings
+        server = ReplacementServer(test_config, address)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        return server
+
+    yield start
+    for server, thread in servers:
+        server.shutdown()
+        thread.join(timeout=10)
+
+
+def _post(address, path, body, headers=None):
+    conn = connect(address)
+    try:
+        conn.request("POST", path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_parse_address():
+    assert parse_address("unix:/tmp/wr.sock") == "/tmp/wr.sock"
+    assert parse_address("127.0.0.1:8765") == ("127.0.0.1", 8765)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_replace_bytes_over_http(serve, sample_docx):
+    server = serve()
+    status, headers, body = _post(server.address, "/replace?name=test.docx",
+                                  sample_docx.read_bytes())
+
+    assert status == 200 and headers["X-Replacements"] == "3"
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        xml = zf.read("word/document.xml").decode("utf-8")
+    assert "DeepSeek" in xml and "公司A" not in xml
+
+    status, _, body = _post(server.address, "/replace", b"not a docx")
+    assert status == 422 and json.loads(body)["error"]
+
+
+def test_async_executor_serves_on_process_pool(serve, test_config,
+                                              sample_docx):
+    """executor 'async' is valid config for the server's persistent pool."""
+    test_config["advanced"]["executor"] = "async"
+    server = serve()
+    assert server.pool.kind == "process"
+    status, headers, _ = _post(server.address, "/replace",
+                               sample_docx.read_bytes())
+    assert status == 200 and headers["X-Replacements"] == "3"
+
+
+def _batch(address, request, content_type="application/json"):
+    return _post(address, "/batch", json.dumps(request).encode("utf-8"),
+                 {"Content-Type": content_type})
+
+
+def test_batch_of_paths_over_unix_socket(serve, test_config, sample_docx,
+                                         tmp_path):
+    server = serve(f"unix:{tmp_path / 'wr.sock'}")
+    outside = tmp_path / "outside.docx"
+    outside.write_bytes(sample_docx.read_bytes())
+    request = {"paths": [str(sample_docx),
+                         str(sample_docx.parent / "missing.docx"),
+                         str(outside), str(sample_docx.parent / ".." / "..")]}
+    status, _, body = _batch(server.address, request)
+
+    assert status == 200
+    found, missing, escaped, traversal = json.loads(body)["results"]
+    assert found["replacements"] == 3 and found["output"] is None
+    with zipfile.ZipFile(io.BytesIO(base64.b64decode(found["data"]))) as zf:
+        assert "DeepSeek" in zf.read("word/document.xml").decode("utf-8")
+    assert missing["error"]
+    for result in (escaped, traversal):
+        assert "outside" in result["error"] and "data" not in result
+
+    output_root = Path(test_config["file_settings"]["output_path"])
+    status, _, body = _batch(server.address, {
+        "paths": [str(sample_docx)], "output_path": str(output_root / "batch")})
+    assert json.loads(body)["results"][0]["action"] == "written"
+    assert (output_root / "batch" / sample_docx.name).exists()
+
+    status, _, _ = _batch(server.address, {"paths": [str(sample_docx)],
+                                           "output_path": str(tmp_path)})
+    assert status == 403 and not (tmp_path / sample_docx.name).exists()
+
+
+def test_batch_rejects_cross_site_requests(serve, sample_docx):
+    """Browser-style simple requests and foreign Host headers are refused."""
+    server = serve()
+    request = {"paths": [str(sample_docx)]}
+    assert _batch(server.address, request, "text/plain")[0] == 415
+
+    conn = connect(server.address)
+    try:
+        conn.request("GET", "/health", headers={"Host": "evil.example:8765"})
+        assert conn.getresponse().status == 403
+    finally:
+        conn.close()
+    assert _batch(server.address, request)[0] == 200
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_invalid_content_length_rejected(serve, length):
+    """Malformed lengths get 400 instead of crashing or blocking the handler."""
+    server = serve()
+    conn = connect(server.address, timeout=5)
+    try:
+        conn.putrequest("POST", "/replace")
+        conn.putheader("Content-Length", length)
+        conn.endheaders()
+        response = conn.getresponse()
+        assert response.status == 400
+        assert "Content-Length" in json.loads(response.read())["error"]
+    finally:
+        conn.close()
+
+
+def test_back_pressure_rejects_when_full(serve, sample_docx, monkeypatch):
+    """With every slot busy a request is answered 503 after queue_timeout."""
+    original = DocumentProcessor.process_bytes
+
+    def slow(self, data, name="<memory>", timer=None):
+        time.sleep(0.5)
+        return original(self, data, name)
+
+    monkeypatch.setattr(DocumentProcessor, "process_bytes", slow)
+    server = serve(max_inflight=1, queue_timeout=0.05)
+    data = sample_docx.read_bytes()
+    statuses = []
+    threads = [threading.Thread(
+        target=lambda: statuses.append(
+            _post(server.address, "/replace", data)[0]))
+        for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [200, 503]
+    assert server.rejected == 1 and server.inflight == 0
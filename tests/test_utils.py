@@ -0,0 +1,51 @@
+"""Test cases for file helpers."""
+import os
+import pytest
+from pathlib import Path
+from src.utils import atomic_output, mirror_output_dir, publish_unchanged
+
+
+def test_mirror_output_dir():
+    root = Path("out")
+    assert mirror_output_dir("a.docx", root) == root
+    assert mirror_output_dir("x/y/a.docx", root) == root / "x" / "y"
+
+
+def test_atomic_output_replaces_on_success(tmp_path):
+    target = tmp_path / "doc.docx"
+    target.write_bytes(b"old")
+    with atomic_output(target) as tmp:
+        tmp.write_bytes(b"new")
+        assert target.read_bytes() == b"old"
+    assert target.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["doc.docx"]
+
+
+def test_atomic_output_keeps_old_file_on_failure(tmp_path):
+    target = tmp_path / "doc.docx"
+    target.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_output(target) as tmp:
+            tmp.write_bytes(b"partial")
+            raise RuntimeError("boom")
+    assert target.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["doc.docx"]
+
+
+@pytest.mark.parametrize("policy", ["link", "copy"])
+def test_publish_unchanged_onto_itself(tmp_path, policy):
+    """Publishing a file onto itself leaves it alone and no temp file behind."""
+    source = tmp_path / "doc.docx"
+    source.write_bytes(b"data")
+    assert publish_unchanged(source, source, policy) == "in_place"
+    assert source.read_bytes() == b"data"
+    assert [p.name for p in tmp_path.iterdir()] == ["doc.docx"]
+
+
+def test_atomic_output_same_inode_leaves_no_temp_file(tmp_path):
+    target = tmp_path / "doc.docx"
+    target.write_bytes(b"data")
+    with atomic_output(target) as tmp:
+        tmp.unlink()
+        os.link(target, tmp)
+    assert [p.name for p in tmp_path.iterdir()] == ["doc.docx"]
@@ -0,0 +1,90 @@
+"""Tests for watch mode."""
+import json
+import threading
+import time
+import zipfile
+
+import pytest
+
+from src.watch import Debouncer, WatchService
+
+
+def test_debouncer_coalesces_repeated_events():
+    debounce = Debouncer(2.0)
+    debounce.touch("a", 0.0)
+    debounce.touch("b", 1.0)
+    debounce.touch("a", 2.0)
+    assert debounce.next_due() == 3.0
+    assert debounce.pop_due(3.0) == ["b"]
+    assert debounce.pop_due(3.5) == []
+    assert debounce.pop_due(4.0) == ["a"]
+    assert len(debounce) == 0 and debounce.next_due() is None
+
+
+def _document_text(path):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read("word/document.xml").decode("utf-8")
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_watch_processes_new_files_and_reloads_rules(test_config, tmp_path,
+                                                     make_docs):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    make_docs(input_dir, ["existing.docx"])
+    test_config["file_settings"].update(input_path=str(input_dir),
+                                        output_path=str(output_dir))
+    test_config["advanced"].update(
+        cache=True, watch={"backend": "poll", "poll_interval": 0.05,
+                           "debounce": 0.05})
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(test_config, ensure_ascii=False),
+                           encoding="utf-8")
+
+    service = WatchService(config_path)
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    try:
+        # 启动时处理已有文件
+        assert _wait_for(lambda: (output_dir / "existing.docx").exists())
+        make_docs(input_dir, ["new.docx"])
+        assert _wait_for(lambda: (output_dir / "new.docx").exists())
+        assert "DeepSeek" in _document_text(output_dir / "new.docx")
+
+        test_config["replacements"]["rules"][0]["new_text"] = "Acme"
+        config_path.write_text(json.dumps(test_config, ensure_ascii=False),
+                               encoding="utf-8")
+        assert _wait_for(lambda: service.processor.rules[0]["new_text"]
+                         == "Acme")
+        (input_dir / "sub").mkdir()
+        make_docs(input_dir, ["sub/later.docx"])
+        assert _wait_for(lambda: (output_dir / "sub" / "later.docx").exists())
+        assert "Acme" in _document_text(output_dir / "sub" / "later.docx")
+    finally:
+        service.stop()
+        thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def test_invalid_watch_backend_rejected(test_config, tmp_path):
+    test_config["advanced"]["watch"] = {"backend": "fanotify"}
+    with pytest.raises(ValueError):
+        WatchService(tmp_path / "config.json", config=test_config)
+
+
+def test_async_executor_uses_process_pool(test_config, tmp_path):
+    test_config["advanced"]["executor"] = "async"
+    service = WatchService(tmp_path / "config.json", config=test_config)
+    service._start_pool()
+    try:
+        assert service._pool.kind == "process"
+    finally:
+        service._stop_pool()
@@ -0,0 +1,67 @@
+"""Test cases for zip package copying."""
+import io
+import os
+import zipfile
+from src.ziputil import copy_package
+
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream that forces zipfile to emit data descriptors."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def _make_zip(path, streamed=False):
+    media = os.urandom(4096)
+    target = _Unseekable() if streamed else open(path, "wb")
+    with zipfile.ZipFile(target, "w") as zf:
+        zf.writestr("word/document.xml", "<doc>old</doc>" * 50,
+                    compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("word/media/image1.png", media,
+                    compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/fontTable.xml", "<fonts/>" * 100,
+                    compress_type=zipfile.ZIP_DEFLATED)
+    if streamed:
+        path.write_bytes(target.buffer.getvalue())
+    else:
+        target.close()
+    return path
+
+
+def test_copy_package_replaces_and_copies_raw(tmp_path):
+    """Updated members are re-encoded; the rest keep identical raw data."""
+    source = _make_zip(tmp_path / "in.zip")
+    target = tmp_path / "out.zip"
+    copy_package(str(source), str(target), {"word/document.xml": b"<doc>new</doc>"})
+
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target) as zout:
+        assert zout.testzip() is None
+        assert zout.namelist() == zin.namelist()
+        assert zout.read("word/document.xml") == b"<doc>new</doc>"
+        assert zout.getinfo("word/document.xml").compress_type == zipfile.ZIP_DEFLATED
+        for name in ("word/media/image1.png", "word/fontTable.xml"):
+            src_info, dst_info = zin.getinfo(name), zout.getinfo(name)
+            assert zout.read(name) == zin.read(name)
+            assert (dst_info.CRC, dst_info.compress_size, dst_info.compress_type) == (
+                src_info.CRC, src_info.compress_size, src_info.compress_type)
+
+
+def test_copy_package_source_with_data_descriptors(tmp_path):
+    """Members written with data descriptors are copied into valid output."""
+    source = _make_zip(tmp_path / "in.zip", streamed=True)
+    with zipfile.ZipFile(source) as zin:
+        assert zin.getinfo("word/fontTable.xml").flag_bits & 0x08
+
+    target = io.BytesIO()
+    copy_package(str(source), target, {})
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target) as zout:
+        assert zout.testzip() is None
+        for name in zin.namelist():
+            assert zout.read(name) == zin.read(name)